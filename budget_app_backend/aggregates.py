@@ -0,0 +1,65 @@
+from calendar import monthrange
+from datetime import date, timedelta
+from sqlalchemy import func, case, cast, Date
+from database import db
+from models import Transaction
+
+
+# Supported time buckets for grouped summaries
+INTERVALS = ('day', 'week', 'month')
+
+# Budget periods, in the order the API lists them
+BUDGET_PERIODS = ('daily', 'weekly', 'monthly', 'yearly')
+
+
+def date_bucket(column, interval: str):
+    """SQL expression mapping a date column to the start of its bucket.
+
+    Buckets are labelled by their first day ('YYYY-MM-DD'; weeks start on
+    Monday) except months, which use 'YYYY-MM' like queries/Query.sql.
+    Works on SQLite (strftime/date modifiers) and PostgreSQL (date_trunc).
+    """
+    if interval not in INTERVALS:
+        raise ValueError(f"interval must be one of {list(INTERVALS)}")
+
+    if db.engine.dialect.name == 'sqlite':
+        if interval == 'day':
+            return func.date(column)
+        if interval == 'week':
+            return func.date(column, 'weekday 0', '-6 days')
+        return func.strftime('%Y-%m', column)
+
+    if interval == 'month':
+        return func.to_char(func.date_trunc('month', column), 'YYYY-MM')
+    return func.to_char(cast(func.date_trunc(interval, column), Date), 'YYYY-MM-DD')
+
+
+def bucket_labels(start: date, end: date, interval: str) -> list:
+    """Every label `date_bucket` yields for dates in [start, end], in order."""
+    if interval not in INTERVALS:
+        raise ValueError(f"interval must be one of {list(INTERVALS)}")
+    if interval == 'month':
+        months = (end.year - start.year) * 12 + end.month - start.month + 1
+        return [f"{start.year + (start.month - 1 + i) // 12:04d}-{(start.month - 1 + i) % 12 + 1:02d}" for i in range(max(months, 0))]
+    step = 1 if interval == 'day' else 7
+    first = start if interval == 'day' else start - timedelta(days=start.weekday())
+    return [(first + timedelta(days=d)).isoformat() for d in range(0, (end - first).days + 1, step)]
+
+
+def sum_by_type(t_type: str):
+    """Conditional SUM of the amount over transactions of one type."""
+    return func.coalesce(func.sum(case((Transaction.type == t_type, Transaction.amount), else_=0)), 0)
+
+
+def period_window(period: str, ref: date) -> tuple:
+    """Inclusive (start, end) dates of the budget period containing `ref`."""
+    if period == 'daily':
+        return ref, ref
+    if period == 'weekly':
+        start = ref - timedelta(days=ref.weekday())
+        return start, start + timedelta(days=6)
+    if period == 'monthly':
+        return date(ref.year, ref.month, 1), date(ref.year, ref.month, monthrange(ref.year, ref.month)[1])
+    if period == 'yearly':
+        return date(ref.year, 1, 1), date(ref.year, 12, 31)
+    raise ValueError(f"period must be one of {list(BUDGET_PERIODS)}")
@@ -0,0 +1,151 @@
+"""
+analytics.py
+
+Vectorized ledger analytics. `load_ledger()` reads one user's slice of
+`transaction` with a single query straight into NumPy int64 arrays (date
+ordinals, category ids, signed minor-unit amounts); a `Ledger` then answers
+totals, per-month / per-category sums, running balances and percentiles
+with array operations instead of one SQL aggregate per question.
+
+Arithmetic stays in int64 minor units (see money.py) and is converted to
+major units only in the returned dicts. Rows without a date are left out,
+as in monthly_rollup.
+
+Compare with the SQL-per-call path:
+  python benchmarks/bench_analytics.py [--transactions 100000]
+
+"""
+from datetime import date
+from itertools import chain
+
+import numpy as np
+from sqlalchemy import BigInteger, Date, Integer, case, cast, func, literal, select, type_coerce
+
+from database import db
+from models import Transaction
+import money
+
+UNCATEGORIZED = 0
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def date_ordinal(column):
+    """SQL expression for `date.toordinal()` of a date column."""
+    if db.engine.dialect.name == 'sqlite':
+        # julianday('0001-01-01') is 1721425.5 and that day's ordinal is 1
+        return cast(func.julianday(column) - 1721424.5, Integer)
+    return column - literal(date(1, 1, 1), Date) + 1
+
+
+def signed_minor_amount():
+    """Raw minor units (no Money conversion), income positive and expense negative."""
+    raw = type_coerce(Transaction.amount, BigInteger)
+    return case((Transaction.type == 'income', raw), else_=-raw)
+
+
+class Ledger:
+    """One user's transactions as parallel int64 arrays, ordered by (date, id)."""
+
+    def __init__(self, dates, categories, amounts, opening: int = 0):
+        self.dates = dates            # date ordinals (date.toordinal())
+        self.categories = categories  # category ids, 0 = uncategorized
+        self.amounts = amounts        # minor units, income > 0, expense < 0
+        self.opening = opening        # balance (minor units) before the first row
+
+    def __len__(self):
+        return len(self.amounts)
+
+    def totals(self) -> dict:
+        income = int(self.amounts[self.amounts > 0].sum())
+        spent = -int(self.amounts[self.amounts < 0].sum())
+        return _money_group({}, spent, income)
+
+    def by_category(self) -> list:
+        return [
+            _money_group({"category_id": int(key) or None}, spent, income)
+            for key, spent, income in self._grouped(self.categories)
+        ]
+
+    def by_month(self) -> list:
+        months = self.days().astype('datetime64[M]')
+        return [
+            _money_group({"period": str(key)}, spent, income)
+            for key, spent, income in self._grouped(months)
+        ]
+
+    def running_balance(self) -> list:
+        """End-of-day balance for every day with activity, starting from `opening`."""
+        if not len(self):
+            return []
+        balance = np.cumsum(self.amounts) + self.opening
+        # dates are sorted, so the last row of each day closes it
+        last = np.append(np.flatnonzero(np.diff(self.dates)), len(self.dates) - 1)
+        days = self.days()[last].astype(str)
+        return [{"date": d, "balance": money.from_minor(int(b))} for d, b in zip(days, balance[last])]
+
+    def percentiles(self, qs=(50, 90, 99), t_type: str = 'expense') -> dict:
+        """Amount percentiles (linear interpolation, rounded to the minor unit)."""
+        values = self.amounts[self.amounts < 0] * -1 if t_type == 'expense' else self.amounts[self.amounts > 0]
+        if not len(values):
+            return {str(q): None for q in qs}
+        points = np.rint(np.percentile(values, qs))
+        return {str(q): money.from_minor(int(p)) for q, p in zip(qs, points)}
+
+    def days(self):
+        return (self.dates - _EPOCH_ORDINAL).astype('datetime64[D]')
+
+    def _grouped(self, keys):
+        """(key, spent, income) per distinct key, in key order."""
+        if not len(self):
+            return []
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        starts = np.append(0, np.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1)
+        amounts = self.amounts[order]
+        income = np.add.reduceat(np.where(amounts > 0, amounts, 0), starts)
+        spent = -np.add.reduceat(np.where(amounts < 0, amounts, 0), starts)
+        return zip(sorted_keys[starts], spent.tolist(), income.tolist())
+
+
+def load_ledger(user_id: int, start=None, end=None) -> Ledger:
+    """One query for the rows in [start, end] (inclusive) plus, with `start`, one for the opening balance."""
+    conditions = [Transaction.user_id == user_id, Transaction.date.is_not(None)]
+    if start is not None:
+        conditions.append(Transaction.date >= start)
+    if end is not None:
+        conditions.append(Transaction.date <= end)
+
+    stmt = (
+        select(
+            date_ordinal(Transaction.date),
+            func.coalesce(Transaction.category_id, UNCATEGORIZED),
+            signed_minor_amount(),
+        )
+        .where(*conditions)
+        .order_by(Transaction.date, Transaction.id)
+    )
+    result = db.session.connection().execute(stmt)
+    try:
+        # Every column is already an integer: read the DBAPI tuples directly
+        # rather than building a Row per transaction
+        flat = np.fromiter(chain.from_iterable(result.cursor.fetchall()), dtype=np.int64)
+    finally:
+        result.close()
+    columns = flat.reshape(-1, 3).T
+
+    opening = 0
+    if start is not None:
+        opening = db.session.scalar(
+            select(func.coalesce(func.sum(signed_minor_amount()), 0))
+            .where(Transaction.user_id == user_id, Transaction.date < start)
+        )
+    return Ledger(*(np.ascontiguousarray(c) for c in columns), opening=int(opening))
+
+
+def _money_group(keys: dict, spent: int, income: int) -> dict:
+    return {
+        **keys,
+        "spent": money.from_minor(spent),
+        "income": money.from_minor(income),
+        "net": money.from_minor(income - spent),
+    }
@@ -1,38 +1,8 @@
 from flask import Flask  # type: ignore
 import os
-from flask_jwt_extended import JWTManager, create_access_token
-from flasgger import Swagger
-from flask_cors import CORS
-from flask_migrate import Migrate   # ✅ for migrations
 
-from database import db   # import db from database.py
-from models import User, Category, Transaction  # import your models
-
-# -----------------------------
-# App Initialization
-# -----------------------------
-app = Flask(__name__)
-
-# ✅ Enable CORS (allow frontend access)
-CORS(app, resources={r"/*": {"origins": "*"}})
-
-# -----------------------------
-# Configurations
-# -----------------------------
-# Security (JWT)
-app.config['JWT_SECRET_KEY'] = '9512'  # ⚠️ TODO: move to environment variable for production
-app.config['JWT_IDENTITY_CLAIM'] = 'sub'
-
-# Database (SQLite for development, swap to PostgreSQL/MySQL later)
-app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///budget.db"
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-
-# -----------------------------
-# Extensions
-# -----------------------------
-db.init_app(app)                 # bind SQLAlchemy
-jwt = JWTManager(app)            # setup JWT auth
-migrate = Migrate(app, db)       # ✅ enable migrations
+from database import db, init_db   # import db from database.py
+from config import get_config
 
 # NOTE: Schema management is handled via Flask-Migrate (Alembic).
 # Do not rely on runtime `db.create_all()` for schema changes in
@@ -61,33 +31,105 @@ swagger_template = {
     },
     "security": [{"Bearer": []}]
 }
-swagger = Swagger(app, template=swagger_template)
+
 
 # -----------------------------
-# Blueprints (routes)
+# App Factory
 # -----------------------------
-from routes.auth import auth_bp
-from routes.transactions import transactions_bp
-from routes.categories import categories_bp
-from routes.budgets import budgets_bp
+def create_app(config=None) -> Flask:
+    """Build the API app.
 
-app.register_blueprint(auth_bp)
-app.register_blueprint(transactions_bp)
-app.register_blueprint(categories_bp)
-app.register_blueprint(budgets_bp)
+    `config` is a config class/object or profile name (see config.py);
+    defaults to APP_ENV. Heavy optional pieces are imported here, not at
+    module import, and Swagger is only loaded when API_DOCS is on.
+    Scripts that only need the database should use
+    `database.create_db_app()` instead.
+    """
+    from flask_jwt_extended import JWTManager
+    from flask_cors import CORS
+    from flask_migrate import Migrate   # ✅ for migrations
+
+    app = Flask(__name__)
+
+    # ✅ Enable CORS (allow frontend access)
+    CORS(app, resources={r"/*": {"origins": "*"}})
+
+    # -----------------------------
+    # Configurations + Extensions
+    # -----------------------------
+    # Profile and settings come from the environment (see config.py):
+    # APP_ENV, DATABASE_URL, DB_POOL_SIZE, JWT_SECRET_KEY, SQLITE_*, API_DOCS ...
+    init_db(app, get_config(config))   # bind SQLAlchemy
+    if not app.config.get('JWT_SECRET_KEY'):
+        raise RuntimeError("JWT_SECRET_KEY must be set (the production profile has no default signing key)")
+    JWTManager(app)                    # setup JWT auth
+    Migrate(app, db)                   # ✅ enable migrations
+
+    if app.config['API_DOCS']:
+        from flasgger import Swagger
+        Swagger(app, template=swagger_template)
+
+    # -----------------------------
+    # Blueprints (routes)
+    # -----------------------------
+    from routes.auth import auth_bp
+    from routes.transactions import transactions_bp
+    from routes.categories import categories_bp
+    from routes.budgets import budgets_bp
+    from routes.sync import sync_bp
+    from routes.analytics import analytics_bp
+    from routes.recurring import recurring_bp
+    from routes.admin import admin_bp
+
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(transactions_bp)
+    app.register_blueprint(categories_bp)
+    app.register_blueprint(budgets_bp)
+    app.register_blueprint(sync_bp)
+    app.register_blueprint(analytics_bp)
+    app.register_blueprint(recurring_bp)
+    app.register_blueprint(admin_bp)
+
+    # Opt-in request/SQL instrumentation and /metrics (see instrumentation.py)
+    if app.config['INSTRUMENTATION']:
+        import instrumentation
+        from routes.metrics import metrics_bp
+        instrumentation.init_app(app)
+        app.register_blueprint(metrics_bp)
+
+    # -----------------------------
+    # Test Route
+    # -----------------------------
+    @app.route('/')
+    def home():
+        return '✅ Budget App Backend is running !!!\nmade by Andru the Multi-Billionaire!'
+
+    return app
+
+
+_app = None
+
+
+def __getattr__(name):
+    # Backwards compatible `from app import app`: built on first access only
+    global _app
+    if name == 'app':
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module 'app' has no attribute {name!r}")
 
-# -----------------------------
-# Test Route
-# -----------------------------
-@app.route('/')
-def home():
-    return '✅ Budget App Backend is running !!!\nmade by Andru the Multi-Billionaire!'
 
 # -----------------------------
 # Main Entry Point
 # -----------------------------
 if __name__ == '__main__':
+    app = create_app()
     # Faster dev boot: disable reloader to avoid double-start and slow restarts
     debug = os.getenv('FLASK_DEBUG', '1') == '1'
     use_reloader = os.getenv('USE_RELOADER', '0') == '1'
+    if app.config['OUTBOX_WORKER']:
+        # Dev convenience; in production run `python outbox.py` as its own process
+        from outbox import start_worker_thread
+        start_worker_thread(app)
     app.run(debug=debug, use_reloader=use_reloader)
@@ -10,30 +10,139 @@ Run:
   python apply_quick_ddl.py
 
 """
-from sqlalchemy import inspect, text
-from app import app
-from database import db
+import re
+from sqlalchemy import inspect, text, Integer
+from database import db, create_db_app
+import rollups
+import search
+import money
+import user_settings
 
 CHECKS = [
     # (table_name, column_name, column_sql)
     ('user', 'settings', 'JSON'),
+    ('user', 'settings_version', 'INTEGER DEFAULT 0'),
     ('category', 'user_id', 'INTEGER'),
     ('transaction', 'user_id', 'INTEGER'),
     ('budget', 'user_id', 'INTEGER'),
+    ('category', 'updated_at', 'DATETIME'),
+    ('transaction', 'updated_at', 'DATETIME'),
+    ('budget', 'updated_at', 'DATETIME'),
 ]
 
+INDEXES = [
+    # (index_name, table_name, columns)
+    ('ix_transaction_user_date_note', 'transaction', ('user_id', 'date', 'id', 'note')),
+    ('ix_transaction_user_date_type', 'transaction', ('user_id', 'date', 'type')),
+    ('ix_transaction_user_updated', 'transaction', ('user_id', 'updated_at')),
+    ('ix_category_user_updated', 'category', ('user_id', 'updated_at')),
+    ('ix_budget_user_updated', 'budget', ('user_id', 'updated_at')),
+    ('ix_transaction_user_category_date', 'transaction', ('user_id', 'category_id', 'date')),
+    ('ix_transaction_category', 'transaction', ('category_id',)),
+]
+
+# Superseded by a wider index above; dropped once that exists
+DROPPED_INDEXES = [
+    'ix_transaction_user_date',  # -> ix_transaction_user_date_note
+]
+
+MONEY_COLUMNS = [
+    # (table_name, column_name): REAL major units -> BIGINT minor units (money.py)
+    ('transaction', 'amount'),
+    ('budget', 'amount'),
+    ('monthly_rollup', 'total'),
+]
+# Per-user mirror tables (database.create_user_tables) store minor units too
+MIRROR_TABLE = re.compile(r'^user_\d+_(transactions|budgets)$')
+
 
 def column_exists(inspector, table, column):
     cols = [c['name'] for c in inspector.get_columns(table)]
     return column in cols
 
 
+def money_column_sql(engine, table: str, column: str, nullable: bool = True) -> list:
+    """Statements converting one REAL column to integer minor units in place, keeping NOT NULL."""
+    scaled = f'CAST(ROUND("{column}" * {money.SCALE}) AS BIGINT)'
+    if engine.dialect.name != 'sqlite':
+        return [f'ALTER TABLE "{table}" ALTER COLUMN "{column}" TYPE BIGINT USING {scaled}']
+    # SQLite cannot change a column's type: add, copy, drop, rename (3.35+)
+    # ADD COLUMN ... NOT NULL needs a default; every row is overwritten by the copy
+    tmp = f'{column}_minor'
+    constraint = '' if nullable else ' NOT NULL DEFAULT 0'
+    return [
+        f'ALTER TABLE "{table}" ADD COLUMN "{tmp}" BIGINT{constraint}',
+        f'UPDATE "{table}" SET "{tmp}" = {scaled}',
+        f'ALTER TABLE "{table}" DROP COLUMN "{column}"',
+        f'ALTER TABLE "{table}" RENAME COLUMN "{tmp}" TO "{column}"',
+    ]
+
+
+def migrate_money(engine, inspector) -> bool:
+    """Convert amount columns still declared as REAL; True if `transaction` changed."""
+    tables = inspector.get_table_names()
+    targets = [(t, c) for t, c in MONEY_COLUMNS if t in tables]
+    targets += [(t, 'amount') for t in tables if MIRROR_TABLE.match(t)]
+    converted = False
+    for table, column in targets:
+        col = next((c for c in inspector.get_columns(table) if c['name'] == column), None)
+        if col is None or isinstance(col['type'], Integer):
+            continue
+        print(f"Converting '{table}.{column}' to minor units")
+        try:
+            with engine.begin() as conn:
+                for sql in money_column_sql(engine, table, column, col['nullable']):
+                    conn.execute(text(sql))
+            converted = converted or table == 'transaction'
+        except Exception as e:
+            print(f"Failed to convert '{table}.{column}': {e}")
+    return converted
+
+# String columns whose declared length grew in models.py; SQLite does not
+# enforce VARCHAR lengths, other databases need ALTER COLUMN ... TYPE
+WIDENED_COLUMNS = [
+    # (table_name, column_name, length)
+    ('user', 'password_hash', 256),  # scrypt hashes are ~160 characters
+]
+
+
+def widen_columns(engine, inspector):
+    """Grow VARCHAR columns to the lengths in WIDENED_COLUMNS (not needed on SQLite)."""
+    if engine.dialect.name == 'sqlite':
+        return
+    tables = inspector.get_table_names()
+    for table, column, length in WIDENED_COLUMNS:
+        if table not in tables:
+            continue
+        col = next((c for c in inspector.get_columns(table) if c['name'] == column), None)
+        current = getattr(col['type'], 'length', None) if col else None
+        if current is None or current >= length:
+            continue
+        alter_sql = f'ALTER TABLE "{table}" ALTER COLUMN "{column}" TYPE VARCHAR({length})'
+        print(f"Applying: {alter_sql}")
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(alter_sql))
+        except Exception as e:
+            print(f"Failed to widen '{table}.{column}': {e}")
+
+
 def run():
-    with app.app_context():
+    with create_db_app().app_context():
         # db.engine is available when app context is pushed
         engine = db.engine
         inspector = inspect(engine)
 
+        # Create tables added to models.py since the database was first built
+        existing = set(inspector.get_table_names())
+        missing = [t for t in db.metadata.sorted_tables if t.name not in existing]
+        for table in missing:
+            print(f"Creating table '{table.name}'")
+        if missing:
+            db.metadata.create_all(engine, tables=missing)
+        if 'monthly_rollup' in {t.name for t in missing}:
+            print(f"Backfilled monthly_rollup: {rollups.rebuild()} rows")
+
         for table, col, coltype in CHECKS:
             try:
                 if table not in inspector.get_table_names():
@@ -58,6 +167,46 @@ def run():
             except Exception as e:
                 print(f"Failed to add column '{col}' to '{table}': {e}")
 
+        if 'user_setting' in {t.name for t in missing}:
+            print(f"Copied JSON settings into user_setting: {user_settings.backfill_from_json()} rows")
+
+        for name, table, cols in INDEXES:
+            if table not in inspector.get_table_names():
+                print(f"Table '{table}' not present; skipping index '{name}'")
+                continue
+            col_sql = ', '.join(f'"{c}"' for c in cols)
+            index_sql = f'CREATE INDEX IF NOT EXISTS {name} ON "{table}" ({col_sql})'
+            print(f"Applying: {index_sql}")
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text(index_sql))
+            except Exception as e:
+                print(f"Failed to create index '{name}' on '{table}': {e}")
+
+        for name in DROPPED_INDEXES:
+            print(f"Applying: DROP INDEX IF EXISTS {name}")
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text(f'DROP INDEX IF EXISTS {name}'))
+            except Exception as e:
+                print(f"Failed to drop index '{name}': {e}")
+
+        widen_columns(engine, inspect(engine))
+
+        if migrate_money(engine, inspect(engine)):
+            # Recompute the rollup from the now exact transaction amounts
+            with db.session.begin():
+                print(f"Rebuilt monthly_rollup: {rollups.rebuild(commit=False)} rows")
+
+        if engine.dialect.name == 'sqlite' and search.FTS_TABLE not in inspect(engine).get_table_names():
+            print(f"Creating FTS index '{search.FTS_TABLE}' over transaction notes")
+            try:
+                with engine.begin() as conn:
+                    search.install_fts(None, conn)
+                    search.rebuild_fts(conn)
+            except Exception as e:
+                print(f"Failed to create '{search.FTS_TABLE}': {e}")
+
 
 if __name__ == '__main__':
     print('Running quick DDL checks...')
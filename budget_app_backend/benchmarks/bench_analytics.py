@@ -0,0 +1,125 @@
+"""
+bench_analytics.py
+
+Dashboard analytics two ways over one user's ledger:
+
+  sql:    one SQL aggregate per question (summary_from_transactions for
+          months/categories, a window query for the running balance,
+          ORDER BY ... OFFSET per percentile)
+  numpy:  analytics.load_ledger() once, then Ledger methods on int64 arrays
+
+Prints per-question timings (median of --repeat) and the whole dashboard:
+all questions via SQL vs one load plus all NumPy computations. Results of
+both paths are checked against each other first.
+
+Uses a throwaway SQLite file; does not touch instance/budget.db.
+
+Run (from budget_app_backend/):
+  python benchmarks/bench_analytics.py [--transactions 100000] [--repeat 10]
+
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import func, select
+from config import ProductionConfig
+from database import db, create_db_app
+from models import Transaction
+from aggregates import sum_by_type
+from routes.transactions import summary_from_transactions
+import analytics
+import datagen
+import money
+
+
+def sql_totals(user_id, start, end):
+    spent, income = db.session.query(sum_by_type('expense'), sum_by_type('income')).filter(
+        Transaction.user_id == user_id, Transaction.date >= start, Transaction.date <= end,
+    ).one()
+    return {"spent": spent, "income": income, "net": money.add(income, -spent)}
+
+
+def sql_running_balance(user_id, start, end):
+    day_total = func.sum(analytics.signed_minor_amount())
+    rows = db.session.execute(
+        select(Transaction.date, func.sum(day_total).over(order_by=Transaction.date))
+        .where(Transaction.user_id == user_id, Transaction.date >= start, Transaction.date <= end)
+        .group_by(Transaction.date)
+        .order_by(Transaction.date)
+    )
+    return [{"date": d.isoformat(), "balance": money.from_minor(b)} for d, b in rows]
+
+
+def sql_percentiles(user_id, start, end, qs=(50, 90, 99)):
+    in_range = (Transaction.user_id == user_id, Transaction.type == 'expense',
+                Transaction.date >= start, Transaction.date <= end)
+    n = db.session.query(func.count(Transaction.id)).filter(*in_range).scalar()
+    out = {}
+    for q in qs:
+        # nearest-rank on the sorted amounts: one sort/offset query per percentile
+        k = max(0, min(n - 1, round(q / 100 * (n - 1))))
+        out[str(q)] = db.session.query(Transaction.amount).filter(*in_range).order_by(Transaction.amount).offset(k).limit(1).scalar()
+    return out
+
+
+def timed(fn, repeat: int) -> tuple:
+    samples, result = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--transactions', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchConfig(ProductionConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+
+        with create_db_app(BenchConfig).app_context():
+            db.create_all()
+            print(f"Seeding {args.transactions:,} transactions...")
+            user_id = datagen.generate(1, args.transactions, progress=True)[0]
+            start, end = db.session.query(func.min(Transaction.date), func.max(Transaction.date)).one()
+
+            ledger = analytics.load_ledger(user_id, start, end)
+            assert ledger.totals() == sql_totals(user_id, start, end)
+            assert ledger.by_month() == summary_from_transactions(user_id, start, end, 'month')
+            assert ledger.running_balance() == sql_running_balance(user_id, start, end)
+
+            questions = [
+                ('totals', lambda: sql_totals(user_id, start, end), ledger.totals),
+                ('by month', lambda: summary_from_transactions(user_id, start, end, 'month'), ledger.by_month),
+                ('by category', lambda: summary_from_transactions(user_id, start, end, 'category'), ledger.by_category),
+                ('running balance', lambda: sql_running_balance(user_id, start, end), ledger.running_balance),
+                ('percentiles', lambda: sql_percentiles(user_id, start, end), ledger.percentiles),
+            ]
+
+            load_ms, _ = timed(lambda: analytics.load_ledger(user_id, start, end), args.repeat)
+            print(f"rows={len(ledger):,} repeat={args.repeat} (median ms)")
+            print(f"{'question':<18} {'sql':>9} {'numpy':>9}")
+            sql_total = numpy_total = 0.0
+            for name, sql_fn, np_fn in questions:
+                sql_ms, _ = timed(sql_fn, args.repeat)
+                np_ms, _ = timed(np_fn, args.repeat)
+                sql_total += sql_ms
+                numpy_total += np_ms
+                print(f"{name:<18} {sql_ms:>9.2f} {np_ms:>9.2f}")
+            print(f"{'load_ledger':<18} {'':>9} {load_ms:>9.2f}")
+            print(f"{'dashboard':<18} {sql_total:>9.2f} {load_ms + numpy_total:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
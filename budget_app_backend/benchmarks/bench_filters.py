@@ -0,0 +1,171 @@
+"""
+bench_filters.py
+
+Latency of filtered GET /transactions pages (limit=50, cursor mode) on a
+large table, through the full Flask request path with a real JWT.
+
+Seeds --rows transactions spread over --users users, the measured one a
+heavy user holding --user-share of them (default 200 users, 10%), with a
+small category tree and word-based notes; the others' notes use the same
+words, so how common a word is differs per user and in total. Then times
+each filter (date range, type, category, subtree, amount range, note
+search) for the heavy user, and the note searches for a typical one, and
+reports p50/p95. --budget-ms (default 10) marks slow cases; the exit
+status is 1 if there are any.
+
+Uses a throwaway SQLite file; does not touch instance/budget.db.
+
+Run (from budget_app_backend/):
+  python benchmarks/bench_filters.py [--rows 1000000] [--repeat 50]
+
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert
+from flask_jwt_extended import create_access_token
+from app import create_app
+from config import ProductionConfig
+from database import db
+from models import User, Category, Transaction
+import identity
+
+WORDS = ('coffee', 'groceries', 'rent', 'uber', 'netflix', 'salary', 'gym', 'pharmacy',
+         'bakery', 'fuel', 'parking', 'books', 'cinema', 'lunch', 'dinner', 'taxes')
+RARE_WORD = 'zanzibar'  # in ~0.01% of notes
+SEED_CHUNK = 50_000
+
+
+def seed(rows: int, users: int, share: float) -> tuple:
+    """Returns (heavy user id, its parent category id, a typical user id)."""
+    owners = [User(email=f'bench{i}@local', password_hash='', name=f'Bench {i}') for i in range(users)]
+    db.session.add_all(owners)
+    db.session.flush()
+    user_id = owners[0].id
+
+    parent = Category(name='Food', user_id=user_id)
+    db.session.add(parent)
+    db.session.flush()
+    children = [Category(name=f'Food {i}', parent_id=parent.id, user_id=user_id) for i in range(4)]
+    others = [Category(name=f'Other {i}', user_id=user_id) for i in range(15)]
+    db.session.add_all(children + others)
+    db.session.flush()
+    category_ids = [parent.id] + [c.id for c in children + others] + [None]
+
+    start = date.today() - timedelta(days=5 * 365)
+    rng = random.Random(42)
+    done = 0
+    while done < rows:
+        n = min(SEED_CHUNK, rows - done)
+        batch = []
+        for i in range(n):
+            note = f"{rng.choice(WORDS)} {rng.choice(WORDS)} #{done + i}"
+            if rng.random() < 0.0001:
+                note += f" {RARE_WORD}"
+            batch.append({
+                "user_id": user_id if rng.random() < share else rng.choice(owners[1:]).id,
+                "amount": round(rng.uniform(1, 2000), 2),
+                "type": 'income' if rng.random() < 0.1 else 'expense',
+                "category_id": rng.choice(category_ids),
+                "date": start + timedelta(days=rng.randrange(5 * 365)),
+                "note": note,
+            })
+        db.session.execute(insert(Transaction), batch)
+        done += n
+        print(f"  seeded {done:,}/{rows:,}", end='\r', flush=True)
+    db.session.commit()
+    db.session.execute(db.text('ANALYZE'))
+    print()
+    return user_id, parent.id, owners[1].id
+
+
+def auth_headers(user_id: int) -> dict:
+    user = identity.load_user(user_id)
+    token = create_access_token(
+        identity=str(user_id),
+        additional_claims=identity.identity_claims(user["email"], user["name"], 0),
+    )
+    return {'Authorization': f'Bearer {token}'}
+
+
+def search_cases() -> list:
+    return [
+        ('q common word', 'q=coffee'),
+        ('q rare word', f'q={RARE_WORD}'),
+        ('q two words', 'q=rent+gym'),
+    ]
+
+
+def cases(parent_id: int) -> list:
+    recent = date.today() - timedelta(days=400)
+    return [
+        ('no filter', ''),
+        ('date range (1 month)', f'start_date={recent}&end_date={recent + timedelta(days=30)}'),
+        ('type=income', 'type=income'),
+        ('category', f'category_id={parent_id}'),
+        ('category subtree', f'category_id={parent_id}&include_subcategories=1'),
+        ('amount range', 'min_amount=100&max_amount=150'),
+        *search_cases(),
+        ('combined', f'type=expense&category_id={parent_id}&include_subcategories=1'
+                     f'&start_date={recent}&min_amount=50&q=lunch'),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--user-share', type=float, default=0.1, help="measured user's share of the rows")
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--budget-ms', type=float, default=10.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchConfig(ProductionConfig):
+            JWT_SECRET_KEY = 'bench'
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            API_DOCS = False
+
+        app = create_app(BenchConfig)
+        client = app.test_client()
+        with app.app_context():
+            db.create_all()
+            print(f"Seeding {args.rows:,} rows...")
+            user_id, parent_id, typical_id = seed(args.rows, args.users, args.user_share)
+            heavy, typical = auth_headers(user_id), auth_headers(typical_id)
+
+        print(f"rows={args.rows:,} users={args.users} share={args.user_share} repeat={args.repeat} budget={args.budget_ms}ms (limit=50 pages)")
+        print(f"{'case':<34} {'p50 ms':>8} {'p95 ms':>8} {'rows':>5}")
+        slow = 0
+        runs = [(name, qs, heavy) for name, qs in cases(parent_id)]
+        runs += [(f'{name} (typical user)', qs, typical) for name, qs in search_cases()]
+        for name, qs, headers in runs:
+            url = f'/transactions?limit=50&{qs}'
+            timings = []
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                r = client.get(url, headers=headers)
+                timings.append((time.perf_counter() - t0) * 1000)
+                assert r.status_code == 200, r.get_json()
+            timings.sort()
+            p50, p95 = timings[len(timings) // 2], timings[int(len(timings) * 0.95)]
+            flag = '' if p50 <= args.budget_ms else '  SLOW'
+            slow += bool(flag)
+            print(f"{name:<34} {p50:>8.2f} {p95:>8.2f} {len(r.get_json()['transactions']):>5}{flag}")
+
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+
+    raise SystemExit(1 if slow else 0)
+
+
+if __name__ == '__main__':
+    main()
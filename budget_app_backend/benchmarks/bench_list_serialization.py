@@ -0,0 +1,119 @@
+"""
+bench_list_serialization.py
+
+Rows/sec for the GET /transactions listing, before and after moving to
+tuple serialization with the owner name sent once per envelope.
+
+  before: ORM query with joinedload(Transaction.user), per-row user_name
+  after:  select() of plain columns + serialize_transaction_row
+
+Uses a throwaway SQLite file; does not touch instance/budget.db.
+
+Run (from budget_app_backend/):
+  python benchmarks/bench_list_serialization.py [--rows 10000] [--repeat 5]
+
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select, insert
+from sqlalchemy.orm import joinedload
+from config import Config
+from database import db, create_db_app
+from models import User, Transaction
+from routes.transactions import TRANSACTION_COLUMNS, serialize_transaction_row, owner_name
+
+
+def legacy_list(user_id: int) -> str:
+    items = (
+        Transaction.query
+        .options(joinedload(Transaction.user))
+        .filter_by(user_id=user_id)
+        .order_by(Transaction.date.desc(), Transaction.id.desc())
+        .all()
+    )
+    return json.dumps({"transactions": [{
+        "id": t.id,
+        "amount": t.amount,
+        "type": t.type,
+        "category_id": t.category_id,
+        "date": t.date.isoformat() if t.date else None,
+        "note": t.note,
+        "user_name": getattr(t.user, 'name', None),
+    } for t in items]})
+
+
+def tuple_list(user_id: int) -> str:
+    rows = db.session.execute(
+        select(*TRANSACTION_COLUMNS)
+        .where(Transaction.user_id == user_id)
+        .order_by(Transaction.date.desc(), Transaction.id.desc())
+    )
+    return json.dumps({
+        "transactions": [serialize_transaction_row(r) for r in rows],
+        "user_name": owner_name(user_id),
+    })
+
+
+def seed(rows: int) -> int:
+    user = User(email='bench@local', password_hash='', name='Bench')
+    db.session.add(user)
+    db.session.flush()
+    start = date.today() - timedelta(days=730)
+    db.session.execute(insert(Transaction), [{
+        "user_id": user.id,
+        "amount": round(random.uniform(1, 500), 2),
+        "type": random.choice(('expense', 'expense', 'income')),
+        "category_id": None,
+        "date": start + timedelta(days=random.randrange(730)),
+        "note": f"row {i}",
+    } for i in range(rows)])
+    db.session.commit()
+    return user.id
+
+
+def timed(fn, user_id: int, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        db.session.expunge_all()
+        t0 = time.perf_counter()
+        fn(user_id)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+
+        app = create_db_app(BenchConfig)
+        with app.app_context():
+            db.create_all()
+            user_id = seed(args.rows)
+            before = timed(legacy_list, user_id, args.repeat)
+            after = timed(tuple_list, user_id, args.repeat)
+            db.session.remove()
+            db.engine.dispose()
+
+    print(f"rows={args.rows} (best of {args.repeat})")
+    print(f"  before (ORM + joinedload user): {before * 1000:8.1f} ms  {args.rows / before:12,.0f} rows/s")
+    print(f"  after  (tuples + envelope name): {after * 1000:8.1f} ms  {args.rows / after:12,.0f} rows/s")
+    print(f"  speedup: {before / after:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+bench_login.py
+
+Logins/sec (and per core) through POST /login for a few password hashing
+settings, with concurrent clients hitting the Flask test client. Users are
+created with the method under test, so no rehashing happens during timing.
+"rejected" counts 503s from the bounded hashing pool (clients beyond
+PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE).
+
+Run (from budget_app_backend/):
+  python benchmarks/bench_login.py [--clients 8] [--logins 200]
+  python benchmarks/bench_login.py --methods scrypt:16384:8:1,pbkdf2:sha256:600000
+
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.security import generate_password_hash
+from config import Config
+from database import db
+from models import User
+
+DEFAULT_METHODS = 'scrypt:32768:8:1,scrypt:16384:8:1,pbkdf2:sha256:600000'
+USERS = 20
+
+
+def run(method: str, clients: int, logins: int, tmp: str) -> float:
+    from app import create_app
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmp, method.replace(':', '_') + '.db')}"
+        PASSWORD_HASH_METHOD = method
+        API_DOCS = False
+        OUTBOX_WORKER = False
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            User(email=f'user{i}@bench', name=f'User {i}', password_hash=generate_password_hash('pw', method))
+            for i in range(USERS)
+        ])
+        db.session.commit()
+
+    per_client = logins // clients
+    failures = []
+
+    def worker(n: int):
+        client = app.test_client()
+        for i in range(per_client):
+            r = client.post('/login', json={'email': f'user{(n + i) % USERS}@bench', 'password': 'pw'})
+            if r.status_code != 200:
+                failures.append(r.status_code)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(clients)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    with app.app_context():
+        db.engine.dispose()
+    return (per_client * clients - len(failures)) / elapsed, len(failures)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='POST /login throughput per hashing method')
+    parser.add_argument('--methods', default=DEFAULT_METHODS)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--logins', type=int, default=200)
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    print(f"clients={args.clients} logins={args.logins} cores={cores}")
+    print(f"{'method':<24} {'logins/s':>10} {'per core':>10} {'rejected':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for method in args.methods.split(','):
+            rate, rejected = run(method, args.clients, args.logins, tmp)
+            print(f"{method:<24} {rate:>10.1f} {rate / cores:>10.1f} {rejected:>9}")
+
+
+if __name__ == '__main__':
+    main()
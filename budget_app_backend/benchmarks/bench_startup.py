@@ -0,0 +1,78 @@
+"""
+bench_startup.py
+
+Cold-start cost of the API and of the DB-only script context. Every sample
+runs in a fresh interpreter so imports are not cached between runs.
+
+  full app, API_DOCS=1   import app + create_app() with Swagger
+  full app, API_DOCS=0   same without flasgger
+  db-only context        database.create_db_app() (what CLI scripts use)
+
+For the app variants the first request (GET /) is timed too.
+
+Run (from budget_app_backend/):
+  python benchmarks/bench_startup.py [--repeat 5]
+
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+APP_PROBE = '''
+import json, time
+t0 = time.perf_counter()
+from app import create_app
+t1 = time.perf_counter()
+app = create_app()
+t2 = time.perf_counter()
+app.test_client().get('/')
+t3 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "create": t2 - t1, "first_request": t3 - t2}))
+'''
+
+DB_PROBE = '''
+import json, time
+t0 = time.perf_counter()
+from database import create_db_app
+t1 = time.perf_counter()
+app = create_db_app()
+t2 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "create": t2 - t1, "first_request": 0.0}))
+'''
+
+
+def sample(code: str, env: dict) -> dict:
+    out = subprocess.run([sys.executable, '-c', code], cwd=BACKEND_DIR, env=env,
+                         check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import and first-request latency')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base_env = {**os.environ, 'DATABASE_URL': f"sqlite:///{os.path.join(tmp, 'startup.db')}", 'OUTBOX_WORKER': '0'}
+        variants = [
+            ('full app, API_DOCS=1', APP_PROBE, {**base_env, 'API_DOCS': '1'}),
+            ('full app, API_DOCS=0', APP_PROBE, {**base_env, 'API_DOCS': '0'}),
+            ('db-only context', DB_PROBE, base_env),
+        ]
+        print(f"median of {args.repeat} cold starts (ms)")
+        print(f"{'variant':<22} {'import':>8} {'create':>8} {'1st req':>8} {'total':>8}")
+        for label, code, env in variants:
+            runs = [sample(code, env) for _ in range(args.repeat)]
+            med = {k: statistics.median(r[k] for r in runs) * 1000 for k in runs[0]}
+            total = sum(med.values())
+            print(f"{label:<22} {med['import']:>8.1f} {med['create']:>8.1f} {med['first_request']:>8.1f} {total:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
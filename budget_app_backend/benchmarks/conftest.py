@@ -0,0 +1,98 @@
+"""
+Fixtures for the pytest-benchmark API suite (test_api_benchmarks.py).
+
+Each dataset size gets its own SQLite file populated by datagen.py and an
+app built with create_app(ProductionConfig) on top of it; requests go
+through the Flask test client with a real JWT.
+
+  --bench-rows      comma-separated total transaction counts (default 10000)
+  --bench-users     users the rows are spread over (default 10)
+  --bench-data-dir  keep the generated databases here and reuse them on the
+                    next run (default: a temp dir per session); the tests
+                    write, so each session runs on a fresh copy
+
+"""
+import os
+import shutil
+import sys
+from dataclasses import dataclass
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+from flask.testing import FlaskClient
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('budget benchmarks')
+    group.addoption('--bench-rows', default='10000',
+                    help='comma-separated dataset sizes in transactions, e.g. 10000,100000,1000000')
+    group.addoption('--bench-users', type=int, default=10)
+    group.addoption('--bench-data-dir', default=None)
+
+
+def pytest_generate_tests(metafunc):
+    if 'dataset' in metafunc.fixturenames:
+        sizes = [int(n) for n in metafunc.config.getoption('--bench-rows').split(',') if n.strip()]
+        metafunc.parametrize('dataset', sizes, indirect=True, ids=[f'{n // 1000}k' for n in sizes], scope='session')
+
+
+@dataclass
+class Dataset:
+    rows: int
+    app: Flask
+    client: FlaskClient
+    headers: dict
+    user_id: int
+    category_id: int
+
+
+@pytest.fixture(scope='session')
+def dataset(request, tmp_path_factory):
+    from sqlalchemy import select
+    from flask_jwt_extended import create_access_token
+    from app import create_app
+    from config import ProductionConfig
+    from database import db
+    from models import Category, User
+    import datagen
+    import identity
+
+    rows = request.param
+    users = request.config.getoption('--bench-users')
+    data_dir = request.config.getoption('--bench-data-dir')
+    path = os.path.join(str(tmp_path_factory.mktemp('bench')), f'bench_{rows}_{users}.db')
+    template = os.path.join(data_dir, os.path.basename(path)) if data_dir else None
+    fresh = not (template and os.path.exists(template))
+    if not fresh:
+        shutil.copyfile(template, path)
+
+    class BenchConfig(ProductionConfig):
+        JWT_SECRET_KEY = 'bench'
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+        API_DOCS = False
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        if fresh:
+            db.create_all()
+            datagen.generate(users, rows // users)
+            if template:
+                db.session.remove()
+                with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+                    conn.exec_driver_sql('VACUUM INTO ?', (template,))
+        user_id = db.session.scalar(select(User.id).where(User.email == 'bench0@local'))
+        category_id = db.session.scalar(
+            select(Category.id).where(Category.user_id == user_id, Category.name == 'Foods & Drinks')
+        )
+        user = identity.load_user(user_id)
+        token = create_access_token(
+            identity=str(user_id),
+            additional_claims=identity.identity_claims(user["email"], user["name"], user["settings_version"]),
+        )
+    yield Dataset(rows, app, app.test_client(), {'Authorization': f'Bearer {token}'}, user_id, category_id)
+    with app.app_context():
+        db.engine.dispose()
@@ -0,0 +1,161 @@
+"""
+datagen.py
+
+Reproducible synthetic data for the benchmark suite: N users, each with a
+copy of the default category tree, a few monthly budgets and M
+transactions spread over the last three years (weighted categories,
+log-normal amounts, a monthly salary, word-based notes). The same
+--seed always produces the same rows.
+
+Rows go in with multi-row Core inserts, so triggers (note search) fire
+but the per-request bookkeeping does not; monthly_rollup is rebuilt in
+one statement at the end and the tables are ANALYZEd.
+
+Run (from budget_app_backend/), against a throwaway database:
+  DATABASE_URL=sqlite:////tmp/bench.db python benchmarks/datagen.py --users 10 --transactions 10000
+
+"""
+import argparse
+import math
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, select
+from database import db, create_db_app
+from models import User, Category, Transaction, Budget
+import rollups
+import seed_categories
+import versions
+
+CHUNK = 50_000
+DAYS = 3 * 365
+WORDS = ('coffee', 'groceries', 'rent', 'uber', 'netflix', 'gym', 'pharmacy', 'bakery',
+         'fuel', 'parking', 'books', 'cinema', 'lunch', 'dinner', 'taxes', 'market')
+# Relative spend frequency by top-level category; subcategories share their parent's weight
+WEIGHTS = {
+    "Foods & Drinks": 30, "Shopping": 20, "Transport": 12, "Life & Entertainment": 8,
+    "Housing": 5, "Communication and PC": 4, "Vehicle": 4, "Financial Expenses": 2,
+    "Others": 3, "Investments": 1,
+}
+BUDGETED = ("Foods & Drinks", "Shopping", "Transport", "Life & Entertainment", "Housing")
+
+
+def create_users(count: int, prefix: str = 'bench') -> list:
+    """Insert `count` users (no password) with starter categories; returns their ids."""
+    seed_categories.seed_template()
+    ids = db.session.scalars(
+        insert(User).returning(User.id, sort_by_parameter_order=True),
+        [{"email": f"{prefix}{i}@local", "password_hash": '', "name": f"Bench {i}"} for i in range(count)],
+    ).all()
+    for user_id in ids:
+        seed_categories.clone_template(user_id)
+    db.session.commit()
+    return list(ids)
+
+
+def category_weights(user_id: int) -> tuple:
+    """(category ids, cumulative weights, income category id, top-level name -> id)."""
+    rows = db.session.execute(
+        select(Category.id, Category.name, Category.parent_id).where(Category.user_id == user_id)
+    ).all()
+    names = {cid: name for cid, name, _ in rows}
+    roots = {name: cid for cid, name, parent_id in rows if parent_id is None}
+    ids, weights = [], []
+    for cid, name, parent_id in rows:
+        weight = WEIGHTS.get(names.get(parent_id, name), 0)
+        if weight:
+            ids.append(cid)
+            weights.append(weight)
+    cumulative, total = [], 0
+    for w in weights:
+        total += w
+        cumulative.append(total)
+    return ids, cumulative, roots.get("Income"), roots
+
+
+def transaction_rows(user_id: int, count: int, rng: random.Random, end: date):
+    """Yield `count` transaction dicts for one user, oldest first."""
+    ids, cumulative, income_id, _ = category_weights(user_id)
+    start = end - timedelta(days=DAYS)
+    salary_days = {start + timedelta(days=d) for d in range(0, DAYS, 30)}
+    for i in range(count):
+        day = start + timedelta(days=i * DAYS // max(count, 1))
+        if day in salary_days:
+            salary_days.discard(day)
+            yield {"user_id": user_id, "amount": round(rng.uniform(2500, 4000), 2), "type": 'income',
+                   "category_id": income_id, "date": day, "note": 'salary'}
+            continue
+        category_id = rng.choices(ids, cum_weights=cumulative)[0] if ids and rng.random() > 0.05 else None
+        yield {
+            "user_id": user_id,
+            "amount": round(min(math.exp(rng.gauss(3.2, 1.1)), 5000), 2),
+            "type": 'expense',
+            "category_id": category_id,
+            "date": day,
+            "note": f"{rng.choice(WORDS)} {rng.choice(WORDS)}",
+        }
+
+
+def insert_transactions(user_ids: list, per_user: int, seed: int = 42, end: date = None, progress: bool = False) -> int:
+    rng = random.Random(seed)
+    end = end or date.today()
+    batch, done = [], 0
+    for user_id in user_ids:
+        for row in transaction_rows(user_id, per_user, rng, end):
+            batch.append(row)
+            if len(batch) >= CHUNK:
+                db.session.execute(insert(Transaction), batch)
+                done += len(batch)
+                batch = []
+                if progress:
+                    print(f"  inserted {done:,}/{per_user * len(user_ids):,}", end='\r', flush=True)
+    if batch:
+        db.session.execute(insert(Transaction), batch)
+        done += len(batch)
+    return done
+
+
+def insert_budgets(user_ids: list, seed: int = 42) -> int:
+    rng = random.Random(seed)
+    rows = []
+    for user_id in user_ids:
+        roots = category_weights(user_id)[3]
+        rows.extend(
+            {"user_id": user_id, "category_id": roots[name], "amount": float(rng.randrange(100, 1500, 50)), "period": 'monthly'}
+            for name in BUDGETED if name in roots
+        )
+    if rows:
+        db.session.execute(insert(Budget), rows)
+    return len(rows)
+
+
+def generate(users: int = 10, transactions: int = 10_000, seed: int = 42, progress: bool = False) -> list:
+    """Populate an empty database; returns the benchmark user ids."""
+    user_ids = create_users(users)
+    insert_transactions(user_ids, transactions, seed, progress=progress)
+    insert_budgets(user_ids, seed)
+    for user_id in user_ids:
+        versions.bump(user_id, versions.TRANSACTIONS, versions.BUDGETS)
+    rollups.rebuild(commit=False)
+    db.session.commit()
+    db.session.execute(db.text('ANALYZE'))
+    if progress:
+        print()
+    return user_ids
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate synthetic benchmark data')
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--transactions', type=int, default=10_000, help='per user')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    with create_db_app().app_context():
+        db.create_all()
+        ids = generate(args.users, args.transactions, args.seed, progress=True)
+        print(f"Generated {len(ids)} users x {args.transactions:,} transactions")
@@ -0,0 +1,166 @@
+"""
+load_test.py
+
+Concurrent read/write load against the production serving profile, repeated
+for several worker counts, to show how SQLite (WAL profile vs defaults)
+scales under gunicorn or waitress.
+
+Each run starts a fresh server on a throwaway SQLite file, signs up one
+user, then keeps --clients threads busy for --duration seconds issuing
+GET /transactions?limit=50 and (with probability --write-ratio)
+POST /transactions.
+
+Run (from budget_app_backend/):
+  python benchmarks/load_test.py --workers 1,2,4 --duration 10
+  python benchmarks/load_test.py --profile development   # compare without WAL tuning
+  python benchmarks/load_test.py --server waitress        # --workers = threads
+
+"""
+import argparse
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(kind: str, workers: int, port: int, env: dict) -> subprocess.Popen:
+    if kind == 'gunicorn':
+        cmd = [sys.executable, '-m', 'gunicorn', '-w', str(workers), '-b', f'127.0.0.1:{port}',
+               '--log-level', 'warning', 'wsgi:create_wsgi_app()']
+    else:
+        cmd = [sys.executable, 'wsgi.py', '--host', '127.0.0.1', '--port', str(port), '--threads', str(workers)]
+    return subprocess.Popen(cmd, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+
+def wait_ready(base: str, timeout: float = 20.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            requests.get(base + '/', timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.1)
+    raise RuntimeError('server did not start')
+
+
+def create_schema(env: dict):
+    code = 'from database import db, create_db_app\nwith create_db_app().app_context(): db.create_all()'
+    subprocess.run([sys.executable, '-c', code], cwd=BACKEND_DIR, env=env, check=True)
+
+
+def percentile(values: list, p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def run_once(args, workers: int) -> dict:
+    tmp = tempfile.mkdtemp(prefix='budget-load-')
+    port = free_port()
+    env = {
+        **os.environ,
+        'APP_ENV': args.profile,
+        'DATABASE_URL': f"sqlite:///{os.path.join(tmp, 'load.db')}",
+        'OUTBOX_SINK': 'none',
+        'OUTBOX_WORKER': '0',
+        'JWT_SECRET_KEY': os.getenv('JWT_SECRET_KEY', 'load-test'),
+        'FLASK_DEBUG': '0',
+    }
+    create_schema(env)
+    server = start_server(args.server, workers, port, env)
+    base = f'http://127.0.0.1:{port}'
+    try:
+        wait_ready(base)
+        requests.post(base + '/signup', json={'email': 'load@local', 'password': 'pw'}, timeout=10)
+        token = requests.post(base + '/login', json={'email': 'load@local', 'password': 'pw'}, timeout=10).json()['access_token']
+        headers = {'Authorization': f'Bearer {token}'}
+        requests.post(base + '/transactions/bulk', headers=headers, timeout=60, json=[
+            {'amount': random.randint(1, 500), 'type': 'expense'} for _ in range(2000)
+        ])
+
+        lock = threading.Lock()
+        results = {'read': [], 'write': [], 'errors': 0}
+        stop_at = time.time() + args.duration
+
+        def client():
+            session = requests.Session()
+            local = {'read': [], 'write': [], 'errors': 0}
+            while time.time() < stop_at:
+                write = random.random() < args.write_ratio
+                t0 = time.perf_counter()
+                try:
+                    if write:
+                        r = session.post(base + '/transactions', headers=headers, timeout=30,
+                                         json={'amount': random.randint(1, 500), 'type': 'expense'})
+                    else:
+                        r = session.get(base + '/transactions?limit=50', headers=headers, timeout=30)
+                    ok = r.status_code < 400
+                except requests.RequestException:
+                    ok = False
+                if ok:
+                    local['write' if write else 'read'].append(time.perf_counter() - t0)
+                else:
+                    local['errors'] += 1
+            with lock:
+                results['read'] += local['read']
+                results['write'] += local['write']
+                results['errors'] += local['errors']
+
+        threads = [threading.Thread(target=client) for _ in range(args.clients)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    latencies = results['read'] + results['write']
+    return {
+        'workers': workers,
+        'reads_per_s': len(results['read']) / args.duration,
+        'writes_per_s': len(results['write']) / args.duration,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'errors': results['errors'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent read/write load test across worker counts')
+    parser.add_argument('--workers', default='1,2,4', help='comma-separated worker (gunicorn) or thread (waitress) counts')
+    parser.add_argument('--server', choices=['gunicorn', 'waitress'], default='gunicorn' if os.name != 'nt' else 'waitress')
+    parser.add_argument('--profile', choices=['production', 'development'], default='production')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    args = parser.parse_args()
+
+    print(f"server={args.server} profile={args.profile} clients={args.clients} "
+          f"duration={args.duration}s write_ratio={args.write_ratio}")
+    print(f"{'workers':>8} {'reads/s':>9} {'writes/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+    for workers in (int(w) for w in args.workers.split(',')):
+        r = run_once(args, workers)
+        print(f"{r['workers']:>8} {r['reads_per_s']:>9.1f} {r['writes_per_s']:>9.1f} "
+              f"{r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['errors']:>7}")
+
+
+if __name__ == '__main__':
+    main()
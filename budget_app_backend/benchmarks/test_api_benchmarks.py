@@ -0,0 +1,119 @@
+"""
+test_api_benchmarks.py
+
+pytest-benchmark suite for the main API endpoints over synthetic data
+(see conftest.py and datagen.py). Needs `pip install pytest-benchmark`.
+
+Run (from budget_app_backend/):
+  python -m pytest benchmarks                                      # 10k rows
+  python -m pytest benchmarks --bench-rows 10000,100000,1000000
+
+Regression check against the committed baseline (same machine class):
+  python -m pytest benchmarks --benchmark-compare=benchmarks/baseline.json \\
+      --benchmark-compare-fail=median:25%
+Refresh it after an intended change:
+  python -m pytest benchmarks --benchmark-json=benchmarks/baseline.json
+
+The create benchmarks add rows, so a database reused via --bench-data-dir
+slowly grows; delete it to start from the generated state again.
+
+"""
+from datetime import date, timedelta
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+
+def get(dataset, url: str, status: int = 200):
+    resp = dataset.client.get(url, headers=dataset.headers)
+    assert resp.status_code == status, resp.get_data(as_text=True)
+    return resp
+
+
+def post(dataset, url: str, payload, status: int = 201):
+    resp = dataset.client.post(url, headers=dataset.headers, json=payload)
+    assert resp.status_code == status, resp.get_data(as_text=True)
+    return resp
+
+
+def year_range() -> str:
+    """The last 12 whole calendar months (month-aligned: served from monthly_rollup)."""
+    first = date.today().replace(day=1)
+    start = (first - timedelta(days=365)).replace(day=1)
+    return f'start_date={start}&end_date={first - timedelta(days=1)}'
+
+
+@pytest.mark.benchmark(group='list')
+def test_list_all(benchmark, dataset):
+    resp = benchmark(get, dataset, '/transactions')
+    assert len(resp.json['transactions']) >= dataset.rows // 100
+
+
+@pytest.mark.benchmark(group='list')
+def test_list_first_page(benchmark, dataset):
+    resp = benchmark(get, dataset, '/transactions?limit=50')
+    assert len(resp.json['transactions']) == 50
+
+
+@pytest.mark.benchmark(group='list')
+def test_list_deep_cursor_page(benchmark, dataset):
+    cursor = None
+    for _ in range(10):
+        cursor = get(dataset, f'/transactions?limit=50&cursor={cursor or ""}').json['next_cursor']
+    benchmark(get, dataset, f'/transactions?limit=50&cursor={cursor}')
+
+
+@pytest.mark.benchmark(group='list')
+def test_list_offset_page_with_total(benchmark, dataset):
+    benchmark(get, dataset, '/transactions?page=10&per_page=50&with_total=1')
+
+
+@pytest.mark.benchmark(group='list')
+def test_list_filtered_page(benchmark, dataset):
+    benchmark(get, dataset, f'/transactions?limit=50&type=expense&category_id={dataset.category_id}'
+                            f'&include_subcategories=1&{year_range()}')
+
+
+@pytest.mark.benchmark(group='summary')
+def test_summary_months(benchmark, dataset):
+    benchmark(get, dataset, f'/transactions/summary?{year_range()}&group_by=month')
+
+
+@pytest.mark.benchmark(group='summary')
+def test_summary_category(benchmark, dataset):
+    benchmark(get, dataset, f'/transactions/summary?{year_range()}&group_by=category')
+
+
+@pytest.mark.benchmark(group='summary')
+def test_summary_unaligned_days(benchmark, dataset):
+    start = date.today() - timedelta(days=45)
+    benchmark(get, dataset, f'/transactions/summary?start_date={start}&end_date={date.today()}&group_by=day')
+
+
+@pytest.mark.benchmark(group='create')
+def test_create(benchmark, dataset):
+    payload = {'amount': 12.5, 'type': 'expense', 'category_id': dataset.category_id, 'note': 'bench lunch'}
+    benchmark(post, dataset, '/transactions', payload)
+
+
+@pytest.mark.benchmark(group='create')
+def test_bulk_create_100(benchmark, dataset):
+    payload = [
+        {'amount': 1 + i, 'type': 'expense', 'category_id': dataset.category_id,
+         'date': (date.today() - timedelta(days=i)).isoformat(), 'note': f'bulk {i}'}
+        for i in range(100)
+    ]
+    benchmark(post, dataset, '/transactions/bulk', payload)
+
+
+@pytest.mark.benchmark(group='budgets')
+def test_budgets_list(benchmark, dataset):
+    resp = benchmark(get, dataset, '/budgets')
+    assert resp.json['budgets']
+
+
+@pytest.mark.benchmark(group='budgets')
+def test_budgets_status(benchmark, dataset):
+    benchmark(get, dataset, '/budgets/status')
+
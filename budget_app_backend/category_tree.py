@@ -0,0 +1,144 @@
+"""
+category_tree.py
+
+Per-user category tree, built with one query and cached in-process (an
+LRU of the most recently used users' trees).
+Category writes call `invalidate(user_id)`; the next read rebuilds it.
+A tree built while an invalidation happened is not cached, so a rebuild
+that read the old rows cannot overwrite the invalidation. The cache is per
+worker process, so other workers may serve a tree that is stale for up to
+TREE_TTL seconds.
+"""
+import threading
+from sqlalchemy import select
+from cache import TTLCache
+from database import db
+from models import Category, Transaction
+from aggregates import sum_by_type
+
+
+class CategoryTree:
+    """Flattened view of one user's categories.
+
+    `nodes` maps id -> {"id", "name", "parent_id"}; `children` maps id -> child
+    ids; `ancestors` maps id -> ids from the parent up to the root;
+    `descendants` maps id -> every id in the subtree (excluding itself).
+    """
+
+    def __init__(self, rows):
+        self.nodes = {cid: {"id": cid, "name": name, "parent_id": parent_id} for cid, name, parent_id in rows}
+        self.children = {cid: [] for cid in self.nodes}
+        self.roots = []
+        for cid, node in self.nodes.items():
+            parent_id = node["parent_id"]
+            if parent_id in self.nodes and parent_id != cid:
+                self.children[parent_id].append(cid)
+            else:
+                # Top level, or parent owned by someone else / missing
+                self.roots.append(cid)
+        for ids in self.children.values():
+            ids.sort(key=lambda i: self.nodes[i]["name"].lower())
+        self.roots.sort(key=lambda i: self.nodes[i]["name"].lower())
+
+        self.ancestors = {}
+        for cid in self.nodes:
+            chain, seen = [], {cid}
+            parent_id = self.nodes[cid]["parent_id"]
+            while parent_id in self.nodes and parent_id not in seen:
+                chain.append(parent_id)
+                seen.add(parent_id)
+                parent_id = self.nodes[parent_id]["parent_id"]
+            self.ancestors[cid] = chain
+
+        self.descendants = {cid: set() for cid in self.nodes}
+        for cid, chain in self.ancestors.items():
+            for ancestor in chain:
+                self.descendants[ancestor].add(cid)
+
+    def subtree_ids(self, category_id: int) -> set:
+        """The category itself plus all its descendants (empty if unknown)."""
+        if category_id not in self.nodes:
+            return set()
+        return {category_id} | self.descendants[category_id]
+
+    def nested(self, totals=None) -> list:
+        """Nested list of root nodes with `children`, plus subtree totals if given."""
+        def build(cid, path):
+            node = dict(self.nodes[cid])
+            if totals is not None:
+                spent, income = totals.get(cid, (0.0, 0.0))
+                node.update({"total_expense": spent, "total_income": income})
+            node["children"] = [build(child, path | {child}) for child in self.children[cid] if child not in path]
+            return node
+        return [build(cid, {cid}) for cid in self.roots]
+
+
+TREE_CACHE_SIZE = 4096
+TREE_TTL = 300
+
+_trees = TTLCache(maxsize=TREE_CACHE_SIZE, ttl=TREE_TTL)
+# Bumped by every invalidate(); a build only caches its tree if it is unchanged
+_generation = 0
+_lock = threading.Lock()
+
+
+def get_tree(user_id: int) -> CategoryTree:
+    tree = _trees.get(user_id)
+    if tree is None:
+        with _lock:
+            generation = _generation
+        rows = db.session.execute(
+            select(Category.id, Category.name, Category.parent_id).where(Category.user_id == user_id)
+        ).all()
+        tree = CategoryTree(rows)
+        with _lock:
+            if generation == _generation:
+                _trees.set(user_id, tree)
+    return tree
+
+
+def invalidate(user_id: int):
+    global _generation
+    with _lock:
+        _generation += 1
+        _trees.invalidate(user_id)
+
+
+def is_ancestor(ancestor_id: int, category_id: int) -> bool:
+    """True if `ancestor_id` is `category_id` itself or above it in the tree.
+
+    Walks up the parent chain with a recursive CTE (UNION stops on cycles
+    already in the data). Making X a child of Y creates a cycle exactly
+    when is_ancestor(X, Y).
+    """
+    up = select(Category.id, Category.parent_id).where(Category.id == category_id).cte('up', recursive=True)
+    up = up.union(select(Category.id, Category.parent_id).join(up, Category.id == up.c.parent_id))
+    return db.session.execute(select(up.c.id).where(up.c.id == ancestor_id).limit(1)).first() is not None
+
+
+def subtree_totals(user_id: int, start=None, end=None) -> dict:
+    """Rolled-up (expense, income) per category including all descendants.
+
+    One statement: a recursive CTE pairs every category with each member of
+    its subtree, then transactions are joined and summed per subtree root.
+    """
+    base = select(Category.id.label('root_id'), Category.id.label('id')).where(Category.user_id == user_id)
+    subtree = base.cte('subtree', recursive=True)
+    subtree = subtree.union(
+        select(subtree.c.root_id, Category.id)
+        .join(Category, Category.parent_id == subtree.c.id)
+        .where(Category.user_id == user_id)
+    )
+
+    stmt = (
+        select(subtree.c.root_id, sum_by_type('expense'), sum_by_type('income'))
+        .join(Transaction, Transaction.category_id == subtree.c.id)
+        .where(Transaction.user_id == user_id)
+        .group_by(subtree.c.root_id)
+    )
+    if start is not None:
+        stmt = stmt.where(Transaction.date >= start)
+    if end is not None:
+        stmt = stmt.where(Transaction.date <= end)
+
+    return {root_id: (float(spent), float(income)) for root_id, spent, income in db.session.execute(stmt)}
@@ -0,0 +1,147 @@
+"""
+config.py
+
+Environment-driven settings. APP_ENV picks the profile:
+
+  development (default)  current local behaviour: instance/budget.db, no pragmas
+  production             SQLite WAL tuning, connection pool sized from env,
+                         served by gunicorn/waitress through wsgi.py
+
+Environment variables:
+  APP_ENV              development | production
+  DATABASE_URL         SQLAlchemy URI (default sqlite:///budget.db)
+  DB_POOL_SIZE         connections kept per worker process
+  DB_MAX_OVERFLOW      extra connections allowed under burst
+  DB_POOL_TIMEOUT      seconds to wait for a pooled connection
+  SQLITE_BUSY_TIMEOUT  ms a writer waits on a locked database
+  SQLITE_MMAP_SIZE     bytes of the DB file to memory-map
+  SQLITE_CACHE_SIZE    page cache size (negative = KiB)
+  JWT_SECRET_KEY       token signing key (required in production)
+  ADMIN_EMAILS         comma-separated accounts allowed on /admin/*
+  API_DOCS             1 to serve Swagger UI (default on in development only)
+  PASSWORD_HASH_*      hashing method and pool sizing (see passwords.py)
+  INSTRUMENTATION      1 to record per-request timing/SQL stats and serve /metrics
+  PROFILE_*            sampled cProfile dumps (see instrumentation.py)
+"""
+import os
+
+
+def _int_env(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+class Config:
+    # Security (JWT)
+    JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', '9512')  # ⚠️ set JWT_SECRET_KEY in production
+    JWT_IDENTITY_CLAIM = 'sub'
+
+    # Database (SQLite for development, swap to PostgreSQL/MySQL later)
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///budget.db')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    DB_POOL_SIZE = _int_env('DB_POOL_SIZE', 5)
+    DB_MAX_OVERFLOW = _int_env('DB_MAX_OVERFLOW', 10)
+    DB_POOL_TIMEOUT = _int_env('DB_POOL_TIMEOUT', 30)
+
+    # PRAGMAs applied to every new SQLite connection (empty = SQLite defaults)
+    SQLITE_PRAGMAS: dict = {}
+
+    # Outbox: where queued side effects go ('mirror' = per-user tables, 'none' = drop)
+    # and whether `python app.py` drains it from a background thread.
+    OUTBOX_SINK = os.getenv('OUTBOX_SINK', 'mirror')
+    OUTBOX_WORKER = os.getenv('OUTBOX_WORKER', '1') == '1'
+
+    # Password hashing (see passwords.py). Use the full Werkzeug method string,
+    # e.g. 'scrypt:32768:8:1' or 'pbkdf2:sha256:600000'; older hashes are
+    # upgraded on the next successful login.
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_HASH_WORKERS = _int_env('PASSWORD_HASH_WORKERS', 0)  # 0 = CPU count
+    PASSWORD_HASH_QUEUE = _int_env('PASSWORD_HASH_QUEUE', 0)      # 0 = 8 x workers
+    PASSWORD_HASH_TIMEOUT = _int_env('PASSWORD_HASH_TIMEOUT', 10)
+
+    # Per-worker cache of login lookups by email
+    LOGIN_CACHE_SIZE = _int_env('LOGIN_CACHE_SIZE', 4096)
+    LOGIN_CACHE_TTL = _int_env('LOGIN_CACHE_TTL', 300)
+
+    # Per-worker cache of user rows for identity lookups (see identity.py)
+    USER_CACHE_SIZE = _int_env('USER_CACHE_SIZE', 4096)
+    USER_CACHE_TTL = _int_env('USER_CACHE_TTL', 60)
+
+    # Owner (by email) of the category tree copied to every new user at
+    # signup; empty disables it. Seed it with `python seed_categories.py`.
+    SIGNUP_CATEGORY_TEMPLATE = os.getenv('SIGNUP_CATEGORY_TEMPLATE', 'system@local')
+
+    # Delta sync (/sync): tombstone retention and the re-read window that
+    # covers writes committed just after a client's previous sync
+    SYNC_TOMBSTONE_DAYS = _int_env('SYNC_TOMBSTONE_DAYS', 90)
+    SYNC_OVERLAP_SECONDS = _int_env('SYNC_OVERLAP_SECONDS', 5)
+
+    # Request/SQL instrumentation and /metrics (see instrumentation.py). A request
+    # running one SELECT N_PLUS_ONE_THRESHOLD+ times is flagged as N+1.
+    # PROFILE_SAMPLE_RATE (0-1) of requests, optionally only PROFILE_ENDPOINTS
+    # (comma-separated endpoint names), are dumped as cProfile files to
+    # PROFILE_DIR (default instance/profiles).
+    INSTRUMENTATION = os.getenv('INSTRUMENTATION', '0') == '1'
+    N_PLUS_ONE_THRESHOLD = _int_env('N_PLUS_ONE_THRESHOLD', 10)
+    PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+    PROFILE_ENDPOINTS = os.getenv('PROFILE_ENDPOINTS', '')
+    PROFILE_DIR = os.getenv('PROFILE_DIR', '')
+
+    # Accounts (comma-separated emails) allowed to call the /admin/* endpoints;
+    # empty means nobody
+    ADMIN_EMAILS = os.getenv('ADMIN_EMAILS', '')
+
+    # Swagger UI at /apidocs; flasgger is only imported when this is on
+    API_DOCS = os.getenv('API_DOCS', '1') == '1'
+
+
+class ProductionConfig(Config):
+    # No default: create_app() refuses to start without a real signing key
+    JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY')
+
+    # Run `python outbox.py` as its own process instead
+    OUTBOX_WORKER = os.getenv('OUTBOX_WORKER', '0') == '1'
+    API_DOCS = os.getenv('API_DOCS', '0') == '1'
+
+    # WAL lets readers run alongside the single writer; NORMAL fsyncs on
+    # checkpoint rather than on every commit (still durable against app crashes).
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': _int_env('SQLITE_BUSY_TIMEOUT', 5000),
+        'mmap_size': _int_env('SQLITE_MMAP_SIZE', 256 * 1024 * 1024),
+        'cache_size': _int_env('SQLITE_CACHE_SIZE', -64000),
+        'temp_store': 'MEMORY',
+    }
+
+
+CONFIGS = {
+    'development': Config,
+    'production': ProductionConfig,
+}
+
+
+def get_config(name=None):
+    """Config class for a profile name (default APP_ENV); config objects pass through."""
+    if name is not None and not isinstance(name, str):
+        return name
+    name = name or os.getenv('APP_ENV', 'development')
+    if name not in CONFIGS:
+        raise ValueError(f"APP_ENV must be one of {sorted(CONFIGS)}")
+    return CONFIGS[name]
+
+
+def engine_options(config) -> dict:
+    """SQLALCHEMY_ENGINE_OPTIONS for the configured database.
+
+    In-memory SQLite uses a single shared connection, so pool sizing only
+    applies to file-backed and server databases.
+    """
+    uri = config.SQLALCHEMY_DATABASE_URI
+    if uri.startswith('sqlite') and (':memory:' in uri or uri.rstrip('/') == 'sqlite:'):
+        return {}
+    return {
+        'pool_size': config.DB_POOL_SIZE,
+        'max_overflow': config.DB_MAX_OVERFLOW,
+        'pool_timeout': config.DB_POOL_TIMEOUT,
+        'pool_pre_ping': not uri.startswith('sqlite'),
+    }
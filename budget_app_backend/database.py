@@ -1,11 +1,52 @@
+import os
+from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import text
+from sqlalchemy import text, event
+from config import get_config, engine_options
+import money
 
 # create the database object here
 db = SQLAlchemy() # ✅ define once here
 
 
-def create_user_tables(user_id: int):
+def init_db(app: Flask, config):
+	"""Load `config` into `app` and bind `db` with the matching engine options."""
+	app.config.from_object(config)
+	app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(config)
+	db.init_app(app)
+	import search  # needs `db`, so imported here rather than at module level
+	with app.app_context():
+		install_sqlite_pragmas(db.engine, app.config['SQLITE_PRAGMAS'])
+		search.install_functions(db.engine)
+
+
+def create_db_app(config=None) -> Flask:
+	"""Minimal app for scripts and workers: config + database only.
+
+	Skips JWT, CORS, Swagger and route registration, so CLI jobs start fast.
+	Use as `with create_db_app().app_context(): ...`.
+	"""
+	import models  # noqa: F401  (register tables on db.metadata)
+	root = os.path.dirname(os.path.abspath(__file__))
+	app = Flask('budget_app_db', root_path=root, instance_path=os.path.join(root, 'instance'))
+	init_db(app, get_config(config))
+	return app
+
+
+def install_sqlite_pragmas(engine, pragmas: dict):
+	"""Run `PRAGMA key=value` on every new connection of a SQLite engine."""
+	if not pragmas or engine.dialect.name != 'sqlite':
+		return
+
+	@event.listens_for(engine, 'connect')
+	def _set_pragmas(dbapi_conn, _record):
+		cursor = dbapi_conn.cursor()
+		for key, value in pragmas.items():
+			cursor.execute(f'PRAGMA {key}={value}')
+		cursor.close()
+
+
+def create_user_tables(user_id: int, commit: bool = True):
 	"""Create per-user mirrored tables for transactions and budgets.
 
 	Tables are named `user_{id}_transactions` and `user_{id}_budgets`.
@@ -17,7 +58,7 @@ def create_user_tables(user_id: int):
 	tx_sql = f'''
 	CREATE TABLE IF NOT EXISTS "{tx_table}" (
 		id INTEGER PRIMARY KEY AUTOINCREMENT,
-		amount REAL NOT NULL,
+		amount INTEGER NOT NULL,  -- minor units (see money.py)
 		type TEXT NOT NULL,
 		category_id INTEGER,
 		date TEXT,
@@ -29,7 +70,7 @@ def create_user_tables(user_id: int):
 	CREATE TABLE IF NOT EXISTS "{bud_table}" (
 		id INTEGER PRIMARY KEY AUTOINCREMENT,
 		name TEXT NOT NULL,
-		amount REAL,
+		amount INTEGER,
 		start_date TEXT,
 		end_date TEXT
 	);
@@ -38,19 +79,40 @@ def create_user_tables(user_id: int):
 	# Execute DDL statements in the current app context/connection
 	db.session.execute(text(tx_sql))
 	db.session.execute(text(bud_sql))
-	db.session.commit()
+	if commit:
+		db.session.commit()
 
 
-def insert_user_transaction(user_id: int, amount: float, t_type: str, category_id, tx_date, note: str):
-	tx_table = f'user_{user_id}_transactions'
-	insert_sql = text(f'INSERT INTO "{tx_table}" (amount, type, category_id, date, note) VALUES (:amount, :type, :category_id, :date, :note)')
-	params = {
-		'amount': float(amount),
+def _mirror_params(amount, t_type, category_id, tx_date, note) -> dict:
+	return {
+		'amount': money.to_minor(amount),
 		'type': t_type,
 		'category_id': int(category_id) if category_id is not None else None,
 		'date': tx_date.isoformat() if hasattr(tx_date, 'isoformat') else (str(tx_date) if tx_date is not None else None),
 		'note': note,
 	}
+
+
+def insert_user_transaction(user_id: int, amount: float, t_type: str, category_id, tx_date, note: str):
+	insert_user_transactions(user_id, [{
+		'amount': amount, 'type': t_type, 'category_id': category_id, 'date': tx_date, 'note': note,
+	}])
+
+
+def insert_user_transactions(user_id: int, rows: list, commit: bool = True):
+	"""Mirror many transactions into `user_{id}_transactions` with one
+	executemany and (by default) a single commit.
+
+	Each row is a dict with amount/type/category_id/date/note keys.
+	"""
+	if not rows:
+		return
+	tx_table = f'user_{user_id}_transactions'
+	insert_sql = text(f'INSERT INTO "{tx_table}" (amount, type, category_id, date, note) VALUES (:amount, :type, :category_id, :date, :note)')
+	params = [
+		_mirror_params(r['amount'], r['type'], r.get('category_id'), r.get('date'), r.get('note'))
+		for r in rows
+	]
 	db.session.execute(insert_sql, params)
-	db.session.commit()
-        
\ No newline at end of file
+	if commit:
+		db.session.commit()
@@ -0,0 +1,123 @@
+"""
+identity.py
+
+Who is making the request, without a `user` table query when possible.
+
+Access tokens carry verified claims (name, email and the settings version
+`sv`) next to the `sub` identity, so `current_user()` can answer from the
+JWT alone. Tokens issued before these claims existed fall back to
+`load_user()`, a per-worker TTL LRU over the user row. Anything that
+changes a user row or its settings must call `invalidate_user()`. The
+cached user also holds its settings (`user_settings_for()`), so hot paths
+don't re-read user_setting; they may lag another worker's write by up to
+USER_CACHE_TTL. `load_user_current()` checks the version first.
+"""
+import threading
+from flask import current_app
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from database import db
+from models import User
+from cache import TTLCache
+import user_settings
+
+# How often current_user() was answered from token claims vs the cache/DB
+_counters = {"claims": 0, "fallback": 0}
+_counters_lock = threading.Lock()
+
+
+def user_cache() -> TTLCache:
+    """Per-worker user_id -> user dict cache."""
+    cache = current_app.extensions.get('user_cache')
+    if cache is None:
+        cache = current_app.extensions.setdefault('user_cache', TTLCache(
+            maxsize=current_app.config['USER_CACHE_SIZE'],
+            ttl=current_app.config['USER_CACHE_TTL'],
+        ))
+    return cache
+
+
+def identity_claims(email: str, name: str, settings_version) -> dict:
+    """Extra claims to embed with create_access_token(additional_claims=...)."""
+    return {"email": email, "name": name, "sv": settings_version or 0}
+
+
+def load_user(user_id: int):
+    """User fields as a dict (cached), or None if the user doesn't exist."""
+    cache = user_cache()
+    user = cache.get(user_id)
+    if user is None:
+        row = (
+            db.session.query(User.id, User.email, User.name, User.settings_version)
+            .filter(User.id == user_id)
+            .first()
+        )
+        if row is None:
+            return None
+        user = {
+            "id": row.id,
+            "email": row.email,
+            "name": row.name,
+            "settings": user_settings.load(row.id),
+            "settings_version": row.settings_version or 0,
+        }
+        cache.set(user_id, user)
+    return user
+
+
+def load_user_current(user_id: int):
+    """`load_user()`, reloaded when another worker has bumped the settings version since it was cached.
+
+    Costs one primary-key read of `settings_version`; for responses that
+    must not show settings older than the last write (GET /me/settings).
+    """
+    user = load_user(user_id)
+    if user is None:
+        return None
+    version = db.session.query(User.settings_version).filter(User.id == user_id).scalar()
+    if (version or 0) != user["settings_version"]:
+        user_cache().invalidate(user_id)
+        user = load_user(user_id)
+    return user
+
+
+def user_settings_for(user_id: int):
+    """A copy of the user's settings dict from the per-worker cache, or None if the user doesn't exist."""
+    user = load_user(user_id)
+    return None if user is None else dict(user["settings"])
+
+
+def invalidate_user(user_id: int, email: str = None):
+    """Drop cached copies of a user after its row or settings change."""
+    user_cache().invalidate(user_id)
+    login_cache = current_app.extensions.get('login_cache')
+    if login_cache is not None and email:
+        login_cache.invalidate(email)
+
+
+def current_user():
+    """{id, email, name, settings_version} for the JWT in this request."""
+    user_id = int(get_jwt_identity())
+    claims = get_jwt()
+    if 'email' in claims and 'name' in claims:
+        with _counters_lock:
+            _counters["claims"] += 1
+        return {"id": user_id, "email": claims['email'], "name": claims['name'], "settings_version": claims.get('sv', 0)}
+
+    with _counters_lock:
+        _counters["fallback"] += 1
+    user = load_user(user_id)
+    if user is None:
+        return None
+    return {k: user[k] for k in ("id", "email", "name", "settings_version")}
+
+
+def metrics() -> dict:
+    with _counters_lock:
+        counters = dict(_counters)
+    total = counters["claims"] + counters["fallback"]
+    return {
+        "claims_served": counters["claims"],
+        "claims_fallback": counters["fallback"],
+        "claims_ratio": round(counters["claims"] / total, 4) if total else 0.0,
+        "user_cache": user_cache().stats(),
+    }
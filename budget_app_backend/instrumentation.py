@@ -0,0 +1,251 @@
+"""
+instrumentation.py
+
+Opt-in request and SQL instrumentation (INSTRUMENTATION=1). For every
+request it records wall time, SQL statement count, time spent in SQL and
+rows returned, and flags N+1 patterns: the same SELECT run
+N_PLUS_ONE_THRESHOLD or more times in one request. Totals are kept per
+endpoint, method and status, and served in Prometheus text format by
+GET /metrics (routes/metrics.py). Each response also carries a
+Server-Timing header.
+
+With PROFILE_SAMPLE_RATE > 0, a sample of requests (optionally only the
+PROFILE_ENDPOINTS) runs under cProfile and is dumped to PROFILE_DIR as
+<endpoint>-<timestamp>.prof; inspect with `python -m pstats FILE`.
+
+Counters live in the worker process (app.extensions['instrumentation']);
+with several workers, scrape each one or sum at the collector. When
+INSTRUMENTATION is off none of the hooks are installed.
+"""
+import contextvars
+import cProfile
+import os
+import random
+import threading
+import time
+from collections import Counter
+
+from flask import Flask, current_app, request
+from sqlalchemy import event
+
+from database import db
+
+# Request duration histogram buckets (seconds)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Stats of the request running on this thread (None outside requests, e.g. workers)
+_current: contextvars.ContextVar = contextvars.ContextVar('request_stats', default=None)
+
+# cProfile can only run one profiler per process at a time on newer Pythons
+_profile_lock = threading.Lock()
+
+
+class RequestStats:
+    __slots__ = ('started', 'statements', 'sql_seconds', 'rows', 'selects', 'profiler')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.sql_seconds = 0.0
+        self.rows = 0
+        self.selects = Counter()  # SELECT text -> executions in this request
+        self.profiler = None
+
+
+class Registry:
+    """Per-worker totals keyed by (endpoint, method, status)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+        self.n_plus_one = Counter()  # endpoint -> requests flagged
+
+    def record(self, key: tuple, seconds: float, stats: RequestStats):
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = {
+                    "count": 0, "seconds": 0.0, "buckets": [0] * len(DURATION_BUCKETS),
+                    "statements": 0, "sql_seconds": 0.0, "rows": 0,
+                }
+            s["count"] += 1
+            s["seconds"] += seconds
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if seconds <= bound:
+                    s["buckets"][i] += 1
+            s["statements"] += stats.statements
+            s["sql_seconds"] += stats.sql_seconds
+            s["rows"] += stats.rows
+
+    def flag_n_plus_one(self, endpoint: str):
+        with self._lock:
+            self.n_plus_one[endpoint] += 1
+
+    def snapshot(self) -> tuple:
+        with self._lock:
+            return (
+                {key: {**s, "buckets": list(s["buckets"])} for key, s in self._series.items()},
+                dict(self.n_plus_one),
+            )
+
+
+def registry() -> Registry:
+    return current_app.extensions['instrumentation']
+
+
+def init_app(app: Flask):
+    """Install the request and SQL hooks (no-op unless INSTRUMENTATION is on)."""
+    if not app.config['INSTRUMENTATION']:
+        return
+    app.extensions['instrumentation'] = Registry()
+    with app.app_context():
+        install_sql_hooks(db.engine)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_teardown_request)
+
+
+def install_sql_hooks(engine):
+    """Count statements, SQL time and rows for the request on the current thread."""
+    sqlite = engine.dialect.name == 'sqlite'
+
+    if sqlite:
+        # sqlite3 reports no rowcount for SELECT; count rows as they are fetched
+        def _count_row(_cursor, row):
+            stats = _current.get()
+            if stats is not None:
+                stats.rows += 1
+            return row
+
+        @event.listens_for(engine, 'connect')
+        def _install_row_counter(dbapi_conn, _record):
+            dbapi_conn.row_factory = _count_row
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _current.get() is not None:
+            conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        stats = _current.get()
+        starts = conn.info.get('query_start')
+        if stats is None or not starts:
+            return
+        stats.sql_seconds += time.perf_counter() - starts.pop()
+        stats.statements += 1
+        if cursor.description is None or not sqlite:
+            stats.rows += max(cursor.rowcount, 0)
+        if statement.lstrip()[:6].upper() == 'SELECT':
+            stats.selects[statement] += 1
+
+
+def _start_request():
+    stats = RequestStats()
+    _current.set(stats)
+    rate = current_app.config['PROFILE_SAMPLE_RATE']
+    if rate and random.random() < rate and _profiled(request.endpoint) and _profile_lock.acquire(blocking=False):
+        stats.profiler = cProfile.Profile()
+        stats.profiler.enable()
+
+
+def _finish_request(response):
+    stats = _current.get()
+    if stats is None:
+        return response
+    seconds = time.perf_counter() - stats.started
+    endpoint = request.endpoint or 'unmatched'
+
+    if stats.profiler is not None:
+        _dump_profile(stats, endpoint)
+
+    registry().record((endpoint, request.method, str(response.status_code)), seconds, stats)
+    threshold = current_app.config['N_PLUS_ONE_THRESHOLD']
+    repeated = [(n, sql) for sql, n in stats.selects.items() if n >= threshold]
+    if repeated:
+        registry().flag_n_plus_one(endpoint)
+        n, sql = max(repeated)
+        current_app.logger.warning("Possible N+1 in %s %s: %dx %s", request.method, endpoint, n, ' '.join(sql.split())[:160])
+
+    response.headers['Server-Timing'] = (
+        f'app;dur={seconds * 1000:.1f}, '
+        f'db;dur={stats.sql_seconds * 1000:.1f};desc="{stats.statements} queries, {stats.rows} rows"'
+    )
+    return response
+
+
+def _teardown_request(_exc):
+    stats = _current.get()
+    if stats is not None and stats.profiler is not None:
+        # after_request did not run (unhandled error); drop the sample
+        stats.profiler.disable()
+        stats.profiler = None
+        _profile_lock.release()
+    _current.set(None)
+
+
+def _profiled(endpoint) -> bool:
+    wanted = current_app.config['PROFILE_ENDPOINTS']
+    return not wanted or endpoint in {e.strip() for e in wanted.split(',')}
+
+
+def _dump_profile(stats: RequestStats, endpoint: str):
+    profiler, stats.profiler = stats.profiler, None
+    try:
+        profiler.disable()
+        directory = current_app.config['PROFILE_DIR'] or os.path.join(current_app.instance_path, 'profiles')
+        os.makedirs(directory, exist_ok=True)
+        profiler.dump_stats(os.path.join(directory, f"{endpoint}-{time.strftime('%Y%m%d-%H%M%S')}-{int(time.time() * 1000) % 1000:03d}-{os.getpid()}.prof"))
+    except OSError as e:
+        current_app.logger.warning("Could not write profile for %s: %s", endpoint, e)
+    finally:
+        _profile_lock.release()
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels) -> str:
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + '}'
+
+
+def render() -> str:
+    """All counters in Prometheus text exposition format (version 0.0.4)."""
+    series, n_plus_one = registry().snapshot()
+    lines = []
+
+    def family(name: str, kind: str, help_text: str):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+
+    family('budget_http_requests_total', 'counter', 'Requests handled by this worker.')
+    for (endpoint, method, status), s in series.items():
+        lines.append(f'budget_http_requests_total{_labels(endpoint=endpoint, method=method, status=status)} {s["count"]}')
+
+    family('budget_http_request_duration_seconds', 'histogram', 'Request wall time.')
+    for (endpoint, method, status), s in series.items():
+        for bound, count in zip(DURATION_BUCKETS, s["buckets"]):
+            lines.append(f'budget_http_request_duration_seconds_bucket'
+                         f'{_labels(endpoint=endpoint, method=method, status=status, le=bound)} {count}')
+        lines.append(f'budget_http_request_duration_seconds_bucket'
+                     f'{_labels(endpoint=endpoint, method=method, status=status, le="+Inf")} {s["count"]}')
+        lines.append(f'budget_http_request_duration_seconds_sum{_labels(endpoint=endpoint, method=method, status=status)} {s["seconds"]:.6f}')
+        lines.append(f'budget_http_request_duration_seconds_count{_labels(endpoint=endpoint, method=method, status=status)} {s["count"]}')
+
+    for name, field, help_text in (
+        ('budget_sql_statements_total', 'statements', 'SQL statements executed while handling requests.'),
+        ('budget_sql_seconds_total', 'sql_seconds', 'Time spent executing SQL while handling requests.'),
+        ('budget_sql_rows_total', 'rows', 'Rows returned (SELECT) or affected (DML) by request SQL.'),
+    ):
+        family(name, 'counter', help_text)
+        for (endpoint, method, status), s in series.items():
+            value = f'{s[field]:.6f}' if isinstance(s[field], float) else s[field]
+            lines.append(f'{name}{_labels(endpoint=endpoint, method=method, status=status)} {value}')
+
+    family('budget_n_plus_one_requests_total', 'counter',
+           'Requests that ran one SELECT at least N_PLUS_ONE_THRESHOLD times.')
+    for endpoint, count in n_plus_one.items():
+        lines.append(f'budget_n_plus_one_requests_total{_labels(endpoint=endpoint)} {count}')
+
+    return '\n'.join(lines) + '\n'
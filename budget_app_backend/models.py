@@ -1,8 +1,13 @@
 from database import db
-from datetime import date
+from datetime import date, datetime
+from sqlalchemy import event, update, delete
+from search import install_fts
+from money import Money
 
 
-# Ownership mixin for owned models
+# Ownership mixin for owned models. The *_owned helpers put `user_id` into
+# the statement itself (primary-key lookup + one comparison), so a row of
+# another user behaves exactly like a missing one.
 class OwnableMixin:
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
 
@@ -10,36 +15,72 @@ class OwnableMixin:
     def for_user(cls, user_id):
         return cls.query.filter_by(user_id=user_id) # type: ignore
 
+    @classmethod
+    def get_owned(cls, row_id: int, user_id: int):
+        """The row if it exists and belongs to `user_id`, else None."""
+        return cls.for_user(user_id).filter_by(id=row_id).first()
+
+    @classmethod
+    def update_owned(cls, row_id: int, user_id: int, values: dict, returning=()):
+        """UPDATE ... WHERE id=? AND user_id=? (no commit).
+
+        Returns the RETURNING row (None if nothing matched) when `returning`
+        columns are given, otherwise the matched row count.
+        """
+        stmt = update(cls).where(cls.id == row_id, cls.user_id == user_id).values(values) # type: ignore
+        if returning:
+            return db.session.execute(stmt.returning(*returning)).first()
+        return db.session.execute(stmt).rowcount
+
+    @classmethod
+    def delete_owned(cls, row_id: int, user_id: int, returning=()):
+        """DELETE ... WHERE id=? AND user_id=? (no commit); same return as `update_owned`."""
+        stmt = delete(cls).where(cls.id == row_id, cls.user_id == user_id) # type: ignore
+        if returning:
+            return db.session.execute(stmt.returning(*returning)).first()
+        return db.session.execute(stmt).rowcount
+
+
+# Change tracking for delta sync (see sync.py); bulk Core updates set it too
+class SyncMixin:
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 
 # User model
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128), nullable=False)
+    password_hash = db.Column(db.String(256), nullable=False)  # scrypt hashes are ~162 chars
     name = db.Column(db.String(50))  # ✅ Add this if you want to store names
-    # user-specific settings stored as JSON (nullable for older rows)
+    # legacy JSON settings blob; superseded by user_setting rows (user_settings.py)
     settings = db.Column(db.JSON, nullable=True)
+    # bumped on every settings change; carried in access tokens as `sv`
+    settings_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     def __repr__(self):
         return f"<User {self.email}>"
 
 
 # Category model (with parent-child relationship). Categories are now per-user.
-class Category(db.Model, OwnableMixin):
+class Category(db.Model, OwnableMixin, SyncMixin):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     parent_id = db.Column(db.Integer, db.ForeignKey('category.id'), nullable=True)
     children = db.relationship('Category', backref=db.backref('parent', remote_side=[id]))
 
+    __table_args__ = (
+        db.Index('ix_category_user_updated', 'user_id', 'updated_at'),
+    )
+
     def __repr__(self):
         return f"<Category {self.name}>"
 
 
 # Transaction model
-class Transaction(db.Model, OwnableMixin):
+class Transaction(db.Model, OwnableMixin, SyncMixin):
     id = db.Column(db.Integer, primary_key=True)
     # user_id provided by OwnableMixin
-    amount = db.Column(db.Float, nullable=False)
+    amount = db.Column(Money, nullable=False)  # stored in minor units (see money.py)
     type = db.Column(db.String(10), nullable=False)  # "income" or "expense"
     category_id = db.Column(db.Integer, db.ForeignKey('category.id'))
     date = db.Column(db.Date, default=date.today)
@@ -49,18 +90,155 @@ class Transaction(db.Model, OwnableMixin):
     user = db.relationship('User', backref='transactions')
     category = db.relationship('Category', backref='transactions')
 
+    # ix_transaction_user_date_note serves `ORDER BY date DESC, id DESC`, keyset seeks
+    # and note search scans (the note is checked on index entries, see search.py);
+    # ix_transaction_user_date_type serves range aggregates and type filters;
+    # ix_transaction_user_category_date serves category filters.
+    __table_args__ = (
+        db.Index('ix_transaction_user_date_note', 'user_id', 'date', 'id', 'note'),
+        db.Index('ix_transaction_user_date_type', 'user_id', 'date', 'type'),
+        db.Index('ix_transaction_user_updated', 'user_id', 'updated_at'),
+        db.Index('ix_transaction_user_category_date', 'user_id', 'category_id', 'date'),
+        # category delete/merge rewrite the owner's rows of a category
+        db.Index('ix_transaction_category', 'category_id'),
+    )
+
     def __repr__(self):
         return f"<Transaction {self.type} {self.amount}>"
 
 
+# Note search index (FTS5 on SQLite), created alongside the table
+event.listen(Transaction.__table__, 'after_create', install_fts)
+
+
 # Budget model - per-user budgets tied to a category
-class Budget(db.Model, OwnableMixin):
+class Budget(db.Model, OwnableMixin, SyncMixin):
     id = db.Column(db.Integer, primary_key=True)
     category_id = db.Column(db.Integer, db.ForeignKey('category.id'), nullable=False)
-    amount = db.Column(db.Float, nullable=False)
+    amount = db.Column(Money, nullable=False)
     period = db.Column(db.String(20), nullable=False, default='monthly')
 
     category = db.relationship('Category', backref='budgets')
 
+    __table_args__ = (
+        db.Index('ix_budget_user_updated', 'user_id', 'updated_at'),
+    )
+
     def __repr__(self):
         return f"<Budget {self.id} category={self.category_id} amount={self.amount} period={self.period}>"
+
+
+# Recurring rule - a transaction template repeated every `interval` days/
+# weeks/months/years from `start_date` (RRULE FREQ/INTERVAL/UNTIL). The
+# scheduler (recurring.py) materializes occurrences up to today and moves
+# `next_date` past them; None once the rule has ended.
+class RecurringRule(db.Model, OwnableMixin):
+    __tablename__ = 'recurring_rule'
+
+    id = db.Column(db.Integer, primary_key=True)
+    amount = db.Column(Money, nullable=False)
+    type = db.Column(db.String(10), nullable=False)  # "income" or "expense"
+    category_id = db.Column(db.Integer, db.ForeignKey('category.id'))
+    note = db.Column(db.String(200))
+    freq = db.Column(db.String(10), nullable=False)  # daily | weekly | monthly | yearly
+    interval = db.Column(db.Integer, nullable=False, default=1)
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=True)  # inclusive
+    next_date = db.Column(db.Date, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_recurring_rule_next_date', 'next_date'),
+    )
+
+    def __repr__(self):
+        return f"<RecurringRule {self.id} {self.freq}/{self.interval} {self.type} {self.amount}>"
+
+
+# One row per materialized occurrence; the primary key makes the scheduler
+# idempotent (a second run, or a concurrent one, inserts nothing twice).
+class RecurringOccurrence(db.Model):
+    __tablename__ = 'recurring_occurrence'
+
+    rule_id = db.Column(db.Integer, db.ForeignKey('recurring_rule.id'), primary_key=True)
+    occurrence_date = db.Column(db.Date, primary_key=True)
+
+    def __repr__(self):
+        return f"<RecurringOccurrence rule={self.rule_id} {self.occurrence_date}>"
+
+
+# Monthly rollup - per-user totals by month/category/type, maintained alongside
+# every transaction write so dashboard reads scale with months x categories.
+class MonthlyRollup(db.Model):
+    __tablename__ = 'monthly_rollup'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    month = db.Column(db.String(7), primary_key=True)  # "YYYY-MM"
+    # 0 = uncategorized (NULL can't take part in the primary key / upsert target)
+    category_id = db.Column(db.Integer, primary_key=True, default=0)
+    type = db.Column(db.String(10), primary_key=True)
+    total = db.Column(Money, nullable=False, default=0)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<MonthlyRollup user={self.user_id} {self.month} cat={self.category_id} {self.type} {self.total}>"
+
+
+# Outbox - events written in the same DB transaction as the change they
+# describe, delivered later by the outbox worker (see outbox.py).
+class OutboxEvent(db.Model):
+    __tablename__ = 'outbox'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    topic = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<OutboxEvent {self.id} {self.topic} user={self.user_id}>"
+
+
+# One row per user setting, so partial updates touch only the changed keys
+# (see user_settings.py)
+class UserSetting(db.Model):
+    __tablename__ = 'user_setting'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    key = db.Column(db.String(64), primary_key=True)
+    value = db.Column(db.JSON)
+
+    def __repr__(self):
+        return f"<UserSetting user={self.user_id} {self.key}>"
+
+
+# Per-user, per-resource change counters behind the list endpoints' ETags
+# (see versions.py). Bumped in the same DB transaction as every mutation.
+class ResourceVersion(db.Model):
+    __tablename__ = 'resource_version'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    resource = db.Column(db.String(32), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ResourceVersion user={self.user_id} {self.resource} v{self.version}>"
+
+
+# Tombstone - one row per hard-deleted transaction/category/budget so delta
+# sync can report deletes; purged after SYNC_TOMBSTONE_DAYS (see sync.py).
+class Tombstone(db.Model):
+    __tablename__ = 'tombstone'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    resource = db.Column(db.String(32), nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_tombstone_user_deleted', 'user_id', 'deleted_at'),
+    )
+
+    def __repr__(self):
+        return f"<Tombstone {self.resource} {self.row_id} user={self.user_id}>"
@@ -0,0 +1,49 @@
+"""
+money.py
+
+Amounts are stored as integers in minor units (cents): `Money` columns
+hold BIGINT, so SQL SUMs are exact however large the ledger gets. The
+API keeps speaking major units; values are converted at the column
+boundary, once per row or aggregate, and Python-side arithmetic on
+amounts goes through `add()`.
+
+`apply_quick_ddl.py` converts databases that still have REAL columns.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+
+from sqlalchemy import BigInteger
+from sqlalchemy.types import TypeDecorator
+
+# Minor units per major unit
+SCALE = 100
+_QUANT = Decimal(1)
+
+
+def to_minor(value) -> int:
+    """Major units (int/float/Decimal/str) -> integer minor units, rounded half up."""
+    if isinstance(value, int):
+        return value * SCALE
+    # str() keeps the shortest repr of a float, so 0.29 stays 0.29 rather than 0.28999...
+    return int((Decimal(str(value)) * SCALE).quantize(_QUANT, rounding=ROUND_HALF_UP))
+
+
+def from_minor(minor) -> float:
+    return minor / SCALE
+
+
+def add(*values) -> float:
+    """Exact sum of major-unit amounts (pass negatives to subtract)."""
+    return from_minor(sum(to_minor(v) for v in values))
+
+
+class Money(TypeDecorator):
+    """Major units in Python, BIGINT minor units in the database."""
+
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else to_minor(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else from_minor(value)
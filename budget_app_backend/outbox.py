@@ -0,0 +1,190 @@
+"""
+outbox.py
+
+Transactional outbox for side effects that used to run on the request path
+(the per-user `user_{id}_transactions` mirror). Routes call `enqueue()`
+before their commit, so an event exists if and only if the change does.
+`drain()` delivers pending events in batches to the configured sink and
+deletes them in the same DB transaction.
+
+Run a worker process:
+  python outbox.py [--once] [--batch 500] [--interval 1.0]
+
+Or set OUTBOX_WORKER=1 to drain from a background thread in `python app.py`.
+
+"""
+import threading
+from collections import defaultdict
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import insert, select, delete, func
+from database import db, create_user_tables, insert_user_transactions
+from models import OutboxEvent
+
+TRANSACTION_CREATED = 'transaction.created'
+
+DEFAULT_BATCH_SIZE = 500
+
+# Per-process delivery counters, reported by `lag_metrics()`
+_stats = {"delivered": 0, "batches": 0, "last_drain_at": None, "last_error": None}
+_stats_lock = threading.Lock()
+
+
+def enqueue(user_id: int, topic: str, payloads: list):
+    """Stage one event per payload in the current session (no commit)."""
+    enqueue_many(topic, [(user_id, p) for p in payloads])
+
+
+def enqueue_many(topic: str, events: list):
+    """Stage (user_id, payload) events of any number of users with one executemany (no commit)."""
+    if not events:
+        return
+    now = datetime.utcnow()
+    db.session.execute(insert(OutboxEvent.__table__), [
+        {"user_id": user_id, "topic": topic, "payload": p, "created_at": now} for user_id, p in events
+    ])
+
+
+def transaction_payload(row) -> dict:
+    """JSON-safe mirror payload from a dict with amount/type/category_id/date/note."""
+    tx_date = row.get('date')
+    return {
+        "amount": row['amount'],
+        "type": row['type'],
+        "category_id": row.get('category_id'),
+        "date": tx_date.isoformat() if hasattr(tx_date, 'isoformat') else tx_date,
+        "note": row.get('note'),
+    }
+
+
+# -----------------------------
+# Sinks: where events end up
+# -----------------------------
+_mirrored_users: set = set()
+
+
+def mirror_sink(events: list):
+    """Append created transactions to the per-user mirror tables."""
+    by_user = defaultdict(list)
+    for e in events:
+        if e.topic == TRANSACTION_CREATED:
+            by_user[e.user_id].append(e.payload)
+    for user_id, rows in by_user.items():
+        if user_id not in _mirrored_users:
+            # Tables are created on first delivery instead of at signup
+            create_user_tables(user_id, commit=False)
+            _mirrored_users.add(user_id)
+        insert_user_transactions(user_id, rows, commit=False)
+
+
+def null_sink(events: list):
+    """Discard events (mirror disabled)."""
+
+
+SINKS = {'mirror': mirror_sink, 'none': null_sink}
+
+
+def drain(batch_size: int = DEFAULT_BATCH_SIZE, sink=None) -> int:
+    """Deliver up to `batch_size` pending events; returns how many were delivered.
+
+    Deleting the claimed rows first takes the write lock, so concurrent
+    workers cannot deliver the same event twice: if another worker got
+    there first the row count won't match and the batch is rolled back.
+    """
+    sink = sink or SINKS[current_app.config.get('OUTBOX_SINK', 'mirror')]
+    events = db.session.execute(
+        select(OutboxEvent).order_by(OutboxEvent.id).limit(batch_size)
+    ).scalars().all()
+    if not events:
+        return 0
+
+    try:
+        claimed = db.session.execute(
+            delete(OutboxEvent).where(OutboxEvent.id.in_([e.id for e in events]))
+        ).rowcount
+        if claimed != len(events):
+            db.session.rollback()
+            return 0
+        sink(events)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        _mirrored_users.clear()
+        with _stats_lock:
+            _stats["last_error"] = str(e)
+        raise
+
+    with _stats_lock:
+        _stats["delivered"] += len(events)
+        _stats["batches"] += 1
+        _stats["last_drain_at"] = datetime.utcnow().isoformat()
+    return len(events)
+
+
+def drain_all(batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    total = 0
+    while True:
+        n = drain(batch_size)
+        total += n
+        if n < batch_size:
+            return total
+
+
+def lag_metrics() -> dict:
+    """Pending event count and age of the oldest one, plus this process's counters."""
+    pending, oldest = db.session.query(func.count(OutboxEvent.id), func.min(OutboxEvent.created_at)).one()
+    with _stats_lock:
+        stats = dict(_stats)
+    return {
+        "pending": pending,
+        "oldest_pending_age_seconds": (datetime.utcnow() - oldest).total_seconds() if oldest else 0.0,
+        **stats,
+    }
+
+
+def run_worker(app, batch_size: int = DEFAULT_BATCH_SIZE, interval: float = 1.0, stop: threading.Event = None):
+    """Poll and drain until `stop` is set."""
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        delivered = 0
+        with app.app_context():
+            try:
+                delivered = drain(batch_size)
+            except Exception as e:
+                print(f"Warning: outbox drain failed: {e}")
+            finally:
+                db.session.remove()
+        # Keep going immediately while there's a backlog
+        if delivered < batch_size:
+            stop.wait(interval)
+
+
+def start_worker_thread(app, **kwargs) -> threading.Event:
+    """Run `run_worker` in a daemon thread; set the returned event to stop it."""
+    stop = threading.Event()
+    thread = threading.Thread(target=run_worker, args=(app,), kwargs={**kwargs, "stop": stop}, name='outbox-worker', daemon=True)
+    thread.start()
+    return stop
+
+
+if __name__ == '__main__':
+    import argparse
+    from database import create_db_app
+
+    parser = argparse.ArgumentParser(description='Drain the transactional outbox')
+    parser.add_argument('--once', action='store_true', help='drain the current backlog and exit')
+    parser.add_argument('--batch', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--interval', type=float, default=1.0, help='poll interval in seconds')
+    args = parser.parse_args()
+    app = create_db_app()
+
+    if args.once:
+        with app.app_context():
+            print(f"Delivered {drain_all(args.batch)} events")
+            print(lag_metrics())
+    else:
+        print('Outbox worker running (Ctrl+C to stop)...')
+        try:
+            run_worker(app, batch_size=args.batch, interval=args.interval)
+        except KeyboardInterrupt:
+            pass
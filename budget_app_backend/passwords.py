@@ -0,0 +1,82 @@
+"""
+passwords.py
+
+Password hashing with configurable parameters, run in a bounded thread pool.
+
+PASSWORD_HASH_METHOD picks the Werkzeug method string (e.g.
+'scrypt:32768:8:1' or 'pbkdf2:sha256:600000'). Hashes made with other
+parameters still verify, and `needs_rehash()` tells login to upgrade them.
+
+Hashing is CPU-bound; hashlib releases the GIL, so a pool of
+PASSWORD_HASH_WORKERS threads (default: CPU count) caps how much CPU login
+storms can take. At most PASSWORD_HASH_QUEUE jobs may wait; beyond that
+callers get `HashPoolBusy` instead of piling up request threads, as do
+callers whose job is not done within PASSWORD_HASH_TIMEOUT seconds.
+"""
+import os
+import threading
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class HashPoolBusy(Exception):
+    """Too many hash jobs in flight; the caller should ask the client to retry."""
+
+
+_executor = None
+_slots = None
+_init_lock = threading.Lock()
+
+
+def _pool():
+    global _executor, _slots
+    if _executor is None:
+        with _init_lock:
+            if _executor is None:
+                workers = current_app.config['PASSWORD_HASH_WORKERS'] or os.cpu_count() or 1
+                queue = current_app.config['PASSWORD_HASH_QUEUE'] or workers * 8
+                _slots = threading.BoundedSemaphore(workers + queue)
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='pw-hash')
+    return _executor, _slots
+
+
+def _run(fn, *args):
+    executor, slots = _pool()
+    if not slots.acquire(blocking=False):
+        raise HashPoolBusy()
+    try:
+        future = executor.submit(fn, *args)
+    except Exception:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _f: slots.release())
+    try:
+        return future.result(timeout=current_app.config['PASSWORD_HASH_TIMEOUT'])
+    except FutureTimeout:
+        # Still queued behind other jobs: drop it and answer like a full queue
+        future.cancel()
+        raise HashPoolBusy()
+
+
+def hash_password(password: str) -> str:
+    return _run(generate_password_hash, password, current_app.config['PASSWORD_HASH_METHOD'])
+
+
+def verify_password(stored_hash: str, password: str) -> bool:
+    if not stored_hash:
+        return False
+    return _run(check_password_hash, stored_hash, password)
+
+
+@lru_cache(maxsize=8)
+def method_prefix(method: str) -> str:
+    """The prefix Werkzeug writes for `method`, with defaults filled in ('scrypt' -> 'scrypt:32768:8:1')."""
+    return generate_password_hash('', method).split('$', 1)[0]
+
+
+def needs_rehash(stored_hash: str) -> bool:
+    """True when the stored hash was made with different method/parameters."""
+    method = stored_hash.split('$', 1)[0]
+    return method != method_prefix(current_app.config['PASSWORD_HASH_METHOD'])
@@ -0,0 +1,273 @@
+"""
+recurring.py
+
+Scheduler for recurring transactions. A `RecurringRule` repeats every
+`interval` days/weeks/months/years from `start_date` (until `end_date`, if
+any); `next_date` is the first occurrence not yet materialized.
+
+`materialize()` walks the due rules of all users in batches of `batch_size`
+(keyset on id) and, per batch, inserts every occurrence up to `until` with
+set-based statements and one commit:
+
+  recurring_occurrence  ON CONFLICT DO NOTHING RETURNING -> the new keys only
+  transaction           one executemany for those keys
+  monthly_rollup, outbox, resource_version   one executemany each
+  recurring_rule.next_date                   one executemany
+
+The (rule_id, occurrence_date) key makes re-runs and concurrent schedulers
+idempotent, and a scheduler that was down simply catches up on its next
+run: all missed occurrences are due and land in the same batches.
+
+Monthly/yearly rules keep `start_date`'s day of the month, clamped to
+shorter months (Jan 31 -> Feb 28 -> Mar 31).
+
+Run the scheduler process:
+  python recurring.py [--once] [--until YYYY-MM-DD] [--batch 500] [--interval 3600]
+
+"""
+import threading
+import time
+from calendar import monthrange
+from datetime import date, datetime, timedelta
+from sqlalchemy import insert, select, update, bindparam, func
+from sqlalchemy.dialects import sqlite, postgresql
+from database import db
+from models import RecurringRule, RecurringOccurrence, Transaction
+import outbox
+import rollups
+import versions
+
+FREQUENCIES = ('daily', 'weekly', 'monthly', 'yearly')
+
+DEFAULT_BATCH_SIZE = 500
+
+# Columns the scheduler reads per due rule
+RULE_COLUMNS = (
+    RecurringRule.id, RecurringRule.user_id, RecurringRule.amount, RecurringRule.type,
+    RecurringRule.category_id, RecurringRule.note, RecurringRule.freq, RecurringRule.interval,
+    RecurringRule.start_date, RecurringRule.end_date, RecurringRule.next_date,
+)
+
+# Per-process counters of the last and all runs, reported by `metrics()`
+_stats = {"runs": 0, "rules": 0, "rows": 0, "last_run": None, "last_error": None}
+_stats_lock = threading.Lock()
+
+
+# -----------------------------
+# Cadence arithmetic
+# -----------------------------
+def nth_occurrence(freq: str, interval: int, anchor: date, n: int) -> date:
+    """The n-th occurrence (n=0 is `anchor` itself)."""
+    step = n * interval
+    if freq == 'daily':
+        return anchor + timedelta(days=step)
+    if freq == 'weekly':
+        return anchor + timedelta(weeks=step)
+    months = anchor.month - 1 + step * (12 if freq == 'yearly' else 1)
+    year, month = anchor.year + months // 12, months % 12 + 1
+    return date(year, month, min(anchor.day, monthrange(year, month)[1]))
+
+
+def occurrence_index(freq: str, interval: int, anchor: date, d: date) -> int:
+    """Index of the last occurrence on or before `d` (-1 when `d` is before `anchor`)."""
+    if d < anchor:
+        return -1
+    if freq in ('daily', 'weekly'):
+        return (d - anchor).days // (interval * (7 if freq == 'weekly' else 1))
+    months = (d.year - anchor.year) * 12 + d.month - anchor.month
+    n = months // (interval * (12 if freq == 'yearly' else 1))
+    # Same month/year as d but a later day of the month
+    return n - 1 if nth_occurrence(freq, interval, anchor, n) > d else n
+
+
+def first_on_or_after(freq: str, interval: int, anchor: date, d: date, end: date = None):
+    """The first occurrence on or after `d`, or None when the rule has ended by then."""
+    n = occurrence_index(freq, interval, anchor, d)
+    found = nth_occurrence(freq, interval, anchor, n)
+    if n < 0 or found < d:
+        found = nth_occurrence(freq, interval, anchor, n + 1)
+    return None if end is not None and found > end else found
+
+
+def occurrences(rule, until: date) -> tuple:
+    """(dates from rule.next_date through `until`, the next date after them or None)."""
+    freq, interval, anchor = rule.freq, rule.interval, rule.start_date
+    n = occurrence_index(freq, interval, anchor, rule.next_date)
+    d = nth_occurrence(freq, interval, anchor, n)
+    if n < 0 or d < rule.next_date:
+        n += 1
+        d = nth_occurrence(freq, interval, anchor, n)
+
+    last = until if rule.end_date is None else min(until, rule.end_date)
+    dates = []
+    while d <= last:
+        dates.append(d)
+        n += 1
+        d = nth_occurrence(freq, interval, anchor, n)
+    if rule.end_date is not None and d > rule.end_date:
+        d = None
+    return dates, d
+
+
+def rrule(rule) -> str:
+    """The cadence as an iCalendar RRULE string (for display / export)."""
+    parts = [f"FREQ={rule.freq.upper()}", f"INTERVAL={rule.interval}"]
+    if rule.end_date:
+        parts.append(f"UNTIL={rule.end_date:%Y%m%d}")
+    return ';'.join(parts)
+
+
+# -----------------------------
+# Materialization
+# -----------------------------
+def _insert_occurrences(rows: list) -> set:
+    """Insert occurrence keys, skipping existing ones; returns the keys that were new."""
+    if not rows:
+        return set()
+    dialect = sqlite if db.engine.dialect.name == 'sqlite' else postgresql
+    stmt = (
+        dialect.insert(RecurringOccurrence.__table__)
+        .on_conflict_do_nothing()
+        .returning(RecurringOccurrence.__table__.c.rule_id, RecurringOccurrence.__table__.c.occurrence_date)
+    )
+    return {(rule_id, occurrence_date) for rule_id, occurrence_date in db.session.execute(stmt, rows)}
+
+
+def materialize_batch(rules, until: date) -> int:
+    """Materialize the occurrences of `rules` up to `until` (no commit); returns rows created."""
+    keys, advanced, by_rule = [], [], {}
+    for rule in rules:
+        dates, next_date = occurrences(rule, until)
+        keys.extend({"rule_id": rule.id, "occurrence_date": d} for d in dates)
+        advanced.append({"rule_id": rule.id, "next": next_date})
+        by_rule[rule.id] = rule
+
+    new = _insert_occurrences(keys)
+    params = []
+    for key in keys:
+        if (key["rule_id"], key["occurrence_date"]) in new:
+            rule = by_rule[key["rule_id"]]
+            params.append({
+                "user_id": rule.user_id,
+                "amount": rule.amount,
+                "type": rule.type,
+                "category_id": rule.category_id,
+                "date": key["occurrence_date"],
+                "note": rule.note,
+            })
+    if params:
+        # Core table insert: no ORM bulk-persistence bookkeeping per row
+        db.session.execute(insert(Transaction.__table__), params)
+        rollups.record(params)
+        outbox.enqueue_many(outbox.TRANSACTION_CREATED, [(p["user_id"], outbox.transaction_payload(p)) for p in params])
+        versions.bump_many(sorted({p["user_id"] for p in params}), versions.TRANSACTIONS)
+
+    db.session.execute(
+        update(RecurringRule.__table__)
+        .where(RecurringRule.__table__.c.id == bindparam('rule_id'))
+        .values(next_date=bindparam('next')),
+        advanced,
+    )
+    return len(params)
+
+
+def materialize(until: date = None, batch_size: int = DEFAULT_BATCH_SIZE) -> dict:
+    """Materialize every due occurrence up to `until` (default today), one commit per batch.
+
+    Returns the rules and rows processed, elapsed seconds and throughput.
+    """
+    until = until or date.today()
+    started = time.perf_counter()
+    rule_count = row_count = 0
+    last_id = 0
+    try:
+        while True:
+            rules = db.session.execute(
+                select(*RULE_COLUMNS)
+                .where(RecurringRule.next_date <= until, RecurringRule.id > last_id)
+                .order_by(RecurringRule.id)
+                .limit(batch_size)
+            ).all()
+            if not rules:
+                break
+            row_count += materialize_batch(rules, until)
+            db.session.commit()
+            rule_count += len(rules)
+            last_id = rules[-1].id
+            if len(rules) < batch_size:
+                break
+    except Exception as e:
+        db.session.rollback()
+        with _stats_lock:
+            _stats["last_error"] = str(e)
+        raise
+
+    seconds = time.perf_counter() - started
+    report = {
+        "until": until.isoformat(),
+        "rules": rule_count,
+        "rows": row_count,
+        "seconds": round(seconds, 3),
+        "rules_per_second": round(rule_count / seconds, 1) if seconds else 0.0,
+        "rows_per_second": round(row_count / seconds, 1) if seconds else 0.0,
+    }
+    with _stats_lock:
+        _stats["runs"] += 1
+        _stats["rules"] += rule_count
+        _stats["rows"] += row_count
+        _stats["last_run"] = {**report, "finished_at": datetime.utcnow().isoformat()}
+    return report
+
+
+def metrics() -> dict:
+    """Rules due today, plus this process's counters."""
+    due = db.session.scalar(select(func.count(RecurringRule.id)).where(RecurringRule.next_date <= date.today()))
+    with _stats_lock:
+        stats = dict(_stats)
+    return {"due": due, **stats}
+
+
+def run_scheduler(app, batch_size: int = DEFAULT_BATCH_SIZE, interval: float = 3600.0, stop: threading.Event = None):
+    """Materialize due occurrences every `interval` seconds until `stop` is set."""
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        with app.app_context():
+            try:
+                report = materialize(batch_size=batch_size)
+                if report["rules"]:
+                    print(format_report(report))
+            except Exception as e:
+                print(f"Warning: recurring materialization failed: {e}")
+            finally:
+                db.session.remove()
+        stop.wait(interval)
+
+
+def format_report(report: dict) -> str:
+    return (
+        f"Materialized {report['rows']} transactions from {report['rules']} rules through {report['until']} "
+        f"in {report['seconds']:.3f}s ({report['rules_per_second']} rules/s, {report['rows_per_second']} rows/s)"
+    )
+
+
+if __name__ == '__main__':
+    import argparse
+    from database import create_db_app
+
+    parser = argparse.ArgumentParser(description='Materialize recurring transactions')
+    parser.add_argument('--once', action='store_true', help='materialize what is due and exit')
+    parser.add_argument('--until', type=date.fromisoformat, default=None, help='last day to materialize (default today; with --once)')
+    parser.add_argument('--batch', type=int, default=DEFAULT_BATCH_SIZE, help='rules per batch / commit')
+    parser.add_argument('--interval', type=float, default=3600.0, help='seconds between runs')
+    args = parser.parse_args()
+    app = create_db_app()
+
+    if args.once:
+        with app.app_context():
+            print(format_report(materialize(args.until, args.batch)))
+    else:
+        print('Recurring scheduler running (Ctrl+C to stop)...')
+        try:
+            run_scheduler(app, batch_size=args.batch, interval=args.interval)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,177 @@
+"""
+rollups.py
+
+Maintenance of the `monthly_rollup` table: per-user totals keyed by
+(month, category, type). Transaction writes call `record()` before their
+commit so the rollup changes in the same DB transaction; `rebuild()` and
+`verify()` recompute it from the raw `transaction` rows.
+
+Run:
+  python rollups.py verify [--user ID]
+  python rollups.py rebuild [--user ID]
+
+"""
+from calendar import monthrange
+from collections import defaultdict
+from sqlalchemy import func, select, delete
+from sqlalchemy.dialects import sqlite, postgresql
+from database import db
+from models import MonthlyRollup, Transaction
+from aggregates import date_bucket
+import money
+
+UNCATEGORIZED = 0
+
+# Totals are exact minor-unit integers; this only absorbs the float conversion
+TOLERANCE = 0.005
+
+
+def month_key(d) -> str:
+    return f"{d.year:04d}-{d.month:02d}"
+
+
+def is_month_aligned(start, end) -> bool:
+    """True when [start, end] covers whole calendar months only."""
+    return start.day == 1 and end.day == monthrange(end.year, end.month)[1] and start <= end
+
+
+def record(transactions, sign: int = 1):
+    """Add (sign=1) or remove (sign=-1) transactions from the rollup.
+
+    `transactions` may be Transaction objects or dicts with user_id, date,
+    category_id, type and amount. Deltas are folded per rollup key and
+    written with one upsert executemany; nothing is committed here.
+    Rows without a date are not part of any month and are skipped.
+    """
+    deltas = defaultdict(lambda: [0, 0])  # [minor units, count]
+    for t in transactions:
+        get = t.get if isinstance(t, dict) else (lambda k, _t=t: getattr(_t, k))
+        tx_date = get('date')
+        if tx_date is None:
+            continue
+        key = (get('user_id'), month_key(tx_date), get('category_id') or UNCATEGORIZED, get('type'))
+        deltas[key][0] += sign * money.to_minor(get('amount'))
+        deltas[key][1] += sign
+
+    if not deltas:
+        return
+
+    params = [
+        {"user_id": u, "month": m, "category_id": c, "type": ty, "total": money.from_minor(total), "count": count}
+        for (u, m, c, ty), (total, count) in deltas.items()
+    ]
+    db.session.execute(_upsert_stmt(), params)
+
+    if sign < 0:
+        # Drop keys that no longer have any transactions behind them
+        db.session.execute(
+            delete(MonthlyRollup)
+            .where(MonthlyRollup.user_id.in_({p["user_id"] for p in params}))
+            .where(MonthlyRollup.count <= 0)
+        )
+
+
+def reassign_category(user_id: int, old_id: int, new_id=None):
+    """Move a user's rollup rows of category `old_id` onto `new_id` (None = uncategorized)."""
+    moved = db.session.execute(
+        delete(MonthlyRollup)
+        .where(MonthlyRollup.user_id == user_id, MonthlyRollup.category_id == old_id)
+        .returning(MonthlyRollup.user_id, MonthlyRollup.month, MonthlyRollup.type,
+                   MonthlyRollup.total, MonthlyRollup.count)
+    ).all()
+    if moved:
+        db.session.execute(_upsert_stmt(), [
+            {"user_id": u, "month": m, "category_id": new_id or UNCATEGORIZED, "type": ty, "total": total, "count": count}
+            for u, m, ty, total, count in moved
+        ])
+
+
+def _upsert_stmt():
+    dialect = sqlite if db.engine.dialect.name == 'sqlite' else postgresql
+    stmt = dialect.insert(MonthlyRollup)
+    return stmt.on_conflict_do_update(
+        index_elements=['user_id', 'month', 'category_id', 'type'],
+        set_={
+            "total": MonthlyRollup.total + stmt.excluded.total,
+            "count": MonthlyRollup.count + stmt.excluded.count,
+        },
+    )
+
+
+def _aggregate_select(user_id=None):
+    """Fresh rollup rows computed from `transaction`."""
+    month = date_bucket(Transaction.date, 'month')
+    category = func.coalesce(Transaction.category_id, UNCATEGORIZED)
+    stmt = (
+        select(
+            Transaction.user_id, month, category, Transaction.type,
+            func.sum(Transaction.amount), func.count(Transaction.id),
+        )
+        .where(Transaction.date.is_not(None))
+        .group_by(Transaction.user_id, month, category, Transaction.type)
+    )
+    if user_id is not None:
+        stmt = stmt.where(Transaction.user_id == user_id)
+    return stmt
+
+
+def rebuild(user_id=None, commit: bool = True) -> int:
+    """Recompute rollup rows (for one user or everyone) with one INSERT ... SELECT."""
+    clear = delete(MonthlyRollup)
+    if user_id is not None:
+        clear = clear.where(MonthlyRollup.user_id == user_id)
+    db.session.execute(clear)
+    result = db.session.execute(
+        MonthlyRollup.__table__.insert().from_select(
+            ['user_id', 'month', 'category_id', 'type', 'total', 'count'],
+            _aggregate_select(user_id),
+        )
+    )
+    if commit:
+        db.session.commit()
+    return result.rowcount
+
+
+def verify(user_id=None) -> list:
+    """Compare the rollup with a full recomputation; returns mismatches."""
+    expected = {
+        (u, m, c, ty): (float(total), count)
+        for u, m, c, ty, total, count in db.session.execute(_aggregate_select(user_id))
+    }
+    q = db.session.query(
+        MonthlyRollup.user_id, MonthlyRollup.month, MonthlyRollup.category_id,
+        MonthlyRollup.type, MonthlyRollup.total, MonthlyRollup.count,
+    )
+    if user_id is not None:
+        q = q.filter(MonthlyRollup.user_id == user_id)
+    actual = {(u, m, c, ty): (float(total), count) for u, m, c, ty, total, count in q}
+
+    mismatches = []
+    for key in expected.keys() | actual.keys():
+        want = expected.get(key, (0.0, 0))
+        got = actual.get(key, (0.0, 0))
+        if want[1] != got[1] or abs(want[0] - got[0]) > TOLERANCE:
+            mismatches.append({"key": key, "expected": want, "actual": got})
+    return mismatches
+
+
+if __name__ == '__main__':
+    import argparse
+    from database import create_db_app
+
+    parser = argparse.ArgumentParser(description='Rebuild or verify the monthly_rollup table')
+    parser.add_argument('command', choices=['rebuild', 'verify'])
+    parser.add_argument('--user', type=int, default=None, help='limit to one user id')
+    args = parser.parse_args()
+
+    with create_db_app().app_context():
+        MonthlyRollup.__table__.create(db.engine, checkfirst=True)
+        if args.command == 'rebuild':
+            count = rebuild(args.user)
+            print(f"Rebuilt monthly_rollup: {count} rows")
+        else:
+            mismatches = verify(args.user)
+            for m in mismatches[:50]:
+                print(f"Mismatch {m['key']}: expected {m['expected']}, found {m['actual']}")
+            print('monthly_rollup OK' if not mismatches else f"{len(mismatches)} mismatched rows")
+            raise SystemExit(1 if mismatches else 0)
@@ -0,0 +1,95 @@
+from functools import wraps
+from flask import Blueprint, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+import identity
+import outbox
+import recurring
+
+
+admin_bp = Blueprint('admin', __name__)
+
+
+def is_admin(user_id: int) -> bool:
+    """True when the user's current email is in the ADMIN_EMAILS allow-list."""
+    admins = {e.strip().lower() for e in current_app.config['ADMIN_EMAILS'].split(',') if e.strip()}
+    # The cached user row, not the token's email claim, which may be stale
+    user = identity.load_user(user_id)
+    return user is not None and user["email"].lower() in admins
+
+
+def admin_required(view):
+    """`jwt_required()` plus the admin allow-list; other users get 403."""
+    @wraps(view)
+    @jwt_required()
+    def wrapper(*args, **kwargs):
+        if not is_admin(int(get_jwt_identity())):
+            return jsonify({"error": "Admin access required"}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@admin_bp.route('/admin/outbox', methods=['GET'])
+@admin_required
+def outbox_status():
+    """
+    Outbox Lag
+    ---
+    tags:
+      - Admin
+    security:
+      - Bearer: []
+    responses:
+      200:
+        description: Pending outbox events, age of the oldest one and worker counters
+      403:
+        description: Not in ADMIN_EMAILS
+    """
+    try:
+        return jsonify({"outbox": outbox.lag_metrics()}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@admin_bp.route('/admin/recurring', methods=['GET'])
+@admin_required
+def recurring_status():
+    """
+    Recurring Scheduler Status
+    ---
+    tags:
+      - Admin
+    security:
+      - Bearer: []
+    responses:
+      200:
+        description: Rules due today and this worker's materialization counters / last run throughput
+      403:
+        description: Not in ADMIN_EMAILS
+    """
+    try:
+        return jsonify({"recurring": recurring.metrics()}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@admin_bp.route('/admin/cache', methods=['GET'])
+@admin_required
+def cache_status():
+    """
+    Identity Cache Metrics
+    ---
+    tags:
+      - Admin
+    security:
+      - Bearer: []
+    responses:
+      200:
+        description: Claims vs fallback counts and hit ratios of the per-worker user/login caches
+      403:
+        description: Not in ADMIN_EMAILS
+    """
+    login_cache = current_app.extensions.get('login_cache')
+    return jsonify({
+        "identity": identity.metrics(),
+        "login_cache": login_cache.stats() if login_cache else None,
+    }), 200
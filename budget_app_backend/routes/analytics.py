@@ -0,0 +1,168 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from database import db
+from models import Transaction, MonthlyRollup
+from aggregates import date_bucket, bucket_labels, sum_by_type, INTERVALS
+from sqlalchemy import func, case, select, type_coerce, BigInteger
+from datetime import datetime, date, timedelta
+import money
+import rollups
+import versions
+
+
+analytics_bp = Blueprint('analytics', __name__)
+
+# Dense series are bounded so payloads stay O(intervals)
+MAX_BALANCE_POINTS = 1000
+
+# Default window ending today when `start` is omitted
+DEFAULT_SPAN_DAYS = {'day': 30, 'week': 12 * 7, 'month': 365}
+
+
+def balance_window_key() -> str:
+    """ETag key for /analytics/balance: without `end` the window ends today, so today is part of it."""
+    return '' if request.args.get('end') else date.today().isoformat()
+
+
+def minor(expr):
+    """The raw minor-unit integer of a Money expression (no per-row conversion)."""
+    return type_coerce(expr, BigInteger)
+
+
+def opening_balance(user_id: int, start: date) -> int:
+    """Net of everything dated before `start`, in minor units.
+
+    Whole months come from monthly_rollup; only the days of `start`'s own
+    month before `start` are read from `transaction`.
+    """
+    month_start = start.replace(day=1)
+    signed_total = case((MonthlyRollup.type == 'income', minor(MonthlyRollup.total)), else_=-minor(MonthlyRollup.total))
+    before_months = db.session.scalar(
+        select(func.coalesce(func.sum(signed_total), 0))
+        .where(MonthlyRollup.user_id == user_id, MonthlyRollup.month < rollups.month_key(start))
+    )
+    partial = 0
+    if start > month_start:
+        partial = db.session.scalar(
+            select(minor(sum_by_type('income')) - minor(sum_by_type('expense')))
+            .where(Transaction.user_id == user_id, Transaction.date >= month_start, Transaction.date < start)
+        )
+    return int(before_months) + int(partial or 0)
+
+
+def balance_rows(user_id: int, start: date, end: date, interval: str):
+    """(period, income, expense, running net) per non-empty bucket, in minor units.
+
+    One grouped statement; the running net is a window SUM over the buckets.
+    Month-aligned monthly series are read from monthly_rollup.
+    """
+    if interval == 'month' and rollups.is_month_aligned(start, end):
+        total = minor(MonthlyRollup.total)
+        period = MonthlyRollup.month
+        income = func.coalesce(func.sum(case((MonthlyRollup.type == 'income', total), else_=0)), 0)
+        expense = func.coalesce(func.sum(case((MonthlyRollup.type == 'expense', total), else_=0)), 0)
+        in_range = (
+            MonthlyRollup.user_id == user_id,
+            MonthlyRollup.month >= rollups.month_key(start),
+            MonthlyRollup.month <= rollups.month_key(end),
+        )
+    else:
+        period = date_bucket(Transaction.date, interval)
+        income = minor(sum_by_type('income'))
+        expense = minor(sum_by_type('expense'))
+        # Index range scan on (user_id, date[, type])
+        in_range = (Transaction.user_id == user_id, Transaction.date >= start, Transaction.date <= end)
+
+    stmt = (
+        select(period.label('period'), income, expense, func.sum(income - expense).over(order_by=period))
+        .where(*in_range)
+        .group_by(period)
+        .order_by(period)
+    )
+    return db.session.execute(stmt).all()
+
+
+@analytics_bp.route('/analytics/balance', methods=['GET'])
+@jwt_required()
+@versions.conditional(versions.TRANSACTIONS, key=balance_window_key)
+def balance_series():
+    """
+    Balance Over Time
+    ---
+    tags:
+      - Analytics
+    security:
+      - Bearer: []
+    parameters:
+      - in: query
+        name: interval
+        type: string
+        enum: [day, week, month]
+        description: Bucket size (default day). Weeks start on Monday.
+      - in: query
+        name: start
+        type: string
+        format: date
+        description: First day (default 30 days / 12 weeks / 12 months before `end`)
+      - in: query
+        name: end
+        type: string
+        format: date
+        description: Last day, inclusive (default today)
+    responses:
+      200:
+        description: >
+          One point per interval from start to end (empty intervals included) with
+          income, expense, net and the cumulative balance, which starts from the
+          net of everything dated before `start`
+      400:
+        description: Invalid interval/dates, or more than 1000 intervals
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        interval = request.args.get('interval') or 'day'
+        if interval not in INTERVALS:
+            return jsonify({"error": f"'interval' must be one of {list(INTERVALS)}"}), 400
+
+        try:
+            end = datetime.strptime(request.args['end'], "%Y-%m-%d").date() if request.args.get('end') else date.today()
+            start = (
+                datetime.strptime(request.args['start'], "%Y-%m-%d").date() if request.args.get('start')
+                else end - timedelta(days=DEFAULT_SPAN_DAYS[interval] - 1)
+            )
+        except ValueError:
+            return jsonify({"error": "start/end must be YYYY-MM-DD"}), 400
+        if start > end:
+            return jsonify({"error": "'start' must not be after 'end'"}), 400
+
+        labels = bucket_labels(start, end, interval)
+        if len(labels) > MAX_BALANCE_POINTS:
+            return jsonify({"error": f"Too many {interval} intervals (max {MAX_BALANCE_POINTS}); use a larger interval"}), 400
+
+        opening = opening_balance(user_id, start)
+        found = {period: (income, expense, running) for period, income, expense, running in balance_rows(user_id, start, end, interval)}
+
+        # Gap-fill: empty intervals carry the previous balance forward
+        series, balance = [], opening
+        for label in labels:
+            income, expense, running = found.get(label, (0, 0, None))
+            if running is not None:
+                balance = opening + running
+            series.append({
+                "period": label,
+                "income": money.from_minor(income),
+                "expense": money.from_minor(expense),
+                "net": money.from_minor(income - expense),
+                "balance": money.from_minor(balance),
+            })
+
+        return jsonify({
+            "interval": interval,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "opening_balance": money.from_minor(opening),
+            "closing_balance": money.from_minor(balance),
+            "series": series,
+        }), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -1,15 +1,34 @@
-from flask import Blueprint, request, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from database import db
 from models import User
-from database import create_user_tables
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from cache import TTLCache
+import identity
+import user_settings
+import passwords
+import seed_categories
 import json
 
 # Create blueprint
 auth_bp = Blueprint('auth', __name__)
 
+
+def login_cache() -> TTLCache:
+    """Per-worker email -> (id, email, name, password_hash, settings_version) cache for /login."""
+    cache = current_app.extensions.get('login_cache')
+    if cache is None:
+        cache = current_app.extensions.setdefault('login_cache', TTLCache(
+            maxsize=current_app.config['LOGIN_CACHE_SIZE'],
+            ttl=current_app.config['LOGIN_CACHE_TTL'],
+        ))
+    return cache
+
+
+def busy_response():
+    resp = jsonify({"error": "Server busy, please retry"})
+    resp.headers['Retry-After'] = '1'
+    return resp, 503
+
 # Signup endpoint
 @auth_bp.route('/signup', methods=['POST'])
 def signup():
@@ -53,20 +72,22 @@ def signup():
         else:
             name = str(name).strip()
 
+        try:
+            password_hash = passwords.hash_password(password)
+        except passwords.HashPoolBusy:
+            return busy_response()
+
         new_user = User(
             email=email, # type: ignore
-            password_hash=generate_password_hash(password), # type: ignore
+            password_hash=password_hash, # type: ignore
             name=name # type: ignore
         )
         db.session.add(new_user)
+        db.session.flush()
+        # Starter categories: a copy of the template tree, in the same commit
+        seed_categories.clone_template(new_user.id, current_app.config['SIGNUP_CATEGORY_TEMPLATE'])
         db.session.commit()
-
-        # Create per-user mirrored tables (low-risk mirror approach)
-        try:
-          create_user_tables(new_user.id)
-        except Exception as e:
-          # Non-fatal: warn and continue
-          print(f"Warning: failed to create per-user tables for user {new_user.id}: {e}")
+        # Per-user mirror tables are created by the outbox worker on first delivery
 
         return jsonify({
             "message": "User created successfully",
@@ -109,21 +130,53 @@ def login():
     if not email or not password:
         return jsonify({"error": "'email' and 'password' are required"}), 400
 
-    # Fetch user from DB
-    user = User.query.filter_by(email=email).first()
+    # Fetch user (cached per worker; only the columns login needs)
+    cache = login_cache()
+    record = cache.get(email)
+    if record is None:
+        row = (
+            db.session.query(User.id, User.email, User.name, User.password_hash, User.settings_version)
+            .filter(User.email == email)
+            .first()
+        )
+        if row:
+            record = tuple(row)
+            cache.set(email, record)
 
-    if not user or not check_password_hash(user.password_hash, password):
+    if not record:
         return jsonify({"error": "Invalid credentials"}), 401
+    user_id, user_email, user_name, password_hash, settings_version = record
+
+    # Hash verification runs in the bounded hashing pool, not on this thread
+    try:
+        if not passwords.verify_password(password_hash, password):
+            return jsonify({"error": "Invalid credentials"}), 401
+    except passwords.HashPoolBusy:
+        return busy_response()
+
+    # Transparently upgrade hashes made with old parameters
+    if passwords.needs_rehash(password_hash):
+        try:
+            new_hash = passwords.hash_password(password)
+            User.query.filter_by(id=user_id).update({User.password_hash: new_hash})
+            db.session.commit()
+            cache.set(email, (user_id, user_email, user_name, new_hash, settings_version))
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.warning("Failed to rehash password for user %s: %s", user_id, e)
 
-    # Generate JWT
-    access_token = create_access_token(identity=str(user.id))  
+    # Generate JWT; the claims let authenticated reads skip the user table
+    access_token = create_access_token(
+        identity=str(user_id),
+        additional_claims=identity.identity_claims(user_email, user_name, settings_version),
+    )
     return jsonify({
         "message": "Login successful",
         "access_token": access_token,
         "user": {
-            "id": user.id,
-            "email": user.email,
-            "name": user.name
+            "id": user_id,
+            "email": user_email,
+            "name": user_name
         }
     }), 200
 
@@ -133,12 +186,12 @@ def login():
 @jwt_required()
 def me():
     try:
-        user_id = int(get_jwt_identity())
-        user = User.query.get(user_id)
+        # Served from token claims (or the per-worker user cache for older tokens)
+        user = identity.current_user()
         if not user:
             return jsonify({"error": "User not found"}), 404
         return jsonify({
-            "user": {"id": user.id, "email": user.email, "name": user.name}
+            "user": {"id": user["id"], "email": user["email"], "name": user["name"]}
         }), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -171,37 +224,81 @@ def list_users():
         return jsonify({"error": str(e)}), 500
 
 
-    # Get current user's settings
-    @auth_bp.route('/me/settings', methods=['GET'])
-    @jwt_required()
-    def get_settings():
-      try:
+# Get current user's settings
+@auth_bp.route('/me/settings', methods=['GET'])
+@jwt_required()
+def get_settings():
+    """
+    Get Settings
+    ---
+    tags:
+      - Authentication
+    security:
+      - Bearer: []
+    responses:
+      200:
+        description: The user's settings object and its version
+      404:
+        description: User not found
+    """
+    try:
         user_id = int(get_jwt_identity())
-        user = User.query.get(user_id)
+        # Per-worker user cache, reloaded if another worker changed the settings
+        user = identity.load_user_current(user_id)
         if not user:
-          return jsonify({"error": "User not found"}), 404
-        return jsonify({"settings": user.settings or {}}), 200
-      except Exception as e:
+            return jsonify({"error": "User not found"}), 404
+        return jsonify({"settings": dict(user["settings"]), "settings_version": user["settings_version"]}), 200
+    except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
-    @auth_bp.route('/me/settings', methods=['PUT'])
-    @jwt_required()
-    def put_settings():
-      try:
+# Update settings: PATCH merges (null removes a key), PUT replaces all keys
+@auth_bp.route('/me/settings', methods=['PUT', 'PATCH'])
+@jwt_required()
+def update_settings():
+    """
+    Update Settings
+    ---
+    tags:
+      - Authentication
+    security:
+      - Bearer: []
+    parameters:
+      - in: body
+        name: body
+        required: true
+        description: >
+          PATCH: keys to set; a null value removes the key, other keys are kept.
+          PUT: the complete new settings object.
+        schema:
+          type: object
+    responses:
+      200:
+        description: Updated settings and the new settings_version
+      400:
+        description: Not a JSON object, invalid key, or too many keys
+      404:
+        description: User not found
+    """
+    try:
         user_id = int(get_jwt_identity())
-        user = User.query.get(user_id)
-        if not user:
-          return jsonify({"error": "User not found"}), 404
-        data = request.get_json(silent=True) or {}
-        # Only allow a settings dict
-        if not isinstance(data, dict):
-          return jsonify({"error": "Settings must be a JSON object"}), 400
-        user.settings = (user.settings or {})
-        # Merge provided keys
-        user.settings.update(data)
+        data = request.get_json(silent=True)
+        error = user_settings.validate(data)
+        if error:
+            return jsonify({"error": error}), 400
+
+        # Only the named keys are written; no read-modify-write of a JSON blob
+        result = user_settings.apply(user_id, data, replace=request.method == 'PUT')
+        if result is None:
+            return jsonify({"error": "User not found"}), 404
+        settings_version, email = result
+        settings = user_settings.load(user_id)
+        if len(settings) > user_settings.MAX_KEYS:
+            db.session.rollback()
+            return jsonify({"error": f"At most {user_settings.MAX_KEYS} settings per user"}), 400
         db.session.commit()
-        return jsonify({"message": "Settings updated", "settings": user.settings}), 200
-      except Exception as e:
+        identity.invalidate_user(user_id, email)
+        return jsonify({"message": "Settings updated", "settings": settings, "settings_version": settings_version}), 200
+    except Exception as e:
+        db.session.rollback()
         return jsonify({"error": str(e)}), 500
-
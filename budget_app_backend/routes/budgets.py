@@ -1,12 +1,19 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from database import db
-from models import Budget, Transaction
-from sqlalchemy import func
+from models import Budget, Transaction, Category
+from aggregates import BUDGET_PERIODS, period_window
+import versions
+import sync
+import money
+from sqlalchemy import func, case, and_
 from datetime import datetime, date
 
 budgets_bp = Blueprint('budgets', __name__)
 
+# Columns read by serialize_budget, for RETURNING / tuple selects
+BUDGET_COLUMNS = (Budget.id, Budget.category_id, Budget.amount, Budget.period)
+
 
 def serialize_budget(b: Budget) -> dict:
     return {
@@ -19,12 +26,87 @@ def serialize_budget(b: Budget) -> dict:
 
 @budgets_bp.route('/budgets', methods=['GET'])
 @jwt_required()
+@versions.conditional(versions.BUDGETS)
 def list_budgets():
     user_id = int(get_jwt_identity())
     bgs = Budget.query.filter_by(user_id=user_id).all()
     return jsonify({'budgets': [serialize_budget(b) for b in bgs]}), 200
 
 
+@budgets_bp.route('/budgets/status', methods=['GET'])
+@jwt_required()
+def budgets_status():
+    """
+    Budget Status
+    ---
+    tags:
+      - Budgets
+    security:
+      - Bearer: []
+    parameters:
+      - in: query
+        name: date
+        type: string
+        format: date
+        description: Reference day for the current windows (defaults to today)
+    responses:
+      200:
+        description: Every budget with spent, remaining and percent used for its current period
+      400:
+        description: Invalid date
+      401:
+        description: Unauthorized
+    """
+    user_id = int(get_jwt_identity())
+    ref = date.today()
+    if request.args.get('date'):
+        try:
+            ref = datetime.strptime(request.args['date'], '%Y-%m-%d').date()
+        except ValueError:
+            return jsonify({'error': "'date' must be in YYYY-MM-DD format"}), 400
+
+    windows = {p: period_window(p, ref) for p in BUDGET_PERIODS}
+    # Per-row window bounds picked by each budget's period
+    window_start = case({p: w[0] for p, w in windows.items()}, value=Budget.period)
+    window_end = case({p: w[1] for p, w in windows.items()}, value=Budget.period)
+
+    # One grouped statement for all budgets: the join only admits expenses
+    # inside that budget's own window (range scan on the (user_id, date, type) index).
+    rows = (
+        db.session.query(
+            Budget, Category.name,
+            func.coalesce(func.sum(Transaction.amount), 0.0).label('spent'),
+        )
+        .outerjoin(Category, Category.id == Budget.category_id)
+        .outerjoin(Transaction, and_(
+            Transaction.user_id == Budget.user_id,
+            Transaction.category_id == Budget.category_id,
+            Transaction.type == 'expense',
+            Transaction.date >= window_start,
+            Transaction.date <= window_end,
+        ))
+        .filter(Budget.user_id == user_id)
+        .group_by(Budget.id, Category.name)
+        .order_by(Budget.id.asc())
+        .all()
+    )
+
+    out = []
+    for b, category_name, spent in rows:
+        spent = float(spent)
+        start, end = windows.get(b.period, (None, None))
+        out.append({
+            **serialize_budget(b),
+            'category_name': category_name,
+            'window_start': start.isoformat() if start else None,
+            'window_end': end.isoformat() if end else None,
+            'spent': spent,
+            'remaining': money.add(b.amount, -spent),
+            'percent_used': round(spent / b.amount * 100, 2) if b.amount else None,
+        })
+    return jsonify({'date': ref.isoformat(), 'budgets': out}), 200
+
+
 @budgets_bp.route('/budgets', methods=['POST'])
 @jwt_required()
 def create_budget():
@@ -49,6 +131,7 @@ def create_budget():
 
     b = Budget(user_id=user_id, category_id=category_id, amount=amount, period=period) # type: ignore
     db.session.add(b)
+    versions.bump(user_id, versions.BUDGETS)
     db.session.commit()
     return jsonify({'message': 'Budget created', 'budget': serialize_budget(b)}), 201
 
@@ -57,7 +140,7 @@ def create_budget():
 @jwt_required()
 def get_budget(budget_id: int):
     user_id = int(get_jwt_identity())
-    b = Budget.query.filter_by(id=budget_id, user_id=user_id).first()
+    b = Budget.get_owned(budget_id, user_id)
     if not b:
         return jsonify({'error': 'Budget not found'}), 404
     return jsonify({'budget': serialize_budget(b)}), 200
@@ -67,20 +150,28 @@ def get_budget(budget_id: int):
 @jwt_required()
 def update_budget(budget_id: int):
     user_id = int(get_jwt_identity())
-    b = Budget.query.filter_by(id=budget_id, user_id=user_id).first()
-    if not b:
-        return jsonify({'error': 'Budget not found'}), 404
     data = request.get_json(silent=True) or {}
+    values = {}
     if 'amount' in data:
         try:
-            b.amount = float(data['amount'])
+            values['amount'] = float(data['amount'])
         except Exception:
             return jsonify({'error': "'amount' must be a number"}), 400
     if 'period' in data:
         if data['period'] not in {'daily', 'weekly', 'monthly', 'yearly'}:
             return jsonify({'error': "'period' must be one of ['daily','weekly','monthly','yearly']"}), 400
-        b.period = data['period']
-    db.session.commit()
+        values['period'] = data['period']
+
+    if not values:
+        b = Budget.get_owned(budget_id, user_id)
+    else:
+        b = Budget.update_owned(budget_id, user_id, values, returning=BUDGET_COLUMNS)
+    if not b:
+        return jsonify({'error': 'Budget not found'}), 404
+
+    if values:
+        versions.bump(user_id, versions.BUDGETS)
+        db.session.commit()
     return jsonify({'message': 'Budget updated', 'budget': serialize_budget(b)}), 200
 
 
@@ -88,9 +179,9 @@ def update_budget(budget_id: int):
 @jwt_required()
 def delete_budget(budget_id: int):
     user_id = int(get_jwt_identity())
-    b = Budget.query.filter_by(id=budget_id, user_id=user_id).first()
-    if not b:
+    if not Budget.delete_owned(budget_id, user_id):
         return jsonify({'error': 'Budget not found'}), 404
-    db.session.delete(b)
+    versions.bump(user_id, versions.BUDGETS)
+    sync.record_deletes(user_id, versions.BUDGETS, [budget_id])
     db.session.commit()
     return jsonify({'message': 'Budget deleted'}), 200
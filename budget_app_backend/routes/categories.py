@@ -1,7 +1,13 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from database import db
-from models import Category, Transaction
+from models import Category, Transaction, Budget, RecurringRule
+from sqlalchemy import update, func
+from datetime import datetime
+import category_tree
+import rollups
+import versions
+import sync
 
 
 categories_bp = Blueprint('categories', __name__)
@@ -17,12 +23,57 @@ def serialize_category(c: Category) -> dict:
 
 @categories_bp.route('/categories', methods=['GET'])
 @jwt_required()
+@versions.conditional(versions.CATEGORIES)
 def list_categories():
     user_id = int(get_jwt_identity())
     cats = Category.query.filter_by(user_id=user_id).order_by(Category.name.asc()).all()
     return jsonify({"categories": [serialize_category(c) for c in cats]}), 200
 
 
+@categories_bp.route('/categories/tree', methods=['GET'])
+@jwt_required()
+def categories_tree():
+    """
+    Category Tree
+    ---
+    tags:
+      - Categories
+    security:
+      - Bearer: []
+    parameters:
+      - in: query
+        name: with_totals
+        type: integer
+        description: Set to 1 to include expense/income totals rolled up over each subtree
+      - in: query
+        name: start_date
+        type: string
+        format: date
+      - in: query
+        name: end_date
+        type: string
+        format: date
+    responses:
+      200:
+        description: Nested categories for the current user
+      400:
+        description: Invalid date
+    """
+    user_id = int(get_jwt_identity())
+    tree = category_tree.get_tree(user_id)
+
+    totals = None
+    if request.args.get('with_totals', type=int):
+        try:
+            start = datetime.strptime(request.args['start_date'], "%Y-%m-%d").date() if request.args.get('start_date') else None
+            end = datetime.strptime(request.args['end_date'], "%Y-%m-%d").date() if request.args.get('end_date') else None
+        except ValueError:
+            return jsonify({"error": "start_date/end_date must be YYYY-MM-DD"}), 400
+        totals = category_tree.subtree_totals(user_id, start, end)
+
+    return jsonify({"categories": tree.nested(totals)}), 200
+
+
 @categories_bp.route('/categories', methods=['POST'])
 @jwt_required()
 def create_category():
@@ -48,14 +99,16 @@ def create_category():
 
     c = Category(name=name, parent_id=parent_id, user_id=user_id) # type: ignore
     db.session.add(c)
+    versions.bump(user_id, versions.CATEGORIES)
     db.session.commit()
+    category_tree.invalidate(user_id)
     return jsonify({"message": "Category created", "category": serialize_category(c)}), 201
 
 
 @categories_bp.route('/categories/<int:category_id>', methods=['GET'])
 @jwt_required()
 def get_category(category_id: int):
-    c = Category.query.get(category_id)
+    c = Category.get_owned(category_id, int(get_jwt_identity()))
     if not c:
         return jsonify({"error": "Category not found"}), 404
     return jsonify({"category": serialize_category(c)}), 200
@@ -64,15 +117,14 @@ def get_category(category_id: int):
 @categories_bp.route('/categories/<int:category_id>', methods=['PUT', 'PATCH'])
 @jwt_required()
 def update_category(category_id: int):
-    c = Category.query.get(category_id)
-    if not c:
-        return jsonify({"error": "Category not found"}), 404
+    user_id = int(get_jwt_identity())
     data = request.get_json(silent=True) or {}
+    values = {}
     if 'name' in data:
         name = (data.get('name') or '').strip()
         if not name:
             return jsonify({"error": "'name' cannot be empty"}), 400
-        c.name = name
+        values['name'] = name
 
     if 'parent_id' in data:
         parent_id = data.get('parent_id')
@@ -81,34 +133,142 @@ def update_category(category_id: int):
                 parent_id = int(parent_id)
             except (TypeError, ValueError):
                 return jsonify({"error": "'parent_id' must be an integer"}), 400
-            if parent_id == c.id:
+            if parent_id == category_id:
                 return jsonify({"error": "Category cannot be its own parent"}), 400
             if parent_id:
-                parent = Category.query.get(parent_id)
-                if not parent:
+                if not Category.get_owned(parent_id, user_id):
                     return jsonify({"error": "Parent category not found"}), 404
-            c.parent_id = parent_id
-        else:
-            c.parent_id = None
+                if category_tree.is_ancestor(category_id, parent_id):
+                    return jsonify({"error": "Category cannot be moved under its own subcategory"}), 400
+        values['parent_id'] = parent_id or None
 
-    db.session.commit()
+    if not values:
+        c = Category.get_owned(category_id, user_id)
+    else:
+        c = Category.update_owned(category_id, user_id, values, returning=(Category.id, Category.name, Category.parent_id))
+    if not c:
+        return jsonify({"error": "Category not found"}), 404
+
+    if values:
+        versions.bump(user_id, versions.CATEGORIES)
+        db.session.commit()
+        category_tree.invalidate(user_id)
     return jsonify({"message": "Category updated", "category": serialize_category(c)}), 200
 
 
 @categories_bp.route('/categories/<int:category_id>', methods=['DELETE'])
 @jwt_required()
 def delete_category(category_id: int):
-    c = Category.query.get(category_id)
-    if not c:
+    user_id = int(get_jwt_identity())
+    if not owned_exists(category_id, user_id):
         return jsonify({"error": "Category not found"}), 404
 
-    # Reassign children to None to avoid FK issues
-    for child in Category.query.filter_by(parent_id=c.id).all():
-        child.parent_id = None
-
-    # Null out transactions that reference this category
-    Transaction.query.filter_by(category_id=c.id).update({Transaction.category_id: None})
+    # Budgets need a category; don't drop them silently
+    budgets = budget_count(category_id, user_id)
+    if budgets:
+        return jsonify({
+            "error": f"Category has {budgets} budget(s); delete them or merge the category instead",
+        }), 409
 
-    db.session.delete(c)
+    # Set-based: children become top level, transactions uncategorized
+    release_category(user_id, category_id, new_id=None)
+    Category.delete_owned(category_id, user_id)
+    sync.record_deletes(user_id, versions.CATEGORIES, [category_id])
     db.session.commit()
+    category_tree.invalidate(user_id)
     return jsonify({"message": "Category deleted"}), 200
+
+
+@categories_bp.route('/categories/<int:category_id>/merge', methods=['POST'])
+@jwt_required()
+def merge_category(category_id: int):
+    """
+    Merge Category
+    ---
+    tags:
+      - Categories
+    security:
+      - Bearer: []
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          properties:
+            into:
+              type: integer
+              description: Category that receives the transactions, budgets and subcategories
+    responses:
+      200:
+        description: Source category merged into `into` and deleted
+      400:
+        description: Missing/invalid `into`, or `into` is inside the source's subtree
+      404:
+        description: Category not found
+    """
+    user_id = int(get_jwt_identity())
+    data = request.get_json(silent=True) or {}
+    try:
+        target_id = int(data.get('into'))
+    except (TypeError, ValueError):
+        return jsonify({"error": "'into' must be a category id"}), 400
+    if target_id == category_id:
+        return jsonify({"error": "Cannot merge a category into itself"}), 400
+    if not owned_exists(category_id, user_id) or not owned_exists(target_id, user_id):
+        return jsonify({"error": "Category not found"}), 404
+    if category_tree.is_ancestor(category_id, target_id):
+        return jsonify({"error": "Cannot merge a category into its own subcategory"}), 400
+
+    moved = release_category(user_id, category_id, new_id=target_id)
+    Category.delete_owned(category_id, user_id)
+    sync.record_deletes(user_id, versions.CATEGORIES, [category_id])
+    db.session.commit()
+    category_tree.invalidate(user_id)
+    return jsonify({"message": "Category merged", "into": target_id, **moved}), 200
+
+
+def owned_exists(category_id: int, user_id: int) -> bool:
+    return db.session.query(Category.id).filter_by(id=category_id, user_id=user_id).first() is not None
+
+
+def budget_count(category_id: int, user_id: int) -> int:
+    return db.session.query(func.count(Budget.id)).filter_by(category_id=category_id, user_id=user_id).scalar()
+
+
+def release_category(user_id: int, category_id: int, new_id=None) -> dict:
+    """Move the user's rows that reference a category onto `new_id` (None = detach).
+
+    One UPDATE each for subcategories, transactions, recurring rules, budgets
+    (merge only; see `budget_count`) and the rollup; no rows are loaded.
+    Every statement is scoped to `user_id`, so rows of other users that still
+    point at a legacy shared category are never moved. The caller deletes
+    the category and commits.
+    """
+    children = db.session.execute(
+        update(Category)
+        .where(Category.parent_id == category_id, Category.user_id == user_id)
+        .values(parent_id=new_id)
+    ).rowcount
+    transactions = db.session.execute(
+        update(Transaction)
+        .where(Transaction.category_id == category_id, Transaction.user_id == user_id)
+        .values(category_id=new_id)
+    ).rowcount
+    rollups.reassign_category(user_id, category_id, new_id)
+    # Future occurrences follow the category too
+    db.session.execute(
+        update(RecurringRule)
+        .where(RecurringRule.category_id == category_id, RecurringRule.user_id == user_id)
+        .values(category_id=new_id)
+    )
+
+    budgets = 0
+    if new_id is not None:
+        budgets = db.session.execute(
+            update(Budget)
+            .where(Budget.category_id == category_id, Budget.user_id == user_id)
+            .values(category_id=new_id)
+        ).rowcount
+
+    versions.bump(user_id, versions.CATEGORIES, versions.TRANSACTIONS, versions.BUDGETS)
+    return {"subcategories": children, "transactions": transactions, "budgets": budgets}
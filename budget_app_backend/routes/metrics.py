@@ -0,0 +1,22 @@
+from flask import Blueprint, Response
+import instrumentation
+
+
+# Registered by create_app only when INSTRUMENTATION is on
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Prometheus Metrics
+    ---
+    tags:
+      - Admin
+    produces:
+      - text/plain
+    responses:
+      200:
+        description: Per-endpoint request counts, latency histogram, SQL statements/time/rows and N+1 flags for this worker
+    """
+    return Response(instrumentation.render(), mimetype='text/plain; version=0.0.4')
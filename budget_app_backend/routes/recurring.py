@@ -0,0 +1,228 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from database import db
+from models import RecurringRule, RecurringOccurrence, Category
+from sqlalchemy import delete, func, select
+from datetime import datetime, timedelta
+import recurring
+
+recurring_bp = Blueprint('recurring', __name__)
+
+CADENCE_FIELDS = ('freq', 'interval', 'start_date', 'end_date')
+
+
+def serialize_rule(r: RecurringRule) -> dict:
+    return {
+        'id': r.id,
+        'amount': r.amount,
+        'type': r.type,
+        'category_id': r.category_id,
+        'note': r.note,
+        'freq': r.freq,
+        'interval': r.interval,
+        'start_date': r.start_date.isoformat(),
+        'end_date': r.end_date.isoformat() if r.end_date else None,
+        'next_date': r.next_date.isoformat() if r.next_date else None,
+        'rrule': recurring.rrule(r),
+    }
+
+
+def parse_rule_payload(data, partial: bool = False) -> tuple:
+    """Validate a create (or, with `partial`, update) payload.
+
+    Returns `(fields, None)` with only the keys present (all required ones
+    on create), or `(None, error_message)`.
+    """
+    if not isinstance(data, dict):
+        return None, "Rule must be a JSON object"
+    fields = {}
+
+    if 'amount' in data or not partial:
+        try:
+            fields['amount'] = float(data['amount'])
+        except (KeyError, TypeError, ValueError):
+            return None, "'amount' must be a number"
+    if 'type' in data or not partial:
+        if data.get('type') not in {'income', 'expense'}:
+            return None, "'type' must be 'income' or 'expense'"
+        fields['type'] = data['type']
+    if 'freq' in data or not partial:
+        if data.get('freq') not in recurring.FREQUENCIES:
+            return None, f"'freq' must be one of {list(recurring.FREQUENCIES)}"
+        fields['freq'] = data['freq']
+    if 'interval' in data or not partial:
+        try:
+            fields['interval'] = int(data.get('interval', 1))
+        except (TypeError, ValueError):
+            fields['interval'] = 0
+        if fields['interval'] < 1:
+            return None, "'interval' must be a positive integer"
+    if 'category_id' in data:
+        try:
+            fields['category_id'] = int(data['category_id']) if data['category_id'] is not None else None
+        except (TypeError, ValueError):
+            return None, "'category_id' must be an integer"
+    if 'note' in data:
+        fields['note'] = data['note']
+
+    for key in ('start_date', 'end_date'):
+        if key not in data and (partial or key == 'end_date'):
+            continue
+        if key == 'end_date' and data[key] is None:
+            fields[key] = None
+            continue
+        try:
+            fields[key] = datetime.strptime(data[key], "%Y-%m-%d").date()
+        except (KeyError, TypeError, ValueError):
+            return None, f"'{key}' must be in YYYY-MM-DD format"
+    return fields, None
+
+
+def next_unmaterialized(rule: RecurringRule):
+    """First occurrence after the rule's last materialized one (or from its start)."""
+    last = db.session.scalar(
+        select(func.max(RecurringOccurrence.occurrence_date)).where(RecurringOccurrence.rule_id == rule.id)
+    )
+    resume = max(rule.start_date, last + timedelta(days=1)) if last else rule.start_date
+    return recurring.first_on_or_after(rule.freq, rule.interval, rule.start_date, resume, rule.end_date)
+
+
+@recurring_bp.route('/recurring', methods=['GET'])
+@jwt_required()
+def list_rules():
+    user_id = int(get_jwt_identity())
+    rules = RecurringRule.for_user(user_id).order_by(RecurringRule.id).all()
+    return jsonify({'rules': [serialize_rule(r) for r in rules]}), 200
+
+
+@recurring_bp.route('/recurring', methods=['POST'])
+@jwt_required()
+def create_rule():
+    """
+    Create Recurring Rule
+    ---
+    tags:
+      - Recurring
+    security:
+      - Bearer: []
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          required: [amount, type, freq, start_date]
+          properties:
+            amount: {type: number}
+            type: {type: string, enum: [income, expense]}
+            category_id: {type: integer}
+            note: {type: string}
+            freq: {type: string, enum: [daily, weekly, monthly, yearly]}
+            interval: {type: integer, default: 1}
+            start_date: {type: string, format: date}
+            end_date: {type: string, format: date}
+    responses:
+      201:
+        description: >
+          Rule created. Occurrences from start_date on (past ones included) are
+          added as transactions by the scheduler (`python recurring.py`).
+      400:
+        description: Invalid payload
+      404:
+        description: Category not found
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        fields, error = parse_rule_payload(request.get_json(silent=True) or {})
+        if error:
+            return jsonify({'error': error}), 400
+        if fields.get('end_date') and fields['end_date'] < fields['start_date']:
+            return jsonify({'error': "'end_date' must not be before 'start_date'"}), 400
+        if fields.get('category_id') and not Category.get_owned(fields['category_id'], user_id):
+            return jsonify({'error': 'Category not found'}), 404
+
+        rule = RecurringRule(user_id=user_id, next_date=fields['start_date'], **fields) # type: ignore
+        db.session.add(rule)
+        db.session.commit()
+        return jsonify({'message': 'Recurring rule created', 'rule': serialize_rule(rule)}), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+
+@recurring_bp.route('/recurring/<int:rule_id>', methods=['GET'])
+@jwt_required()
+def get_rule(rule_id: int):
+    user_id = int(get_jwt_identity())
+    rule = RecurringRule.get_owned(rule_id, user_id)
+    if not rule:
+        return jsonify({'error': 'Recurring rule not found'}), 404
+    return jsonify({'rule': serialize_rule(rule)}), 200
+
+
+@recurring_bp.route('/recurring/<int:rule_id>', methods=['PUT', 'PATCH'])
+@jwt_required()
+def update_rule(rule_id: int):
+    """
+    Update Recurring Rule
+    ---
+    tags:
+      - Recurring
+    security:
+      - Bearer: []
+    parameters:
+      - in: path
+        name: rule_id
+        type: integer
+        required: true
+      - in: body
+        name: body
+        schema:
+          type: object
+    responses:
+      200:
+        description: >
+          Rule updated. Already materialized transactions are not changed; a new
+          cadence applies from the day after the last materialized occurrence.
+      400:
+        description: Invalid payload
+      404:
+        description: Rule or category not found
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        fields, error = parse_rule_payload(request.get_json(silent=True) or {}, partial=True)
+        if error:
+            return jsonify({'error': error}), 400
+        rule = RecurringRule.get_owned(rule_id, user_id)
+        if not rule:
+            return jsonify({'error': 'Recurring rule not found'}), 404
+        if fields.get('category_id') and not Category.get_owned(fields['category_id'], user_id):
+            return jsonify({'error': 'Category not found'}), 404
+
+        for key, value in fields.items():
+            setattr(rule, key, value)
+        if rule.end_date and rule.end_date < rule.start_date:
+            db.session.rollback()
+            return jsonify({'error': "'end_date' must not be before 'start_date'"}), 400
+        if any(key in fields for key in CADENCE_FIELDS):
+            rule.next_date = next_unmaterialized(rule)
+        db.session.commit()
+        return jsonify({'message': 'Recurring rule updated', 'rule': serialize_rule(rule)}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+
+@recurring_bp.route('/recurring/<int:rule_id>', methods=['DELETE'])
+@jwt_required()
+def delete_rule(rule_id: int):
+    """Stops the rule; transactions it already created are kept."""
+    user_id = int(get_jwt_identity())
+    owned = select(RecurringRule.id).where(RecurringRule.id == rule_id, RecurringRule.user_id == user_id)
+    db.session.execute(delete(RecurringOccurrence).where(RecurringOccurrence.rule_id.in_(owned)))
+    if not RecurringRule.delete_owned(rule_id, user_id):
+        db.session.rollback()
+        return jsonify({'error': 'Recurring rule not found'}), 404
+    db.session.commit()
+    return jsonify({'message': 'Recurring rule deleted'}), 200
@@ -0,0 +1,70 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from datetime import datetime, timedelta
+from models import Transaction, Category, Budget
+from routes.transactions import TRANSACTION_COLUMNS, serialize_transaction_row
+from routes.categories import serialize_category
+from routes.budgets import BUDGET_COLUMNS, serialize_budget
+import sync
+import versions
+
+
+sync_bp = Blueprint('sync', __name__)
+
+# resource -> (model, selected columns, row serializer)
+SYNC_RESOURCES = {
+    versions.TRANSACTIONS: (Transaction, TRANSACTION_COLUMNS, serialize_transaction_row),
+    versions.CATEGORIES: (Category, (Category.id, Category.name, Category.parent_id), serialize_category),
+    versions.BUDGETS: (Budget, BUDGET_COLUMNS, serialize_budget),
+}
+
+
+@sync_bp.route('/sync', methods=['GET'])
+@jwt_required()
+def delta_sync():
+    """
+    Delta Sync
+    ---
+    tags:
+      - Sync
+    security:
+      - Bearer: []
+    parameters:
+      - in: query
+        name: since
+        type: string
+        description: "`next_token` from the previous sync; omit for a full snapshot"
+    responses:
+      200:
+        description: >
+          Per resource, rows created/updated (`updated`) and ids deleted
+          (`deleted`) since the token, plus `next_token`. `reset: true` means
+          a full snapshot: replace local data instead of merging.
+      400:
+        description: Invalid sync token
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        # Taken before reading so nothing committed during this sync is skipped next time
+        now = datetime.utcnow()
+
+        since = None
+        if request.args.get('since'):
+            try:
+                since = sync.decode_token(request.args['since'])
+            except ValueError:
+                return jsonify({"error": "Invalid sync token"}), 400
+            since -= timedelta(seconds=current_app.config['SYNC_OVERLAP_SECONDS'])
+            if since < sync.horizon():
+                since = None  # tombstones are gone; fall back to a snapshot
+
+        deleted = sync.deleted_ids(user_id, since) if since is not None else {}
+        response = {"reset": since is None, "next_token": sync.encode_token(now)}
+        for resource, (model, columns, serialize) in SYNC_RESOURCES.items():
+            response[resource] = {
+                "updated": [serialize(r) for r in sync.changed_rows(model, columns, user_id, since)],
+                "deleted": deleted.get(resource, []),
+            }
+        return jsonify(response), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
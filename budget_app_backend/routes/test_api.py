@@ -197,15 +197,6 @@ def run_inprocess_flow():
     user_id = (signup_json.get('user') or {}).get('id')
     print('🔹 Signup (in-proc):', res.status_code, signup_json)
 
-    # Verify per-user tables were created for this user
-    if user_id:
-        with app.app_context():
-            # Look for user_{id}_transactions table in sqlite_master
-            tbls = db.session.execute(text("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE :pattern"), {"pattern": f"user_{user_id}_transactions"}).fetchall()
-            print('🔹 Per-user transaction table exists:', bool(tbls))
-    else:
-        print('⚠️ Could not determine signup user_id; skipping per-user table check')
-
     # Login
     login_payload = {"email": "testuser@example.com", "password": "password123"}
     res = client.post('/login', json=login_payload)
@@ -234,9 +225,11 @@ def run_inprocess_flow():
     print('🔹 Create transaction (in-proc):', res.status_code, cj)
     tx_id = (cj.get('transaction') or {}).get('id')
 
-    # After creating transaction, verify mirrored entry exists in per-user table
+    # After creating transaction, deliver the outbox and verify the mirrored entry exists in per-user table
     if user_id:
         with app.app_context():
+            import outbox
+            outbox.drain_all()
             try:
                 cnt_shared = Transaction.query.filter_by(user_id=user_id).count()
             except Exception:
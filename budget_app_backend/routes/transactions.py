@@ -1,15 +1,52 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from database import db, insert_user_transaction
-from models import Transaction, Category
-from sqlalchemy.orm import joinedload
-from sqlalchemy import func
+from database import db
+from models import Transaction, Category, MonthlyRollup
+from aggregates import date_bucket, sum_by_type, INTERVALS
+import identity
+import outbox
+import versions
+import sync
+import rollups
+import search
+import category_tree
+import money
+from sqlalchemy import func, and_, or_, insert, select, case
 from datetime import datetime, date, timedelta
+import base64
+import csv
+import io
+import json
 
 
 # Create blueprint
 transactions_bp = Blueprint('transactions', __name__)
 
+# Keyset pagination page sizes
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Bulk ingestion limits
+MAX_BULK_ROWS = 5000
+NDJSON_MIMETYPES = {'application/x-ndjson', 'application/ndjson', 'application/jsonl'}
+
+# Streaming export: format -> (mimetype, file extension)
+EXPORT_FORMATS = {'csv': ('text/csv', 'csv'), 'ndjson': ('application/x-ndjson', 'ndjson')}
+EXPORT_BATCH_SIZE = 1000
+EXPORT_FIELDS = ('id', 'date', 'type', 'amount', 'category_id', 'note')
+
+# Columns selected by the tuple-based list/export paths, in EXPORT_FIELDS order
+TRANSACTION_COLUMNS = (
+    Transaction.id, Transaction.date, Transaction.type,
+    Transaction.amount, Transaction.category_id, Transaction.note,
+)
+
+# /transactions/summary breakdowns
+SUMMARY_GROUPS = INTERVALS + ('category',)
+
+# Columns that feed monthly_rollup
+ROLLUP_FIELDS = ('user_id', 'date', 'category_id', 'type', 'amount')
+
 
 def serialize_transaction(t: Transaction) -> dict:
         return {
@@ -19,12 +56,109 @@ def serialize_transaction(t: Transaction) -> dict:
                 "category_id": t.category_id,
                 "date": t.date.isoformat() if t.date else None,
                 "note": t.note,
-                "user_name": getattr(t.user, 'name', None),
         }
 
+
+def serialize_transaction_row(row) -> dict:
+    """Same shape as `serialize_transaction`, from a TRANSACTION_COLUMNS tuple."""
+    tx_id, tx_date, t_type, amount, category_id, note = row
+    return {
+        "id": tx_id,
+        "amount": amount,
+        "type": t_type,
+        "category_id": category_id,
+        "date": tx_date.isoformat() if tx_date else None,
+        "note": note,
+    }
+
+
+def transaction_filters(user_id: int) -> tuple:
+    """(conditions, error) from the list/export filter query params.
+
+    start_date/end_date, type, category_id (+ include_subcategories=1),
+    min_amount/max_amount and q (note text search). Every condition is
+    combined with `user_id = ?` so it lands on a (user_id, ...) index.
+    """
+    args = request.args
+    conditions = [Transaction.user_id == user_id]
+    try:
+        if args.get('start_date'):
+            conditions.append(Transaction.date >= datetime.strptime(args['start_date'], "%Y-%m-%d").date())
+        if args.get('end_date'):
+            conditions.append(Transaction.date <= datetime.strptime(args['end_date'], "%Y-%m-%d").date())
+    except ValueError:
+        return None, "start_date/end_date must be YYYY-MM-DD"
+
+    if args.get('type'):
+        if args['type'] not in {"income", "expense"}:
+            return None, "'type' must be 'income' or 'expense'"
+        conditions.append(Transaction.type == args['type'])
+
+    if args.get('category_id'):
+        category_id = args.get('category_id', type=int)
+        if category_id is None:
+            return None, "'category_id' must be an integer"
+        if args.get('include_subcategories', type=int):
+            ids = category_tree.get_tree(user_id).subtree_ids(category_id) or {category_id}
+            conditions.append(Transaction.category_id.in_(sorted(ids)))
+        else:
+            conditions.append(Transaction.category_id == category_id)
+
+    for param, op in (('min_amount', Transaction.amount.__ge__), ('max_amount', Transaction.amount.__le__)):
+        if args.get(param):
+            value = args.get(param, type=float)
+            if value is None:
+                return None, f"'{param}' must be a number"
+            conditions.append(op(value))
+
+    if args.get('q'):
+        match = search.note_matches(Transaction.id, Transaction.note, args['q'], user_id)
+        if match is not None:
+            conditions.append(match)
+
+    return conditions, None
+
+
+def owner_name(user_id: int):
+    """The owner's display name, sent once per list envelope instead of per row."""
+    user = identity.load_user(user_id)
+    return user["name"] if user else None
+
+
+def encode_cursor(tx_date, tx_id: int) -> str:
+    """Build an opaque keyset cursor from the last row's (date, id)."""
+    raw = f"{tx_date.isoformat() if tx_date else ''}|{tx_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str):
+    """Inverse of `encode_cursor`; raises ValueError on malformed input."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        date_part, id_part = base64.urlsafe_b64decode(padded.encode()).decode().split('|', 1)
+        tx_date = datetime.strptime(date_part, "%Y-%m-%d").date() if date_part else None
+        return tx_date, int(id_part)
+    except Exception:
+        raise ValueError("invalid cursor")
+
+
+def after_cursor(query, tx_date, tx_id: int):
+    """Restrict `query` to rows that sort after (tx_date, tx_id) under
+    `ORDER BY date DESC, id DESC`. NULL dates sort last (SQLite semantics).
+    """
+    if tx_date is None:
+        return query.filter(Transaction.date.is_(None), Transaction.id < tx_id)
+    return query.filter(or_(
+        Transaction.date < tx_date,
+        and_(Transaction.date == tx_date, Transaction.id < tx_id),
+        Transaction.date.is_(None),
+    ))
+
+
 # GET /transactions → fetch all transactions for current user
 @transactions_bp.route('/transactions', methods=['GET'])
 @jwt_required()
+@versions.conditional(versions.TRANSACTIONS)
 def get_transactions():
     """
     Get Transactions
@@ -33,9 +167,66 @@ def get_transactions():
       - Transactions
     security:
       - Bearer: []
+    parameters:
+      - in: query
+        name: cursor
+        type: string
+        description: Opaque keyset cursor (pass empty for the first page, then `next_cursor`)
+      - in: query
+        name: limit
+        type: integer
+        description: Page size for cursor mode (default 50, max 500)
+      - in: query
+        name: page
+        type: integer
+        description: Legacy offset pagination page number (requires per_page)
+      - in: query
+        name: per_page
+        type: integer
+      - in: query
+        name: with_total
+        type: string
+        enum: ['1', estimate]
+        description: >
+          Offset mode only. 1 adds the exact filtered `total` (a COUNT per request);
+          `estimate` adds `total_estimate`, all of the user's transactions from
+          monthly_rollup, ignoring filters. Omitted: no total.
+      - in: query
+        name: start_date
+        type: string
+        format: date
+      - in: query
+        name: end_date
+        type: string
+        format: date
+      - in: query
+        name: type
+        type: string
+        enum: [income, expense]
+      - in: query
+        name: category_id
+        type: integer
+      - in: query
+        name: include_subcategories
+        type: integer
+        description: Set to 1 to include transactions of the category's descendants
+      - in: query
+        name: min_amount
+        type: number
+      - in: query
+        name: max_amount
+        type: number
+      - in: query
+        name: q
+        type: string
+        description: Note text search (word prefixes; full-text index on SQLite)
     responses:
       200:
         description: List of all transactions for the current user
+      304:
+        description: Unchanged since the ETag sent in If-None-Match
+      400:
+        description: Invalid cursor or filter
       401:
         description: Unauthorized (JWT missing/invalid)
     """
@@ -43,33 +234,75 @@ def get_transactions():
         # Convert identity back into integer for querying
         user_id = int(get_jwt_identity())
 
-        # Optional pagination params: ?page=1&per_page=50
-        page = request.args.get('page', type=int)
-        per_page = request.args.get('per_page', type=int)
+        conditions, error = transaction_filters(user_id)
+        if error:
+            return jsonify({"error": error}), 400
 
+        # Plain column tuples: no ORM identity map, no per-row User join
         base_query = (
-            Transaction.query
-            .options(joinedload(Transaction.user)) # type: ignore
-            .filter_by(user_id=user_id)
+            select(*TRANSACTION_COLUMNS)
+            .where(*conditions)
             .order_by(Transaction.date.desc(), Transaction.id.desc())
         )
 
+        # Keyset pagination: ?cursor=<next_cursor>&limit=50
+        # Seeks on (date, id) so deep pages cost the same as the first one; never counts.
+        if 'cursor' in request.args or 'limit' in request.args:
+            limit = request.args.get('limit', default=DEFAULT_PAGE_SIZE, type=int)
+            limit = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+            cursor = request.args.get('cursor') or None
+
+            query = base_query
+            if cursor:
+                try:
+                    query = after_cursor(query, *decode_cursor(cursor))
+                except ValueError:
+                    return jsonify({"error": "Invalid cursor"}), 400
+
+            # Fetch one extra row to learn whether another page exists
+            rows = db.session.execute(query.limit(limit + 1)).all()
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].date, rows[-1].id) if has_more else None
+
+            return jsonify({
+                "transactions": [serialize_transaction_row(r) for r in rows],
+                "user_name": owner_name(user_id),
+                "limit": limit,
+                "next_cursor": next_cursor,
+            }), 200
+
+        # Legacy offset pagination params: ?page=1&per_page=50
+        page = request.args.get('page', type=int)
+        per_page = request.args.get('per_page', type=int)
+
+        query = base_query
         if page and per_page:
-            pagination = base_query.paginate(page=page, per_page=per_page, error_out=False)
-            items = pagination.items
-        else:
-            items = base_query.all()
+            page, per_page = max(page, 1), max(per_page, 1)
+            query = query.limit(per_page).offset((page - 1) * per_page)
 
-        result = []
-        for t in items:
-            result.append(serialize_transaction(t))
+        result = [serialize_transaction_row(r) for r in db.session.execute(query)]
 
-        response: dict = {"transactions": result}
+        response: dict = {"transactions": result, "user_name": owner_name(user_id)}
         if page and per_page:
             response["page"] = page
             response["per_page"] = per_page
-            # Count only if pagination requested to avoid heavy count when unnecessary
-            response["total"] = base_query.count()
+            # Totals are opt-in: an exact count costs as much as scanning the matches
+            with_total = request.args.get('with_total')
+            if with_total == '1':
+                # Index-only count, without the ORDER BY subquery `base_query.count()` would wrap
+                response["total"] = (
+                    db.session.query(func.count(Transaction.id))
+                    .filter(*conditions)
+                    .scalar()
+                )
+            elif with_total == 'estimate':
+                # One primary-key range read of the user's monthly_rollup rows
+                response["total_estimate"] = int(
+                    db.session.query(func.coalesce(func.sum(MonthlyRollup.count), 0))
+                    .filter(MonthlyRollup.user_id == user_id)
+                    .scalar()
+                )
 
         return jsonify(response), 200
 
@@ -81,6 +314,53 @@ def new_func():
   return get_jwt_identity()
 
 
+def parse_transaction_payload(data) -> tuple:
+    """Validate a create payload without touching the DB.
+
+    Returns `(fields, None)` with normalized amount/type/category_id/date/note,
+    or `(None, error_message)`. Shared by the single and bulk create routes.
+    """
+    if not isinstance(data, dict):
+        return None, "Transaction must be a JSON object"
+
+    amount = data.get('amount')
+    t_type = data.get('type')
+    category_id = data.get('category_id')
+    date_str = data.get('date')
+    note = data.get('note', "")
+
+    if amount is None or t_type not in {"income", "expense"}:
+        return None, "'amount' and valid 'type' ('income' or 'expense') are required"
+
+    try:
+        amount = float(amount)
+    except (TypeError, ValueError):
+        return None, "'amount' must be a number"
+
+    if category_id is not None:
+        try:
+            category_id = int(category_id)
+        except (TypeError, ValueError):
+            return None, "'category_id' must be an integer"
+
+    # Date parsing; default to today if missing
+    if date_str:
+        try:
+            tx_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+        except (TypeError, ValueError):
+            return None, "'date' must be in YYYY-MM-DD format"
+    else:
+        tx_date = date.today()
+
+    return {
+        "amount": amount,
+        "type": t_type,
+        "category_id": category_id,
+        "date": tx_date,
+        "note": note,
+    }, None
+
+
 # POST /transactions → create a new transaction
 @transactions_bp.route('/transactions', methods=['POST'])
 @jwt_required()
@@ -127,52 +407,32 @@ def create_transaction():
         user_id = int(get_jwt_identity())
         data = request.get_json(silent=True) or {}
 
-        # Basic validation
-        amount = data.get('amount')
-        t_type = data.get('type')
-        category_id = data.get('category_id')
-        date_str = data.get('date')
-        note = data.get('note', "")
-
-        if amount is None or t_type not in {"income", "expense"}:
-            return jsonify({"error": "'amount' and valid 'type' ('income' or 'expense') are required"}), 400
-
-        try:
-            amount = float(amount)
-        except (TypeError, ValueError):
-            return jsonify({"error": "'amount' must be a number"}), 400
-
-        if category_id is not None:
-            try:
-                category_id = int(category_id)
-            except (TypeError, ValueError):
-                return jsonify({"error": "'category_id' must be an integer"}), 400
-            # Ensure category belongs to this user (if provided)
-            if category_id:
-                cat = Category.query.filter_by(id=category_id, user_id=user_id).first()
+        fields, error = parse_transaction_payload(data)
+        if error:
+            return jsonify({"error": error}), 400
+        amount = fields['amount']
+        t_type = fields['type']
+        category_id = fields['category_id']
+        tx_date = fields['date']
+        note = fields['note']
+
+        # Ensure category belongs to this user (if provided)
+        if category_id:
+            cat = Category.query.filter_by(id=category_id, user_id=user_id).first()
+            if not cat:
+                # Fallback for legacy/shared categories that don't have `user_id` populated yet.
+                # Allow using a category that exists even if its user_id is NULL or different,
+                # but prefer owned categories when present.
+                cat = Category.query.get(category_id)
                 if not cat:
-                    # Fallback for legacy/shared categories that don't have `user_id` populated yet.
-                    # Allow using a category that exists even if its user_id is NULL or different,
-                    # but prefer owned categories when present.
-                    cat = Category.query.get(category_id)
-                    if not cat:
-                        # Category truly doesn't exist. For compatibility with older clients
-                        # that may create transactions before categories, treat missing
-                        # category as 'uncategorized' rather than failing the request.
-                        print(f"Notice: category id={category_id} not found; creating uncategorized transaction for user {user_id}")
-                        category_id = None
-                    else:
-                        # Log a warning server-side; keep category_id as provided.
-                        print(f"Notice: using legacy/shared category id={category_id} for user {user_id}")
-
-        # Date parsing; default to today if missing
-        if date_str:
-            try:
-                tx_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-            except ValueError:
-                return jsonify({"error": "'date' must be in YYYY-MM-DD format"}), 400
-        else:
-            tx_date = date.today()
+                    # Category truly doesn't exist. For compatibility with older clients
+                    # that may create transactions before categories, treat missing
+                    # category as 'uncategorized' rather than failing the request.
+                    print(f"Notice: category id={category_id} not found; creating uncategorized transaction for user {user_id}")
+                    category_id = None
+                else:
+                    # Log a warning server-side; keep category_id as provided.
+                    print(f"Notice: using legacy/shared category id={category_id} for user {user_id}")
 
         new_transaction = Transaction(
             user_id=user_id, # type: ignore
@@ -184,14 +444,12 @@ def create_transaction():
         )
 
         db.session.add(new_transaction)
+        rollups.record([new_transaction])
+        # Mirror into the per-user table asynchronously (delivered by the outbox worker)
+        outbox.enqueue(user_id, outbox.TRANSACTION_CREATED, [outbox.transaction_payload(fields | {"category_id": category_id})])
+        versions.bump(user_id, versions.TRANSACTIONS)
         db.session.commit()
 
-        # Mirror into per-user table (best-effort; don't fail main request on mirror error)
-        try:
-            insert_user_transaction(user_id=user_id, amount=amount, t_type=t_type, category_id=category_id, tx_date=tx_date, note=note)
-        except Exception as e:
-            print(f"Warning: failed to mirror transaction for user {user_id}: {e}")
-
         return jsonify({
             "message": "Transaction added successfully!",
             "transaction": serialize_transaction(new_transaction)
@@ -201,12 +459,218 @@ def create_transaction():
         return jsonify({"error": str(e)}), 500
 
 
+# POST /transactions/bulk → create many transactions in one DB transaction
+@transactions_bp.route('/transactions/bulk', methods=['POST'])
+@jwt_required()
+def create_transactions_bulk():
+    """
+    Bulk Create Transactions
+    ---
+    tags:
+      - Transactions
+    security:
+      - Bearer: []
+    consumes:
+      - application/json
+      - application/x-ndjson
+    parameters:
+      - in: body
+        name: body
+        required: true
+        description: >
+          A JSON array of transaction objects (same fields as POST /transactions),
+          or one JSON object per line with Content-Type application/x-ndjson.
+        schema:
+          type: array
+          items:
+            type: object
+    responses:
+      201:
+        description: At least one row was created; see per-row `results`
+      400:
+        description: Malformed body or no valid rows
+      413:
+        description: Too many rows in one request
+      401:
+        description: Unauthorized (JWT missing/invalid)
+    """
+    try:
+        user_id = int(get_jwt_identity())
+
+        rows = read_bulk_rows()
+        if rows is None:
+            return jsonify({"error": "Body must be a JSON array or NDJSON stream of transactions"}), 400
+        if len(rows) > MAX_BULK_ROWS:
+            return jsonify({"error": f"At most {MAX_BULK_ROWS} transactions per request"}), 413
+
+        results: list = [None] * len(rows)
+        valid = []  # (index, fields)
+        for i, data in enumerate(rows):
+            if isinstance(data, Exception):
+                results[i] = {"index": i, "status": "error", "error": "Invalid JSON"}
+                continue
+            fields, error = parse_transaction_payload(data)
+            if error:
+                results[i] = {"index": i, "status": "error", "error": error}
+            else:
+                valid.append((i, fields))
+
+        if not valid:
+            return jsonify({"created": 0, "failed": len(rows), "results": results}), 400
+
+        # Resolve every referenced category in one query. Mirrors the single-row
+        # rules: any existing category is kept, unknown ids become uncategorized.
+        wanted = {f['category_id'] for _, f in valid if f['category_id']}
+        known = set()
+        if wanted:
+            known = {cid for (cid,) in db.session.query(Category.id).filter(Category.id.in_(wanted))}
+
+        params = []
+        for _, f in valid:
+            if f['category_id'] and f['category_id'] not in known:
+                f['category_id'] = None
+            params.append({"user_id": user_id, **f})
+
+        # One multi-row INSERT (executemany under the hood) and a single commit
+        ids = db.session.scalars(
+            insert(Transaction).returning(Transaction.id, sort_by_parameter_order=True),
+            params,
+        ).all()
+        rollups.record(params)
+        outbox.enqueue(user_id, outbox.TRANSACTION_CREATED, [outbox.transaction_payload(p) for p in params])
+        versions.bump(user_id, versions.TRANSACTIONS)
+        db.session.commit()
+
+        for (i, f), tx_id in zip(valid, ids):
+            results[i] = {"index": i, "status": "created", "id": tx_id, "category_id": f['category_id']}
+
+        return jsonify({
+            "created": len(ids),
+            "failed": len(rows) - len(ids),
+            "results": results,
+        }), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+
+def read_bulk_rows():
+    """Return the bulk body as a list of row payloads, or None if unusable.
+
+    NDJSON lines that fail to parse are returned as the exception so the
+    caller can report them per row instead of rejecting the whole batch.
+    """
+    if request.mimetype in NDJSON_MIMETYPES:
+        rows = []
+        for line in request.get_data(as_text=True).splitlines():
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError as e:
+                rows.append(e)
+        return rows
+
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('transactions')
+    return data if isinstance(data, list) else None
+
+
+# GET /transactions/export → stream all transactions as CSV or NDJSON
+@transactions_bp.route('/transactions/export', methods=['GET'])
+@jwt_required()
+def export_transactions():
+    """
+    Export Transactions
+    ---
+    tags:
+      - Transactions
+    security:
+      - Bearer: []
+    produces:
+      - text/csv
+      - application/x-ndjson
+    parameters:
+      - in: query
+        name: format
+        type: string
+        enum: [csv, ndjson]
+        default: csv
+      - in: query
+        name: q
+        type: string
+        description: >
+          Also accepts the GET /transactions filters (start_date, end_date,
+          type, category_id, include_subcategories, min_amount, max_amount, q)
+    responses:
+      200:
+        description: Streamed export of all transactions for the current user
+      400:
+        description: Unsupported format or invalid filter
+      401:
+        description: Unauthorized (JWT missing/invalid)
+    """
+    user_id = int(get_jwt_identity())
+    fmt = (request.args.get('format') or 'csv').lower()
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"'format' must be one of {sorted(EXPORT_FORMATS)}"}), 400
+    conditions, error = transaction_filters(user_id)
+    if error:
+        return jsonify({"error": error}), 400
+
+    # Plain column tuples streamed from a server-side cursor; no ORM objects
+    # are built and at most EXPORT_BATCH_SIZE rows are buffered at a time.
+    stmt = (
+        select(*TRANSACTION_COLUMNS)
+        .where(*conditions)
+        .order_by(Transaction.date.desc(), Transaction.id.desc())
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+
+    def generate():
+        rows = db.session.execute(stmt)
+        try:
+            if fmt == 'csv':
+                yield from _csv_chunks(rows)
+            else:
+                yield from _ndjson_chunks(rows)
+        finally:
+            rows.close()
+
+    mimetype, extension = EXPORT_FORMATS[fmt]
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename=transactions.{extension}"},
+    )
+
+
+def _csv_chunks(rows):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(EXPORT_FIELDS)
+    for partition in rows.partitions():
+        for tx_id, tx_date, t_type, amount, category_id, note in partition:
+            writer.writerow((tx_id, tx_date.isoformat() if tx_date else '', t_type, amount, category_id, note))
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+
+def _ndjson_chunks(rows):
+    for partition in rows.partitions():
+        yield ''.join(json.dumps(serialize_transaction_row(row)) + '\n' for row in partition)
+
+
 # GET /transactions/<id> → fetch a single transaction for current user
 @transactions_bp.route('/transactions/<int:transaction_id>', methods=['GET'])
 @jwt_required()
 def get_transaction(transaction_id: int):
     try:
-        t = Transaction.query.get(transaction_id)
+        t = Transaction.get_owned(transaction_id, int(get_jwt_identity()))
         if not t:
             return jsonify({"error": "Transaction not found"}), 404
         return jsonify({"transaction": serialize_transaction(t)}), 200
@@ -219,10 +683,12 @@ def get_transaction(transaction_id: int):
 @jwt_required()
 def update_transaction(transaction_id: int):
     try:
-        t = Transaction.query.get(transaction_id)
+        # Scoped get rather than update_owned: the rollup needs the old values
+        t = Transaction.get_owned(transaction_id, int(get_jwt_identity()))
         if not t:
             return jsonify({"error": "Transaction not found"}), 404
         data = request.get_json(silent=True) or {}
+        before = {k: getattr(t, k) for k in ROLLUP_FIELDS}
 
         if 'amount' in data:
             try:
@@ -256,6 +722,10 @@ def update_transaction(transaction_id: int):
         if 'note' in data:
             t.note = data.get('note') or ""
 
+        if any(before[k] != getattr(t, k) for k in ROLLUP_FIELDS):
+            rollups.record([before], sign=-1)
+            rollups.record([t])
+        versions.bump(t.user_id, versions.TRANSACTIONS)
         db.session.commit()
         return jsonify({"message": "Transaction updated successfully!", "transaction": serialize_transaction(t)}), 200
     except Exception as e:
@@ -268,10 +738,16 @@ def update_transaction(transaction_id: int):
 @jwt_required()
 def delete_transaction(transaction_id: int):
     try:
-        t = Transaction.query.get(transaction_id)
-        if not t:
+        user_id = int(get_jwt_identity())
+        deleted = Transaction.delete_owned(
+            transaction_id, user_id,
+            returning=[getattr(Transaction, k) for k in ROLLUP_FIELDS],
+        )
+        if not deleted:
             return jsonify({"error": "Transaction not found"}), 404
-        db.session.delete(t)
+        rollups.record([deleted._asdict()], sign=-1)
+        versions.bump(user_id, versions.TRANSACTIONS)
+        sync.record_deletes(user_id, versions.TRANSACTIONS, [transaction_id])
         db.session.commit()
         return jsonify({"message": "Transaction deleted successfully!"}), 200
     except Exception as e:
@@ -290,8 +766,10 @@ def test_protected():
 @jwt_required()
 def transactions_summary():
     """Return aggregate sums for the current user.
-    Optional query params: start_date=YYYY-MM-DD, end_date=YYYY-MM-DD
-    Defaults to current calendar month.
+    Optional query params: start_date=YYYY-MM-DD, end_date=YYYY-MM-DD,
+    group_by=day|week|month|category.
+    Defaults to current calendar month. Totals and the optional breakdown
+    come from a single conditional-aggregation query.
     """
     try:
         user_id = int(get_jwt_identity())
@@ -299,20 +777,20 @@ def transactions_summary():
         # optional date range
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
+        group_by = request.args.get('group_by')
 
-        from datetime import datetime, date
+        if group_by and group_by not in SUMMARY_GROUPS:
+            return jsonify({"error": f"'group_by' must be one of {list(SUMMARY_GROUPS)}"}), 400
 
         if not start_date or not end_date:
-            # default to current month
+            # default to current month; filter is inclusive on both ends
             today = date.today()
             start = date(today.year, today.month, 1)
-            # compute first of next month then subtract one day isn't necessary for inclusive filter
-            # we'll filter with >= start and <= last_day
             if today.month == 12:
                 next_month = date(today.year + 1, 1, 1)
             else:
                 next_month = date(today.year, today.month + 1, 1)
-            end = next_month - datetime.timedelta(days=1)
+            end = next_month - timedelta(days=1)
         else:
             try:
                 start = datetime.strptime(start_date, "%Y-%m-%d").date()
@@ -320,23 +798,102 @@ def transactions_summary():
             except Exception:
                 return jsonify({"error": "start_date/end_date must be YYYY-MM-DD"}), 400
 
-        # Sum expenses and incomes for the user in range
-        spent_q = db.session.query(func.coalesce(func.sum(Transaction.amount), 0.0)).filter(
-            Transaction.user_id == user_id,
-            Transaction.type == 'expense',
-            Transaction.date >= start,
-            Transaction.date <= end,
-        )
-        income_q = db.session.query(func.coalesce(func.sum(Transaction.amount), 0.0)).filter(
-            Transaction.user_id == user_id,
-            Transaction.type == 'income',
-            Transaction.date >= start,
-            Transaction.date <= end,
-        )
+        response: dict = {"start_date": start.isoformat(), "end_date": end.isoformat()}
+
+        # Whole-month ranges are answered from monthly_rollup (O(months x categories))
+        if group_by in (None, 'month', 'category') and rollups.is_month_aligned(start, end):
+            groups = summary_from_rollup(user_id, start, end, group_by)
+        else:
+            groups = summary_from_transactions(user_id, start, end, group_by)
 
-        spent = float(spent_q.scalar() or 0.0)
-        income = float(income_q.scalar() or 0.0)
+        if not group_by:
+            spent, income = groups[0]["spent"], groups[0]["income"]
+            response.update({"spent": spent, "income": income, "net": money.add(income, -spent)})
+            return jsonify(response), 200
 
-        return jsonify({"spent": spent, "income": income, "net": income - spent}), 200
+        spent = money.add(*(g["spent"] for g in groups))
+        income = money.add(*(g["income"] for g in groups))
+        response.update({"spent": spent, "income": income, "net": money.add(income, -spent), "group_by": group_by, "groups": groups})
+        return jsonify(response), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+
+def summary_from_transactions(user_id: int, start, end, group_by) -> list:
+    """Single conditional-aggregation pass over raw transactions."""
+    spent_col = sum_by_type('expense').label('spent')
+    income_col = sum_by_type('income').label('income')
+    # Index range scan on (user_id, date[, type])
+    in_range = (
+        Transaction.user_id == user_id,
+        Transaction.date >= start,
+        Transaction.date <= end,
+    )
+
+    if not group_by:
+        rows = [db.session.query(spent_col, income_col).filter(*in_range).one()]
+        return [_summary_group({}, s, i) for s, i in rows]
+
+    if group_by == 'category':
+        rows = (
+            db.session.query(Transaction.category_id, Category.name, spent_col, income_col)
+            .outerjoin(Category, Transaction.category_id == Category.id)
+            .filter(*in_range)
+            .group_by(Transaction.category_id, Category.name)
+            .order_by(spent_col.desc())
+            .all()
+        )
+        return [_summary_group({"category_id": cid, "category_name": name}, s, i) for cid, name, s, i in rows]
+
+    bucket = date_bucket(Transaction.date, group_by).label('period')
+    rows = (
+        db.session.query(bucket, spent_col, income_col)
+        .filter(*in_range)
+        .group_by(bucket)
+        .order_by(bucket)
+        .all()
+    )
+    return [_summary_group({"period": period}, s, i) for period, s, i in rows]
+
+
+def summary_from_rollup(user_id: int, start, end, group_by) -> list:
+    """Same shape as `summary_from_transactions`, read from monthly_rollup."""
+    spent_col = func.coalesce(func.sum(case((MonthlyRollup.type == 'expense', MonthlyRollup.total), else_=0)), 0).label('spent')
+    income_col = func.coalesce(func.sum(case((MonthlyRollup.type == 'income', MonthlyRollup.total), else_=0)), 0).label('income')
+    in_range = (
+        MonthlyRollup.user_id == user_id,
+        MonthlyRollup.month >= rollups.month_key(start),
+        MonthlyRollup.month <= rollups.month_key(end),
+    )
+
+    if not group_by:
+        rows = [db.session.query(spent_col, income_col).filter(*in_range).one()]
+        return [_summary_group({}, s, i) for s, i in rows]
+
+    if group_by == 'category':
+        rows = (
+            db.session.query(MonthlyRollup.category_id, Category.name, spent_col, income_col)
+            .outerjoin(Category, MonthlyRollup.category_id == Category.id)
+            .filter(*in_range)
+            .group_by(MonthlyRollup.category_id, Category.name)
+            .order_by(spent_col.desc())
+            .all()
+        )
+        return [
+            _summary_group({"category_id": cid or None, "category_name": name}, s, i)
+            for cid, name, s, i in rows
+        ]
+
+    rows = (
+        db.session.query(MonthlyRollup.month, spent_col, income_col)
+        .filter(*in_range)
+        .group_by(MonthlyRollup.month)
+        .order_by(MonthlyRollup.month)
+        .all()
+    )
+    return [_summary_group({"period": month}, s, i) for month, s, i in rows]
+
+
+def _summary_group(keys: dict, spent, income) -> dict:
+    spent, income = float(spent), float(income)
+    return {**keys, "spent": spent, "income": income, "net": money.add(income, -spent)}
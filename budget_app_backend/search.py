@@ -0,0 +1,198 @@
+"""
+search.py
+
+Note text search for GET /transactions?q=...
+
+A query matches notes containing every word of `q` as a word prefix
+("coff bott" matches "Coffee at Blue Bottle"), case- and accent-insensitive.
+
+On SQLite the `transaction_fts` FTS5 table indexes `transaction.note` as an
+external-content table: triggers keep it in step with every insert, update
+and delete, so the write paths need no extra code. It is created with the
+`transaction` table (models.py hooks `install_fts`) or by
+`apply_quick_ddl.py` for existing databases, which also backfills it.
+
+FTS5 returns matches in rowid order for every user at once, but lists are
+one user's rows ordered by date. An FTS lookup costs as much as the
+query's posting lists across all users, while a scan of the user's
+(user_id, date) index costs as many entries as it reads before a page
+fills; ix_transaction_user_date_note carries the note, so the LIKE
+prefilter runs on index entries. `note_matches()` picks the cheaper one
+per user and query (cached):
+  - users with at most SCAN_ROW_LIMIT transactions are always scanned;
+  - otherwise one capped pass over the FTS matches counts them in total
+    and for this user, and FTS is used when it reads fewer rows than the
+    scan would before filling a page (or the user's whole slice).
+Scanned rows are tested with the `note_match()` SQL function. Other
+databases (or SQLite builds without FTS5) fall back to ILIKE per word.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+from sqlalchemy import text, event, func, and_, or_, select, literal_column
+from database import db
+from cache import TTLCache
+
+FTS_TABLE = 'transaction_fts'
+
+# Users this small are scanned whatever the query: the whole slice costs
+# less than any FTS posting list worth reading
+SCAN_ROW_LIMIT = 20_000
+# FTS matches counted per query; beyond this the scan is always cheaper
+FTS_ROW_LIMIT = 50_000
+# Rows a page needs (routes.transactions.DEFAULT_PAGE_SIZE)
+PAGE_ROWS = 50
+
+FTS_DDL = (
+    f'''CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE}
+        USING fts5(note, content='transaction', content_rowid='id')''',
+    f'''CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON "transaction" BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, note) VALUES (new.id, new.note);
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON "transaction" BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, note) VALUES ('delete', old.id, old.note);
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF note ON "transaction" BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, note) VALUES ('delete', old.id, old.note);
+        INSERT INTO {FTS_TABLE}(rowid, note) VALUES (new.id, new.note);
+    END''',
+)
+
+# Engines known to have the FTS table, keyed by id(engine)
+_fts_engines: dict = {}
+
+# (engine, user_id[, match]) -> row / match counts; these change slowly
+_counts = TTLCache(maxsize=4096, ttl=600)
+
+
+def install_fts(target, connection, **kw):
+    """`after_create` hook for the transaction table (SQLite only)."""
+    if connection.dialect.name != 'sqlite':
+        return
+    for ddl in FTS_DDL:
+        connection.execute(text(ddl))
+
+
+def rebuild_fts(connection):
+    """Re-index every note (after creating the table on a populated database)."""
+    connection.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+
+def install_functions(engine):
+    """Register `note_match()` on every new connection of a SQLite engine."""
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _register(dbapi_conn, _record):
+        dbapi_conn.create_function('note_match', 2, _note_match, deterministic=True)
+
+
+def fts_available() -> bool:
+    engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        return False
+    key = id(engine)
+    if key not in _fts_engines:
+        with engine.connect() as conn:
+            _fts_engines[key] = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": FTS_TABLE},
+            ).first() is not None
+    return _fts_engines[key]
+
+
+def _fold(s: str) -> str:
+    """Case- and accent-fold the way FTS5's unicode61 tokenizer does."""
+    if s.isascii():
+        return s.lower()
+    return ''.join(c for c in unicodedata.normalize('NFKD', s) if not unicodedata.combining(c)).casefold()
+
+
+def words(q: str) -> list:
+    return re.findall(r'[^\W_]+', _fold(q or ''))
+
+
+@lru_cache(maxsize=256)
+def _word_patterns(query_words: str) -> tuple:
+    # A word prefix: preceded by the start or a separator (anything but a letter/digit)
+    return tuple(re.compile(r'(?<![^\W_])' + re.escape(w)) for w in query_words.split())
+
+
+def _note_match(note, query_words):
+    if not note:
+        return 0
+    folded = _fold(note)
+    return int(all(p.search(folded) for p in _word_patterns(query_words)))
+
+
+def _fts_rowids(match: str):
+    return (
+        select(literal_column('rowid'))
+        .select_from(text(FTS_TABLE))
+        .where(text(f'{FTS_TABLE} MATCH :fts_q').bindparams(fts_q=match))
+    )
+
+
+def _user_rows(user_id: int) -> int:
+    """The user's transaction count (cached)."""
+    key = (id(db.engine), user_id)
+    count = _counts.get(key)
+    if count is None:
+        count = db.session.execute(
+            text('SELECT count(*) FROM "transaction" WHERE user_id = :user_id'), {"user_id": user_id}
+        ).scalar()
+        _counts.set(key, count)
+    return count
+
+
+def _match_counts(user_id: int, match: str) -> tuple:
+    """(all notes, the user's notes) matching an FTS query, over at most FTS_ROW_LIMIT + 1 matches (cached)."""
+    key = (id(db.engine), user_id, match)
+    counts = _counts.get(key)
+    if counts is None:
+        total, mine = db.session.execute(text(f'''
+            SELECT count(*), coalesce(sum(user_id = :user_id), 0) FROM (
+                SELECT t.user_id FROM {FTS_TABLE} JOIN "transaction" t ON t.id = {FTS_TABLE}.rowid
+                WHERE {FTS_TABLE} MATCH :fts_q LIMIT :cap
+            )'''), {"user_id": user_id, "fts_q": match, "cap": FTS_ROW_LIMIT + 1}).one()
+        counts = (total, mine)
+        _counts.set(key, counts)
+    return counts
+
+
+def _use_fts(user_id: int, match: str) -> bool:
+    """True when reading the FTS matches is cheaper than scanning the user's rows by date."""
+    rows = _user_rows(user_id)
+    if rows <= SCAN_ROW_LIMIT:
+        return False
+    total, mine = _match_counts(user_id, match)
+    if total > FTS_ROW_LIMIT:
+        return False
+    # Rows the date-ordered scan reads before a page fills (all of them if it never does)
+    scanned = rows if mine < PAGE_ROWS else rows * PAGE_ROWS // mine
+    return total < scanned
+
+
+def note_matches(id_column, note_column, q: str, user_id: int):
+    """WHERE clause for `user_id`'s transactions whose note matches `q`, or None if `q` has no words."""
+    query_words = words(q)
+    if not query_words:
+        return None
+    if not fts_available():
+        return and_(*(note_column.icontains(w, autoescape=True) for w in query_words))
+
+    match = ' '.join(f'"{w}"*' for w in query_words)
+    if _use_fts(user_id, match):
+        return id_column.in_(_fts_rowids(match))
+
+    # Exact per-row check, applied to whatever the prefilter lets through
+    check = func.note_match(note_column, ' '.join(query_words)) == 1
+
+    # LIKE runs in C and rejects most rows before the Python check; it is
+    # only exact for ASCII notes, so notes with other characters skip it.
+    prefilter = or_(
+        and_(*(note_column.like(f'%{w}%') for w in query_words)),
+        note_column.op('GLOB')('*[^ -~]*'),
+    )
+    return and_(prefilter, check)
@@ -1,89 +1,181 @@
-from app import app
-from database import db
+"""
+seed_categories.py
+
+Default categories. The template tree is owned by a system user
+(`system@local`); new users get a copy of it at signup (see
+SIGNUP_CATEGORY_TEMPLATE in config.py).
+
+Both seeding and cloning insert one tree level per statement
+(multi-row INSERT ... RETURNING), so the cost depends on the tree's depth,
+not on how many categories it has.
+
+Run:
+  python seed_categories.py                      # seed the system template
+  python seed_categories.py clone --user ID      # copy the template to a user
+  python seed_categories.py clone --all-empty    # ... to every user without categories
+
+"""
+from sqlalchemy import insert, select
+from database import db, create_db_app
 from models import Category, User
+from category_tree import CategoryTree
+import versions
+
+SYSTEM_EMAIL = 'system@local'
 
+DEFAULT_CATEGORIES = {
+    "Foods & Drinks": [
+        "Fast Food",
+        "Restaurant, fast-food",
+        "Groceries"
+    ],
+    "Shopping": [
+        "Drug-store, chemist",
+        "Free time",
+        "Stationery, tools",
+        "Gifts, joy",
+        "Electronics, accessories",
+        "Pets, animals",
+        "Home, garden",
+        "Toilertries",
+        "Kitchen",
+        "Kids",
+        "Health and beauty",
+        "Jewels, accessories",
+        "Men's",
+        "Fragrances",
+        "Footwear",
+        "Clothes"
+    ],
+    "Housing": [
+        "Energy and Utilities"
+    ],
+    "Transport": [],
+    "Vehicle": [],
+    "Life & Entertainment": [
+        "TV, Streaming",
+        "Activeness sport and fitness",
+        "Holiday and trips"
+    ],
+    "Communication and PC": [
+        "Internet",
+        "Airtime",
+        "Bundles"
+    ],
+    "Financial Expenses": [
+        "Charges & fees",
+        "Loans & interests"
+    ],
+    "Investments": [
+        "Trade",
+        "MMF",
+        "Savings"
+    ],
+    "Income": [],
+    "Others": []
+}
 
-def seed_categories(system_user_email: str = 'system@local'):
-    """Seed a set of default categories owned by a system user.
 
-    The function ensures a system user exists and assigns all seeded
-    categories to that user's `user_id` so they conform to the current
-    `OwnableMixin` constraints.
+def insert_levels(user_id: int, levels: list) -> int:
+    """Insert a tree for `user_id`, one multi-row INSERT per level (no commit).
+
+    `levels[0]` holds the roots; every entry is (key, name, parent_key) where
+    parent_key refers to a key of the previous level (None for roots).
+    Returns the number of categories created.
     """
+    new_ids = {}
+    for level in levels:
+        if not level:
+            break
+        ids = db.session.scalars(
+            insert(Category).returning(Category.id, sort_by_parameter_order=True),
+            [{"user_id": user_id, "name": name, "parent_id": new_ids.get(parent_key)} for _, name, parent_key in level],
+        ).all()
+        new_ids.update(zip((key for key, _, _ in level), ids))
+    if new_ids:
+        versions.bump(user_id, versions.CATEGORIES)
+    return len(new_ids)
 
-    categories = {
-        "Foods & Drinks": [
-            "Fast Food",
-            "Restaurant, fast-food",
-            "Groceries"
-        ],
-        "Shopping": [
-            "Drug-store, chemist",
-            "Free time",
-            "Stationery, tools",
-            "Gifts, joy",
-            "Electronics, accessories",
-            "Pets, animals",
-            "Home, garden",
-            "Toilertries",
-            "Kitchen",
-            "Kids",
-            "Health and beauty",
-            "Jewels, accessories",
-            "Men's",
-            "Fragrances",
-            "Footwear",
-            "Clothes"
-        ],
-        "Housing": [
-            "Energy and Utilities"
-        ],
-        "Transport": [],
-        "Vehicle": [],
-        "Life & Entertainment": [
-            "TV, Streaming",
-            "Activeness sport and fitness",
-            "Holiday and trips"
-        ],
-        "Communication and PC": [
-            "Internet",
-            "Airtime",
-            "Bundles"
-        ],
-        "Financial Expenses": [
-            "Charges & fees",
-            "Loans & interests"
-        ],
-        "Investments": [
-            "Trade",
-            "MMF",
-            "Savings"
-        ],
-        "Income": [],
-        "Others": []
-    }
-    with app.app_context():
-        # Ensure a system user exists to own seeded categories
-        system_user = User.query.filter_by(email=system_user_email).first()
-        if not system_user:
-            system_user = User(email=system_user_email, password_hash='', name='System')
-            db.session.add(system_user)
-            db.session.commit()
 
-        for parent_name, subcats in categories.items():
-            # Create parent category with system user ownership
-            parent = Category(name=parent_name, user_id=system_user.id)
-            db.session.add(parent)
-            db.session.commit()
+def tree_levels(tree: CategoryTree) -> list:
+    """(id, name, parent_id) rows of a CategoryTree grouped by depth."""
+    levels, current = [], list(tree.roots)
+    while current:
+        # Roots may point at a parent outside the tree; their copies become top level
+        levels.append([(cid, tree.nodes[cid]["name"], tree.nodes[cid]["parent_id"] if levels else None) for cid in current])
+        current = [child for cid in current for child in tree.children[cid]]
+    return levels
+
+
+def clone_tree(src_user_id: int, dst_user_id: int) -> int:
+    """Copy every category of one user to another (no commit)."""
+    rows = db.session.execute(
+        select(Category.id, Category.name, Category.parent_id).where(Category.user_id == src_user_id)
+    ).all()
+    return insert_levels(dst_user_id, tree_levels(CategoryTree(rows)))
 
-            # Create subcategories linked to parent and assigned to system user
-            for sub in subcats:
-                child = Category(name=sub, parent_id=parent.id, user_id=system_user.id)
-                db.session.add(child)
 
-        db.session.commit()
-        print("Categories seeded successfully!")
+def template_user_id(email: str = SYSTEM_EMAIL):
+    return db.session.query(User.id).filter(User.email == email).scalar()
+
+
+def clone_template(dst_user_id: int, email: str = SYSTEM_EMAIL) -> int:
+    """Give a user a copy of the template tree; 0 if there is no template."""
+    src_user_id = template_user_id(email) if email else None
+    if src_user_id is None or src_user_id == dst_user_id:
+        return 0
+    return clone_tree(src_user_id, dst_user_id)
+
+
+def seed_template(email: str = SYSTEM_EMAIL, categories: dict = None) -> int:
+    """Create the system user and its category tree, unless it already has one."""
+    categories = categories or DEFAULT_CATEGORIES
+    system_id = template_user_id(email)
+    if system_id is None:
+        system_user = User(email=email, password_hash='', name='System')
+        db.session.add(system_user)
+        db.session.flush()
+        system_id = system_user.id
+    elif db.session.query(Category.id).filter(Category.user_id == system_id).first():
+        return 0
+
+    levels = [
+        [(parent, parent, None) for parent in categories],
+        [((parent, sub), sub, parent) for parent, subs in categories.items() for sub in subs],
+    ]
+    created = insert_levels(system_id, levels)
+    db.session.commit()
+    return created
+
+
+def seed_categories(system_user_email: str = SYSTEM_EMAIL):
+    """Seed the default categories owned by a system user (script entry point)."""
+    with create_db_app().app_context():
+        created = seed_template(system_user_email)
+        print(f"Categories seeded successfully! ({created} created)" if created else "Categories already seeded")
 
 
 if __name__ == "__main__":
-    seed_categories()
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Seed or clone default categories')
+    parser.add_argument('command', nargs='?', choices=['seed', 'clone'], default='seed')
+    parser.add_argument('--user', type=int, help='clone: target user id')
+    parser.add_argument('--all-empty', action='store_true', help='clone: every user without categories')
+    parser.add_argument('--template', default=SYSTEM_EMAIL, help='email of the template owner')
+    args = parser.parse_args()
+
+    if args.command == 'seed':
+        seed_categories(args.template)
+    else:
+        with create_db_app().app_context():
+            if args.user:
+                targets = [args.user]
+            elif args.all_empty:
+                has_categories = select(Category.user_id).distinct()
+                targets = [uid for (uid,) in db.session.query(User.id).filter(User.id.not_in(has_categories))]
+            else:
+                parser.error('clone needs --user or --all-empty')
+            total = sum(clone_template(uid, args.template) for uid in targets)
+            db.session.commit()
+            print(f"Cloned {total} categories to {len(targets)} users")
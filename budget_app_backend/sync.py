@@ -0,0 +1,94 @@
+"""
+sync.py
+
+Change feed behind `GET /sync` for offline-first clients.
+
+Transactions, categories and budgets carry `updated_at` (set on insert and
+on every update, including bulk Core updates). Deletes stay hard deletes;
+each one leaves a `tombstone` row so clients can learn about it. A sync
+token is the server clock at the start of the previous sync; the next sync
+returns rows changed since then, re-reading SYNC_OVERLAP_SECONDS before it
+so writes that committed late are not missed. Clients apply the feed as
+idempotent upserts/deletes by id, so the overlap is harmless.
+
+Tombstones older than SYNC_TOMBSTONE_DAYS are purged; a token older than
+that gets a full snapshot (`reset: true`) instead of a delta.
+
+Run:
+  python sync.py purge
+
+"""
+import base64
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import insert, select, delete
+from database import db
+from models import Tombstone
+
+
+def encode_token(ts: datetime) -> str:
+    return base64.urlsafe_b64encode(ts.isoformat().encode()).decode()
+
+
+def decode_token(token: str) -> datetime:
+    """Raises ValueError for anything that isn't a token we issued."""
+    try:
+        return datetime.fromisoformat(base64.urlsafe_b64decode(token.encode()).decode())
+    except Exception as e:
+        raise ValueError('invalid sync token') from e
+
+
+def record_deletes(user_id: int, resource: str, row_ids):
+    """Stage tombstones for hard-deleted rows (no commit)."""
+    row_ids = list(row_ids)
+    if not row_ids:
+        return
+    now = datetime.utcnow()
+    db.session.execute(insert(Tombstone), [
+        {"user_id": user_id, "resource": resource, "row_id": rid, "deleted_at": now} for rid in row_ids
+    ])
+
+
+def horizon() -> datetime:
+    """Oldest point a delta can start from; older tokens need a full snapshot."""
+    return datetime.utcnow() - timedelta(days=current_app.config['SYNC_TOMBSTONE_DAYS'])
+
+
+def changed_rows(model, columns, user_id: int, since=None) -> list:
+    """Column tuples of a user's rows updated since `since` (all rows if None)."""
+    stmt = select(*columns).where(model.user_id == user_id).order_by(model.id)
+    if since is not None:
+        stmt = stmt.where(model.updated_at >= since)
+    return db.session.execute(stmt).all()
+
+
+def deleted_ids(user_id: int, since) -> dict:
+    """resource -> [row ids] deleted since `since`."""
+    out = {}
+    rows = db.session.execute(
+        select(Tombstone.resource, Tombstone.row_id)
+        .where(Tombstone.user_id == user_id, Tombstone.deleted_at >= since)
+        .order_by(Tombstone.id)
+    )
+    for resource, row_id in rows:
+        out.setdefault(resource, []).append(row_id)
+    return out
+
+
+def purge_tombstones(commit: bool = True) -> int:
+    result = db.session.execute(delete(Tombstone).where(Tombstone.deleted_at < horizon()))
+    if commit:
+        db.session.commit()
+    return result.rowcount
+
+
+if __name__ == '__main__':
+    import argparse
+    from database import create_db_app
+
+    parser = argparse.ArgumentParser(description='Delta sync maintenance')
+    parser.add_argument('command', choices=['purge'])
+    args = parser.parse_args()
+
+    with create_db_app().app_context():
+        print(f"Purged {purge_tombstones()} tombstones")
@@ -0,0 +1,31 @@
+"""Unit tests for passwords.py (run from budget_app_backend/: python -m pytest tests)."""
+import os
+import sys
+
+import pytest
+from flask import Flask
+from werkzeug.security import generate_password_hash
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import passwords
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    with app.app_context():
+        yield app
+
+
+@pytest.mark.parametrize('method', ['pbkdf2', 'pbkdf2:sha256', 'scrypt'])
+def test_short_method_string_does_not_force_rehash(app, method):
+    app.config['PASSWORD_HASH_METHOD'] = method
+    stored = generate_password_hash('secret', method)
+    assert not passwords.needs_rehash(stored)
+
+
+def test_other_parameters_need_rehash(app):
+    app.config['PASSWORD_HASH_METHOD'] = 'scrypt'
+    assert passwords.needs_rehash(generate_password_hash('secret', 'pbkdf2:sha256:1000'))
+    assert passwords.needs_rehash(generate_password_hash('secret', 'scrypt:16384:8:1'))
@@ -0,0 +1,85 @@
+"""
+user_settings.py
+
+Per-user settings as `user_setting(user_id, key, value)` rows instead of
+one JSON blob on `user`: a PATCH upserts/deletes only the keys it names,
+and there is no in-place dict mutation for the ORM to miss.
+
+Reads on request paths go through `identity.user_settings_for()`, which keeps
+the settings with the cached user row (GET /me/settings uses
+`identity.load_user_current()`, which re-checks the version). Writes bump `user.settings_version`
+(the `sv` token claim) in the same transaction; callers commit and then
+call `identity.invalidate_user()`.
+"""
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.dialects import sqlite, postgresql
+from database import db
+from models import User, UserSetting
+
+MAX_KEY_LENGTH = 64
+MAX_KEYS = 100
+
+
+def _insert():
+    dialect = sqlite if db.engine.dialect.name == 'sqlite' else postgresql
+    return dialect.insert(UserSetting)
+
+
+def load(user_id: int) -> dict:
+    """All settings of a user as a dict (uncached)."""
+    rows = db.session.execute(select(UserSetting.key, UserSetting.value).where(UserSetting.user_id == user_id))
+    return {key: value for key, value in rows}
+
+
+def validate(changes) -> str:
+    """Error message for an invalid settings object, or None."""
+    if not isinstance(changes, dict):
+        return "Settings must be a JSON object"
+    for key in changes:
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return f"Setting keys must be 1-{MAX_KEY_LENGTH} characters"
+    return None
+
+
+def apply(user_id: int, changes: dict, replace: bool = False):
+    """Write `changes` (no commit); returns (settings_version, email), or None if there is no such user.
+
+    Keys with a null value are removed (JSON merge patch). With `replace`
+    every key not in `changes` is removed as well.
+    """
+    bumped = db.session.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(settings_version=func.coalesce(User.settings_version, 0) + 1)
+        .returning(User.settings_version, User.email)
+    ).first()
+    if bumped is None:
+        return None
+
+    removed = [key for key, value in changes.items() if value is None]
+    if replace:
+        db.session.execute(delete(UserSetting).where(UserSetting.user_id == user_id))
+    elif removed:
+        db.session.execute(delete(UserSetting).where(UserSetting.user_id == user_id, UserSetting.key.in_(removed)))
+
+    rows = [{"user_id": user_id, "key": key, "value": value} for key, value in changes.items() if value is not None]
+    if rows:
+        stmt = _insert()
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserSetting.user_id, UserSetting.key],
+            set_={"value": stmt.excluded.value},
+        )
+        db.session.execute(stmt, rows)
+    return tuple(bumped)
+
+
+def backfill_from_json() -> int:
+    """Copy legacy `user.settings` JSON blobs into user_setting; returns rows written."""
+    rows = []
+    for user_id, blob in db.session.execute(select(User.id, User.settings).where(User.settings.is_not(None))):
+        if isinstance(blob, dict):
+            rows.extend({"user_id": user_id, "key": str(k)[:MAX_KEY_LENGTH], "value": v} for k, v in blob.items() if v is not None)
+    if rows:
+        db.session.execute(_insert().on_conflict_do_nothing(), rows)
+    db.session.commit()
+    return len(rows)
@@ -0,0 +1,91 @@
+"""
+versions.py
+
+Per-user change counters for conditional GETs on the list endpoints.
+
+Every mutation in routes/*.py calls `bump()` before its commit, so the
+counter moves in the same DB transaction as the change. List views wrapped
+in `@conditional(resource)` derive a weak ETag from (resource, version,
+query string) and answer `304 Not Modified` when the client's
+If-None-Match still matches - one primary-key lookup on `resource_version`
+instead of rebuilding the payload from the main tables.
+"""
+import hashlib
+from datetime import datetime
+from functools import wraps
+from flask import request, make_response
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy.dialects import sqlite, postgresql
+from database import db
+from models import ResourceVersion
+
+TRANSACTIONS = 'transactions'
+CATEGORIES = 'categories'
+BUDGETS = 'budgets'
+
+
+def bump(user_id: int, *resources: str):
+    """Increment the counters of `resources` for a user (no commit)."""
+    bump_many([user_id], *resources)
+
+
+def bump_many(user_ids, *resources: str):
+    """`bump` for several users in one executemany (no commit)."""
+    dialect = sqlite if db.engine.dialect.name == 'sqlite' else postgresql
+    stmt = dialect.insert(ResourceVersion)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id', 'resource'],
+        set_={"version": ResourceVersion.version + 1, "updated_at": stmt.excluded.updated_at},
+    )
+    now = datetime.utcnow()
+    db.session.execute(stmt, [
+        {"user_id": user_id, "resource": r, "version": 1, "updated_at": now}
+        for user_id in user_ids for r in resources
+    ])
+
+
+def current(user_id: int, resource: str):
+    """(version, updated_at) for a user's resource; (0, None) if never changed."""
+    row = (
+        db.session.query(ResourceVersion.version, ResourceVersion.updated_at)
+        .filter(ResourceVersion.user_id == user_id, ResourceVersion.resource == resource)
+        .first()
+    )
+    return (row.version, row.updated_at) if row else (0, None)
+
+
+def etag(user_id: int, resource: str, version: int, extra: str = '') -> str:
+    # The query string is part of the tag: each page/filter is its own representation
+    key = f"{user_id}:{resource}:{version}:{request.query_string.decode()}:{extra}"
+    return hashlib.sha1(key.encode()).hexdigest()[:20]
+
+
+def conditional(resource: str, key=None):
+    """Decorator for JWT-protected list views: ETag/Last-Modified and 304s.
+
+    `key`, if given, is called per request and its result is added to the
+    tag: whatever else the response depends on besides the version and the
+    query string (e.g. a date window defaulting to today).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            user_id = int(get_jwt_identity())
+            version, updated_at = current(user_id, resource)
+            tag = etag(user_id, resource, version, key() if key else '')
+
+            if request.if_none_match.contains_weak(tag):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(tag, weak=True)
+            if updated_at is not None:
+                response.last_modified = updated_at
+            # Clients must revalidate; the payload is per user
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,37 @@
+"""
+wsgi.py
+
+Production entry point. Serve with a real WSGI server instead of the
+Werkzeug dev server in `app.py`:
+
+  gunicorn (Linux/macOS):
+    APP_ENV=production gunicorn -w 4 -b 0.0.0.0:8000 "wsgi:create_wsgi_app()"
+
+  waitress (any OS, including Windows):
+    APP_ENV=production python wsgi.py --port 8000 --threads 8
+
+The outbox worker runs separately in production: `python outbox.py`.
+"""
+import os
+
+
+def create_wsgi_app():
+    """Return the configured Flask app (called once per server worker)."""
+    from app import create_app
+    return create_app(os.getenv('APP_ENV', 'production'))
+
+
+def serve(host: str = '0.0.0.0', port: int = 8000, threads: int = 8):
+    from waitress import serve as waitress_serve
+    waitress_serve(create_wsgi_app(), host=host, port=port, threads=threads)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Serve the Budget App API with waitress')
+    parser.add_argument('--host', default=os.getenv('HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('PORT', '8000')))
+    parser.add_argument('--threads', type=int, default=int(os.getenv('WEB_THREADS', '8')))
+    args = parser.parse_args()
+    serve(args.host, args.port, args.threads)